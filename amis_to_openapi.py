@@ -1,12 +1,21 @@
 import os
 import sys
+import re
 import json
 import argparse
+import contextvars
+from concurrent.futures import ProcessPoolExecutor
+from conversion_cache import ConversionCache, DEFAULT_MAX_MB, hash_file, cache_key
+from profiler import Profiler, NULL_PROFILER
 
-DEBUG_ON = False
+# 调试日志开关：ContextVar 按线程/上下文隔离，服务模式下并发请求互不影响
+_DEBUG = contextvars.ContextVar('amis_debug', default=False)
+
+def set_debug(on):
+    _DEBUG.set(bool(on))
 
 def debug(msg, *args):
-    if DEBUG_ON:
+    if _DEBUG.get():
         print("[DEBUG]", msg, *args)
 
 class ObjectCollector:
@@ -63,18 +72,6 @@ def upper_camel(s):
     parts = s.replace('-', '_').replace('.', '_').split('_')
     return ''.join([w[:1].upper() + w[1:] for w in parts if w])
 
-def collect_all_fields(node, fields=None):
-    if fields is None: fields = set()
-    if isinstance(node, dict):
-        if 'name' in node and isinstance(node['name'], str):
-            fields.add(node['name'])
-        for v in node.values():
-            collect_all_fields(v, fields)
-    elif isinstance(node, list):
-        for item in node:
-            collect_all_fields(item, fields)
-    return fields
-
 def amis_type_to_java_type(t):
     if t in ('input-date', 'input-datetime'):
         return 'java.util.Date'
@@ -86,19 +83,6 @@ def is_table_crud_type(type_str):
     t = type_str.lower()
     return t.startswith('crud') or t.startswith('table')
 
-def find_table_crud_blocks(data, stat: StatCollector, path="root"):
-    result = []
-    if isinstance(data, dict):
-        t = data.get('type')
-        stat.record_attrs(data)
-        if is_table_crud_type(t): result.append(data)
-        for v in data.values():
-            result.extend(find_table_crud_blocks(v, stat))
-    elif isinstance(data, list):
-        for item in data:
-            result.extend(find_table_crud_blocks(item, stat))
-    return result
-
 def extract_fields_from_list(lst):
     fields = []
     if not isinstance(lst, list): return fields
@@ -153,82 +137,333 @@ def is_crud_behavior(behaviors):
             return True
     return False
 
-def collect_crud_apis(node, apis=None, path="root"):
-    if apis is None: apis = []
-    if isinstance(node, dict):
-        behaviors = get_behavior_from_node(node)
-        if "api" in node and isinstance(node["api"], dict):
-            method = node["api"].get("method", "").lower()
-            url = node["api"].get("url", "")
-            if is_crud_behavior(behaviors) or method in {"post", "put", "delete", "get"}:
-                op = "query"
-                if method == "post": op = "add"
-                elif method == "put": op = "edit"
-                elif method == "delete": op = "delete"
-                elif method == "get": op = "view"
-                apis.append({
-                    "url": url,
-                    "method": method,
-                    "fields": [],
-                    "op": op,
-                    "path": path
-                })
-        if "onEvent" in node and isinstance(node["onEvent"], dict):
-            for event, actions in node["onEvent"].items():
-                acts = actions.get("actions") if isinstance(actions, dict) else actions
-                if isinstance(acts, list):
-                    for idx, a in enumerate(acts):
-                        collect_crud_apis(a, apis, f"{path}.onEvent.{event}[{idx}]")
-        for k in ("dialog", "drawer", "form"):
-            if k in node and isinstance(node[k], dict):
-                collect_crud_apis(node[k], apis, f"{path}.{k}")
-        for k in ("actions", "body", "columns", "buttons", "items"):
-            if k in node and isinstance(node[k], (list, dict)):
-                collect_crud_apis(node[k], apis, f"{path}.{k}")
-        for k, v in node.items():
-            if k not in ("api", "onEvent", "dialog", "drawer", "form", "actions", "body", "columns", "buttons", "items"):
-                collect_crud_apis(v, apis, f"{path}.{k}")
-    elif isinstance(node, list):
-        for idx, item in enumerate(node):
-            collect_crud_apis(item, apis, f"{path}[{idx}]")
-    return apis
-
-def scan_amis_objects(node, collector, path="root"):
-    if isinstance(node, dict):
-        typ = node.get('type')
-        name = node.get('label', node.get('title', ''))
-        fields = set()
-        for k in ['columns', 'body', 'fields']:
-            v = node.get(k)
-            if v:
-                fields.update(collect_all_fields(v))
-        if typ in ('form', 'dialog', 'drawer'):
-            if 'body' in node:
-                fields.update(collect_all_fields(node['body']))
-        if typ:
+def crud_api_from_node(node, path):
+    """节点自身 api（dict）且满足 CRUD 行为或标准 HTTP 方法时，返回 api 描述，否则返回 None"""
+    method = node["api"].get("method", "").lower()
+    url = node["api"].get("url", "")
+    if is_crud_behavior(get_behavior_from_node(node)) or method in {"post", "put", "delete", "get"}:
+        op = "query"
+        if method == "post": op = "add"
+        elif method == "put": op = "edit"
+        elif method == "delete": op = "delete"
+        elif method == "get": op = "view"
+        return {
+            "url": url,
+            "method": method,
+            "fields": [],
+            "op": op,
+            "path": path
+        }
+    return None
+
+# API 收集的遍历顺序：自身 api -> onEvent 动作 -> dialog/drawer/form -> actions/body/... -> 其余 key
+API_MODE_NORMAL, API_MODE_ON_EVENT, API_MODE_EVENT, API_MODE_HIDDEN = 0, 1, 2, 3
+API_NESTED_KEYS = ("dialog", "drawer", "form")
+API_CONTAINER_KEYS = ("actions", "body", "columns", "buttons", "items")
+OBJECT_FIELD_KEYS = ('columns', 'body', 'fields')
+_EXIT = object()
+
+class AmisScanResult:
+    def __init__(self):
+        self.blocks = []          # type 以 crud/table 开头的区块（先序）
+        self.block_fields = []    # 每个区块子树内全部 name（按出现顺序去重）
+        self.block_apis = []      # 每个区块子树内的 [(遍历键, api)]
+        self.objects = []         # (type, name, path, fields)
+        self.attrs = set()        # 所有 dict key
+
+    def apis_of(self, idx):
+        """区块内 API 按遍历顺序排列，(url, method) 相同只保留第一个"""
+        unique = {}
+        for _, a in sorted(self.block_apis[idx], key=lambda x: x[0]):
+            k = (a['url'], a['method'])
+            if k not in unique:
+                unique[k] = a
+        return list(unique.values())
+
+    def record_objects(self, collector):
+        for typ, name, path, fields in self.objects:
             collector.record(typ, name, path, fields)
-        for k, v in node.items():
-            scan_amis_objects(v, collector, f"{path}.{k}")
-    elif isinstance(node, list):
-        for idx, item in enumerate(node):
-            scan_amis_objects(item, collector, f"{path}[{idx}]")
-
-def extract_main_table_name(amis_json, page_name):
-    # 优先 crud/table 的 tableName，没有就用 page_name
-    stat = StatCollector()
-    blocks = find_table_crud_blocks(amis_json, stat)
-    for crud in blocks:
-        if 'tableName' in crud and crud['tableName']:
-            return crud['tableName']
-    return page_name
 
-def amis_to_openapi(amis_json, page_name, amis_file, stat, obj_collector, base_url="http://your.base.url"):
+def _api_child(mode, k, v, pos):
+    """按 API 收集顺序计算子节点的模式与排序键；返回 None 表示该子节点不参与 API 收集"""
+    if mode == API_MODE_NORMAL:
+        if k == "api":
+            return None
+        if k == "onEvent":
+            return (API_MODE_ON_EVENT, (1, 0)) if isinstance(v, dict) else None
+        if k in API_NESTED_KEYS:
+            return (API_MODE_NORMAL, (2, API_NESTED_KEYS.index(k))) if isinstance(v, dict) else None
+        if k in API_CONTAINER_KEYS:
+            return API_MODE_NORMAL, (3, API_CONTAINER_KEYS.index(k))
+        return API_MODE_NORMAL, (4, pos)
+    if mode == API_MODE_ON_EVENT:
+        return API_MODE_EVENT, (0, pos)
+    if mode == API_MODE_EVENT and k == "actions" and isinstance(v, list):
+        return API_MODE_EVENT, (0, 0)
+    return None
+
+def scan_amis(root):
+    """
+    单次迭代遍历 AMIS 树，同时收集 crud/table 区块、区块字段、区块 API、对象统计和属性统计。
+    使用显式栈，不受递归深度限制；每个节点只访问一次。
+    - 对象字段：后序汇总子树 name 集合（小集合并入大集合），避免对每个对象重复遍历子树
+    - API：收集顺序与可见范围沿用原递归实现。api_groups 中每组为 (模式, 遍历键, 区块序号)，
+      同组区块共享遍历状态，区块内 API 最终按遍历键排序
+    - 根节点为数组时按 {"body": 数组} 处理（对象路径为 root.body[i]，属性统计含 body），与原实现一致
+    """
+    if isinstance(root, list):
+        root = {"body": root}
+    result = AmisScanResult()
+    root_frame = [None]
+    # 进入：(节点, 路径, api_groups, 区块字段收集器, 父帧, 是否计入父对象字段)
+    # 退出：(_EXIT, 本帧, 父帧, 是否计入父对象字段)；帧为 [子树name集合, 对象字段集合]
+    stack = [(root, "root", (), (), root_frame, False)]
+    while stack:
+        item = stack.pop()
+        if item[0] is _EXIT:
+            _, frame, parent, into_obj = item
+            names = frame[0]
+            if names:
+                if into_obj:
+                    parent[1].update(names)
+                if parent[0] is None or len(parent[0]) < len(names):
+                    parent[0], names = names, parent[0]
+                if names:
+                    parent[0].update(names)
+            continue
+        node, path, api_groups, block_sinks, parent, into_obj = item
+        frame = [None, None]
+        stack.append((_EXIT, frame, parent, into_obj))
+        if isinstance(node, dict):
+            result.attrs.update(node.keys())
+            typ = node.get('type')
+            if is_table_crud_type(typ):
+                idx = len(result.blocks)
+                result.blocks.append(node)
+                result.block_fields.append({})
+                result.block_apis.append([])
+                block_sinks = block_sinks + (result.block_fields[idx],)
+                for g, (mode, key, blocks) in enumerate(api_groups):
+                    if mode == API_MODE_NORMAL:
+                        api_groups = api_groups[:g] + ((mode, key, blocks + (idx,)),) + api_groups[g + 1:]
+                        break
+                else:
+                    api_groups = api_groups + ((API_MODE_NORMAL, (), (idx,)),)
+            name = node.get('name')
+            if isinstance(name, str):
+                frame[0] = {name}
+                for sink in block_sinks:
+                    sink[name] = None
+            if typ:
+                frame[1] = set()
+                result.objects.append((typ, node.get('label', node.get('title', '')), path, frame[1]))
+            if api_groups and isinstance(node.get("api"), dict):
+                api = None
+                for mode, key, blocks in api_groups:
+                    if mode == API_MODE_NORMAL:
+                        api = api or crud_api_from_node(node, path)
+                        if not api:
+                            break
+                        for idx in blocks:
+                            result.block_apis[idx].append((key, api))
+            children = []
+            for pos, (k, v) in enumerate(node.items()):
+                if not isinstance(v, (dict, list)):
+                    continue
+                child_groups = ()
+                for mode, key, blocks in api_groups:
+                    child = _api_child(mode, k, v, pos)
+                    if child:
+                        child_groups += ((child[0], key + child[1], blocks),)
+                child_into_obj = frame[1] is not None and k in OBJECT_FIELD_KEYS and bool(v)
+                children.append((v, f"{path}.{k}", child_groups, block_sinks, frame, child_into_obj))
+            stack.extend(reversed(children))
+        elif isinstance(node, list):
+            for idx in range(len(node) - 1, -1, -1):
+                child = node[idx]
+                if isinstance(child, (dict, list)):
+                    child_groups = tuple((API_MODE_NORMAL, key + (0, idx), blocks)
+                                         for mode, key, blocks in api_groups
+                                         if mode in (API_MODE_NORMAL, API_MODE_EVENT))
+                    stack.append((child, f"{path}[{idx}]", child_groups, block_sinks, frame, False))
+    return result
+
+_JSON_TOKEN = re.compile(
+    rb'[ \t\r\n]*(?:([{}\[\],:])|("[^"\\]*(?:\\.[^"\\]*)*")|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null))',
+    re.S)
+_JSON_SPACE = re.compile(rb'[ \t\r\n]*\Z')
+# 数字/字面量之后必须跟分隔符，否则可能被分块截断，需要继续读取
+_JSON_DELIMITERS = (b' ', b'\t', b'\r', b'\n', b',', b']', b'}', b':')
+_STREAM_SCALAR_KEYS = ('type', 'name', 'label', 'title')
+
+class _StreamFrame:
+    __slots__ = ('is_dict', 'start', 'seq', 'path', 'key', 'index', 'expect_key',
+                 'typ', 'name', 'label', 'title', 'has_label', 'names', 'obj_names')
+
+    def __init__(self, is_dict, start, seq, path):
+        self.is_dict = is_dict
+        self.start = start
+        self.seq = seq
+        self.path = path
+        self.key = None
+        self.index = 0
+        self.expect_key = True
+        self.typ = None
+        self.name = None
+        self.label = None
+        self.title = ''
+        self.has_label = False
+        self.names = None
+        self.obj_names = None
+
+def _decode_json_token(tok):
+    # 无转义的字符串直接解码，避免每个 token 都走 json.loads
+    if tok[:1] == b'"' and b'\\' not in tok:
+        return tok[1:-1].decode('utf-8')
+    return json.loads(tok)
+
+def _set_stream_scalar(frame, key, value):
+    if key == 'type':
+        frame.typ = value
+    elif key == 'name':
+        frame.name = value
+    elif key == 'label':
+        frame.label = value
+        frame.has_label = True
+    else:
+        frame.title = value
+
+def _iter_json_tokens(f, chunk_size):
+    """按块读取 JSON 字节流，逐个产出 (绝对偏移, 结构符/字符串/标量 原始字节, 类型)"""
+    buf = b''
+    base = 0
+    pos = 0
+    eof = False
+    while True:
+        m = _JSON_TOKEN.match(buf, pos)
+        if m is None or (m.lastindex == 3 and not eof and buf[m.end():m.end() + 1] not in _JSON_DELIMITERS):
+            if eof:
+                if _JSON_SPACE.match(buf, pos):
+                    return
+                raise ValueError(f"JSON 解析失败，偏移 {base + pos} 附近存在非法内容")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            base += pos
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        pos = m.end()
+        kind = m.lastindex
+        yield base + m.start(kind), m.group(kind), kind
+
+def stream_scan_amis_file(amis_file, collect_objects=True, chunk_size=1 << 20):
+    """
+    流式扫描 AMIS JSON 文件，内存占用只与最大的 crud/table 区块相关，与文件大小无关：
+      1. 逐块词法扫描整个文件，不构建 DOM；记录最外层 crud/table 区块的字节区间、对象统计和属性统计
+      2. 只把这些区块的字节区间解码成 dict，交给 scan_amis 提取字段与 API（collect_crud_apis 只作用于区块内部）
+    type/label/title 为对象或数组等非标量时按空值处理（不计入对象统计 / 名称记为空串）。
+    """
+    result = AmisScanResult()
+    objects = []
+    ranges = []
+    stack = []
+    seq = 0
+    key_cache = {}
+    with open(amis_file, 'rb') as f:
+        for offset, tok, kind in _iter_json_tokens(f, chunk_size):
+            top = stack[-1] if stack else None
+            if kind == 1:
+                c = tok
+                if c == b'{' or c == b'[':
+                    if top is None:
+                        # 根节点为数组时与 scan_amis 一致，按 {"body": 数组} 处理
+                        path = "root" if c == b'{' else "root.body"
+                        if c == b'[':
+                            result.attrs.add('body')
+                    elif top.is_dict:
+                        path = f"{top.path}.{top.key}"
+                    else:
+                        path = f"{top.path}[{top.index}]"
+                    stack.append(_StreamFrame(c == b'{', offset, seq, path))
+                    seq += 1
+                elif c == b'}' or c == b']':
+                    frame = stack.pop()
+                    parent = stack[-1] if stack else None
+                    if frame.is_dict:
+                        typ = frame.typ
+                        if is_table_crud_type(typ):
+                            while ranges and ranges[-1][0] > frame.start:
+                                ranges.pop()
+                            ranges.append((frame.start, offset + 1))
+                        if collect_objects:
+                            if isinstance(frame.name, str):
+                                frame.names = frame.names or set()
+                                frame.names.add(frame.name)
+                            if typ:
+                                name = frame.label if frame.has_label else frame.title
+                                objects.append((frame.seq, (typ, name, frame.path, frame.obj_names or set())))
+                    names = frame.names
+                    if parent is not None and parent.is_dict and parent.key in _STREAM_SCALAR_KEYS:
+                        # type/name/label/title 的值是对象或数组：按非字符串处理
+                        _set_stream_scalar(parent, parent.key, None if parent.key != 'label' else '')
+                    if collect_objects and names and parent is not None:
+                        if parent.is_dict and parent.key in OBJECT_FIELD_KEYS:
+                            # 父节点的 type 可能出现在后面，先累积，父节点结束时再判定是否记录
+                            parent.obj_names = parent.obj_names or set()
+                            parent.obj_names.update(names)
+                        if parent.names is None or len(parent.names) < len(names):
+                            parent.names, names = names, parent.names
+                        if names:
+                            parent.names.update(names)
+                    if parent is not None:
+                        if parent.is_dict:
+                            parent.expect_key = False
+                        else:
+                            parent.index += 1
+                elif c == b',':
+                    if top.is_dict:
+                        top.expect_key = True
+                continue
+            if top is None:
+                continue
+            if top.is_dict and top.expect_key and kind == 2:
+                key = key_cache.get(tok)
+                if key is None:
+                    key = _decode_json_token(tok)
+                    if len(key_cache) < 65536:
+                        key_cache[tok] = key
+                top.key = key
+                top.expect_key = False
+                result.attrs.add(key)
+                continue
+            if top.is_dict:
+                key = top.key
+                if key in _STREAM_SCALAR_KEYS:
+                    _set_stream_scalar(top, key, _decode_json_token(tok))
+            else:
+                top.index += 1
+        if stack:
+            raise ValueError("JSON 解析失败：文件不完整")
+
+        for start, end in ranges:
+            f.seek(start)
+            block_scan = scan_amis(json.loads(f.read(end - start)))
+            result.blocks.extend(block_scan.blocks)
+            result.block_fields.extend(block_scan.block_fields)
+            result.block_apis.extend(block_scan.block_apis)
+    objects.sort(key=lambda x: x[0])
+    result.objects = [o for _, o in objects]
+    return result
+
+def amis_to_openapi(amis_json, page_name, amis_file, stat, obj_collector, base_url="http://your.base.url", scan=None):
     # 关键点：实体名全部以表名大驼峰为准
-    if isinstance(amis_json, list):
-        amis_json = {"body": amis_json}
-    scan_amis_objects(amis_json, obj_collector)
-    blocks = find_table_crud_blocks(amis_json, stat)
-    blocks = [x for x in blocks if isinstance(x, dict)]
+    # scan 由调用方传入时，对象统计已由调用方记录，这里不再重复记录
+    if scan is None:
+        scan = scan_amis(amis_json)
+        if obj_collector is not None:
+            scan.record_objects(obj_collector)
+    stat.global_attrs.update(scan.attrs)
+    blocks = scan.blocks
     if not blocks:
         raise ValueError("未发现 type 以 crud/table 开头的对象")
     openapis = []
@@ -239,15 +474,9 @@ def amis_to_openapi(amis_json, page_name, amis_file, stat, obj_collector, base_u
         if 'columns' in crud:
             fields_objs.extend(extract_fields_from_list(crud['columns']))
         if not fields_objs:
-            all_fields = collect_all_fields(crud)
+            all_fields = scan.block_fields[idx]
             fields_objs = [{'name': f, 'columnName': f, 'type': 'String', 'label': f} for f in all_fields]
-        apis = collect_crud_apis(crud)
-        unique = {}
-        for a in apis:
-            k = (a['url'], a['method'])
-            if k not in unique:
-                unique[k] = a
-        apis = list(unique.values())
+        apis = scan.apis_of(idx)
         stat.record_table(real_table_name, crud.get('type'), [f['name'] for f in fields_objs], apis)
         paths = {}
         for api in apis:
@@ -349,6 +578,220 @@ def amis_to_openapi(amis_json, page_name, amis_file, stat, obj_collector, base_u
         })
     return openapis[0] if len(openapis) == 1 else openapis
 
+def load_and_scan(amis_file, stream=False, profiler=NULL_PROFILER):
+    """读取并扫描 AMIS 文件；流式模式下不保留完整 DOM，返回的 amis_json 为 None"""
+    if stream:
+        with profiler.span('stream_scan') as sp:
+            scan = stream_scan_amis_file(amis_file)
+            if profiler.enabled:
+                sp.bytes = os.path.getsize(amis_file)
+        return None, scan
+    with profiler.span('json_load') as sp, open(amis_file, encoding='utf-8') as f:
+        amis_json = json.load(f)
+        if profiler.enabled:
+            sp.bytes = os.fstat(f.fileno()).st_size
+    with profiler.span('scan'):
+        return amis_json, scan_amis(amis_json)
+
+_CONVERTER_HASH = None
+
+def converter_hash():
+    """转换器自身源码哈希，转换逻辑变更后缓存自动失效"""
+    global _CONVERTER_HASH
+    if _CONVERTER_HASH is None:
+        _CONVERTER_HASH = hash_file(os.path.abspath(__file__))
+    return _CONVERTER_HASH
+
+def _restore_from_cache(meta, stat, obj_collector):
+    for t in meta['tables']:
+        stat.table_count += 1
+        stat.tables.append(t)
+        stat.global_fields.update(t['field_list'])
+    stat.global_attrs.update(meta['attrs'])
+    for o in meta['objects']:
+        obj_collector.record(o['type'], o['name'], o['path'], o['fields'])
+
+def convert_amis(amis_file, stream=False, base_url="http://your.base.url", cache=None, serialize=False,
+                 profiler=NULL_PROFILER):
+    """
+    在内存中转换单个 AMIS 文件，返回 (openapi, 序列化文本, StatCollector, ObjectCollector, 是否命中缓存)。
+    序列化文本仅在 serialize=True 或启用缓存时生成，否则为 None。
+    """
+    page_name = os.path.splitext(os.path.basename(amis_file))[0]
+    with profiler.span('amis', f"{os.path.basename(os.path.dirname(amis_file))}/{page_name}"):
+        return _convert_amis(amis_file, page_name, stream, base_url, cache, serialize, profiler)
+
+def _convert_amis(amis_file, page_name, stream, base_url, cache, serialize, profiler):
+    stat = StatCollector()
+    obj_collector = ObjectCollector()
+    key = cached = None
+    if cache is not None:
+        with profiler.span('cache_lookup'):
+            options = {'page_name': page_name, 'base_url': base_url, 'converter': converter_hash()}
+            key = cache_key(hash_file(amis_file), options)
+            cached = cache.get(key)
+    if cached is not None:
+        output, meta = cached
+        _restore_from_cache(meta, stat, obj_collector)
+        with profiler.span('json_load'):
+            openapi = json.loads(output)
+        return openapi, output, stat, obj_collector, True
+    amis_json, scan = load_and_scan(amis_file, stream, profiler)
+    with profiler.span('convert'):
+        scan.record_objects(obj_collector)
+        openapi = amis_to_openapi(amis_json, page_name, amis_file, stat, obj_collector, base_url=base_url, scan=scan)
+    output = None
+    if serialize or cache is not None:
+        with profiler.span('serialize'):
+            output = json.dumps(openapi, ensure_ascii=False, indent=2)
+    if cache is not None:
+        with profiler.span('cache_put'):
+            cache.put(key, output, {
+                'page_name': page_name, 'tables': stat.tables,
+                'attrs': sorted(stat.global_attrs), 'objects': obj_collector.objs,
+            })
+    return openapi, output, stat, obj_collector, False
+
+def convert_amis_json(amis_json, page_name, base_url="http://your.base.url"):
+    """转换内存中已解析的 AMIS JSON（服务模式，不读写文件、不走缓存），返回 (openapi, StatCollector, ObjectCollector)"""
+    stat = StatCollector()
+    obj_collector = ObjectCollector()
+    scan = scan_amis(amis_json)
+    scan.record_objects(obj_collector)
+    openapi = amis_to_openapi(amis_json, page_name, None, stat, obj_collector, base_url=base_url, scan=scan)
+    return openapi, stat, obj_collector
+
+def split_openapi_docs(file, page_name, openapi):
+    """
+    转换结果展开为 [(文件名, 页面名, openapi)]：单表页面原样返回；页面含多个 crud/table 时 amis_to_openapi 返回文档列表，
+    按表展开为每表一份，文件名为 <文件名>#<表名>、页面名为 <页面名>_<表名>（同表重复时再加序号）
+    """
+    if not isinstance(openapi, list):
+        return [(file, page_name, openapi)]
+    docs = []
+    seen = set()
+    for idx, doc in enumerate(openapi):
+        table_name = doc.get('info', {}).get('tableName') or str(idx)
+        suffix = table_name if table_name not in seen else f"{table_name}_{idx}"
+        seen.add(table_name)
+        docs.append((f"{file}#{suffix}", f"{page_name}_{suffix}", doc))
+    return docs
+
+def convert_amis_file(amis_file, out_file, stream=False, base_url="http://your.base.url", cache=None,
+                      profiler=NULL_PROFILER):
+    """转换单个 AMIS 文件并写出 OpenAPI JSON，返回 (StatCollector, ObjectCollector, 是否命中缓存)"""
+    _, output, stat, obj_collector, hit = convert_amis(amis_file, stream, base_url, cache, True, profiler)
+    with profiler.span('write') as sp:
+        os.makedirs(os.path.dirname(out_file), exist_ok=True)
+        with open(out_file, 'w', encoding='utf-8') as fw:
+            fw.write(output)
+        if profiler.enabled:
+            sp.bytes = len(output.encode('utf-8'))
+    return stat, obj_collector, hit
+
+def _convert_job(job):
+    """进程池任务：异常转为结果返回，避免单个文件失败中断整批"""
+    amis_file, out_file, stream, verbose, debug, base_url, cache_dir, profile_root = job
+    set_debug(debug)
+    cache = ConversionCache(cache_dir) if cache_dir else None
+    profiler = Profiler(profile_root) if profile_root else NULL_PROFILER
+    result = {'amis_file': amis_file, 'out_file': out_file, 'error': None}
+    try:
+        stat, obj_collector, hit = convert_amis_file(amis_file, out_file, stream, base_url, cache, profiler)
+    except Exception as e:
+        result['error'] = str(e)
+        result['profile'] = profiler.drain()
+        return result
+    result['profile'] = profiler.drain()
+    return summarize_conversion(result, stat, obj_collector, hit, verbose)
+
+def summarize_conversion(result, stat, obj_collector, hit, verbose=False):
+    """把单文件转换统计压缩为可跨进程传递的结果，供 ConversionReport 汇总"""
+    type_counts = {}
+    for o in obj_collector.objs:
+        type_counts[o['type']] = type_counts.get(o['type'], 0) + 1
+    result.update({
+        'tables': stat.tables,
+        'cache_hit': hit,
+        'type_counts': type_counts,
+        'attrs': stat.global_attrs,
+        'verbose': (stat, obj_collector) if verbose else None,
+    })
+    return result
+
+def list_conversion_jobs(amis_dir, out_dir):
+    """按名称排序列出 (AMIS 文件, 输出文件)：子目录视为系统目录，根目录下的 json 直接输出到 out_dir"""
+    jobs = []
+    for entry in sorted(os.listdir(amis_dir)):
+        path = os.path.join(amis_dir, entry)
+        if os.path.isdir(path):
+            for fname in sorted(os.listdir(path)):
+                if fname.endswith('.json'):
+                    jobs.append((os.path.join(path, fname), os.path.join(out_dir, entry, fname)))
+        elif entry.endswith('.json'):
+            jobs.append((path, os.path.join(out_dir, entry)))
+    return jobs
+
+class ConversionReport:
+    """批量转换汇总，替代逐文件的对象/统计明细输出"""
+    def __init__(self):
+        self.converted = 0
+        self.cache_hits = 0
+        self.failed = []
+        self.type_counts = {}
+        self.table_count = 0
+        self.global_fields = set()
+        self.global_attrs = set()
+    def add(self, result):
+        if result['error'] is not None:
+            self.failed.append((result['amis_file'], result['error']))
+            return
+        self.converted += 1
+        self.cache_hits += result['cache_hit']
+        for typ, n in result['type_counts'].items():
+            key = str(typ)
+            self.type_counts[key] = self.type_counts.get(key, 0) + n
+        self.table_count += len(result['tables'])
+        for t in result['tables']:
+            self.global_fields.update(t['field_list'])
+        self.global_attrs.update(result['attrs'])
+    def print_summary(self, show_attrs=False):
+        print("\n==== 转换统计汇总 ====")
+        print(f"成功文件数: {self.converted}  失败文件数: {len(self.failed)}  命中表格区块数量: {self.table_count}  缓存命中: {self.cache_hits}")
+        counts = sorted(self.type_counts.items(), key=lambda x: (-x[1], x[0]))
+        print("对象类型分布:", ', '.join(f"{t}×{n}" for t, n in counts))
+        print(f"全局字段（所有提取字段）共 {len(self.global_fields)} 个:", sorted(self.global_fields))
+        if show_attrs:
+            print("全局属性（所有dict key）:", sorted(self.global_attrs))
+        for amis_file, err in self.failed:
+            print(f"  [失败] {amis_file}: {err}")
+        print("====================")
+
+def collect_conversion_results(results, report, conversion_list, show_attrs=False, profiler=NULL_PROFILER):
+    """按任务顺序收集结果（并行时同样按提交顺序），保证输出确定"""
+    for result in results:
+        amis_file = result['amis_file']
+        profiler.merge(result.get('profile'))
+        report.add(result)
+        if result['error'] is not None:
+            print(f"[ERROR] 文件 {amis_file} 处理失败: {result['error']}")
+            continue
+        print(f"[OK] 生成: {result['out_file']}")
+        if result['verbose']:
+            stat, obj_collector = result['verbose']
+            obj_collector.print_summary(f"[{amis_file}]")
+            stat.print_summary(f"[{amis_file}]", show_attrs=show_attrs)
+        for t in result['tables']:
+            conversion_list.append({
+                'file': os.path.basename(amis_file),
+                'table_name': t['name'],
+                'type': t['type'],
+                'field_count': t['field_count'],
+                'api_count': t['api_count'],
+                'fields': ",".join(t['field_list']),
+                'apis': ",".join(t['api_list'])
+            })
+
 def print_conversion_summary(conversion_list, amis_dir, system_name, field_max=4, api_max=2):
     print("\n======= 本次转换环境信息 =======")
     print(f"系统名：{system_name}")
@@ -382,11 +825,20 @@ def main():
     parser.add_argument('--out-dir', default=None, help='输出目录，未指定则为 docs/openapi_json/<system_name>')
     parser.add_argument('--debug', action='store_true', help='开启调试日志')
     parser.add_argument('--show-attrs', action='store_true', help='输出全局属性')
+    parser.add_argument('--jobs', type=int, default=1, help='并行转换进程数，默认 1（串行）；0 表示使用全部 CPU 核')
+    parser.add_argument('--verbose', action='store_true', help='逐文件输出对象/表格统计明细（默认只输出汇总）')
+    parser.add_argument('--base-url', default='http://your.base.url', help='替换 API 地址中 ${base_url} 的值')
+    parser.add_argument('--cache-dir', default=None, help='转换结果缓存目录，默认 ~/.cache/codegen/openapi')
+    parser.add_argument('--no-cache', action='store_true', help='关闭转换结果缓存，每个文件都重新解析')
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_MB, help=f'转换缓存空间上限（MB），超出按最近使用时间淘汰，默认 {DEFAULT_MAX_MB}')
+    parser.add_argument('--profile', default=None, metavar='REPORT.json', help='开启性能剖析，写出 JSON 报告与 REPORT.json.folded（flamegraph）')
+    parser.add_argument('--profile-top', type=int, default=15, help='剖析汇总打印前 N 项，默认 15')
+    parser.add_argument('--stream', action='store_true', help='流式解析超大 AMIS 文件，只保留 crud/table 区块，内存占用与文件大小无关')
     args = parser.parse_args()
 
-    global DEBUG_ON
-    DEBUG_ON = args.debug
+    set_debug(args.debug)
     show_attrs = args.show_attrs
+    stream = args.stream
 
     system_name = args.system_name or 'test'
     amis_dir = args.amis_dir or os.path.join('.', 'docs', 'amis_json', system_name)
@@ -405,79 +857,32 @@ def main():
             print(f"[FATAL] 无法创建输出目录: {out_dir} - {e}")
             sys.exit(1)
 
+    jobs = list_conversion_jobs(amis_dir, out_dir)
+    workers = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    cache = None if args.no_cache else ConversionCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+    cache_dir = cache.cache_dir if cache else None
+    profiler = Profiler('amis_to_openapi') if args.profile else NULL_PROFILER
+    profile_root = profiler.root if profiler.enabled else None
+    job_args = [(amis_file, out_file, stream, args.verbose, args.debug, args.base_url, cache_dir, profile_root)
+                for amis_file, out_file in jobs]
+    report = ConversionReport()
     conversion_list = []
+    if workers > 1 and len(job_args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_convert_job, job_args, chunksize=max(1, len(job_args) // (workers * 4)))
+            collect_conversion_results(results, report, conversion_list, show_attrs, profiler)
+    else:
+        collect_conversion_results(map(_convert_job, job_args), report, conversion_list, show_attrs, profiler)
 
-    for entry in os.listdir(amis_dir):
-        path = os.path.join(amis_dir, entry)
-        if os.path.isdir(path):
-            for fname in os.listdir(path):
-                if not fname.endswith('.json'):
-                    continue
-                amis_file = os.path.join(path, fname)
-                try:
-                    print(f"\n========== 处理文件: {amis_file} ==========")
-                    with open(amis_file, encoding='utf-8') as f:
-                        amis_json = json.load(f)
-                    page_name = os.path.splitext(fname)[0]
-                    table_name = extract_main_table_name(amis_json, page_name)
-                    entity_name = upper_camel(table_name)
-                    stat = StatCollector()
-                    obj_collector = ObjectCollector()
-                    scan_amis_objects(amis_json, obj_collector)
-                    obj_collector.print_summary(f"[{amis_file}]")
-                    openapi = amis_to_openapi(amis_json, page_name, amis_file, stat, obj_collector)
-                    out_sys_path = os.path.join(out_dir, entry)
-                    os.makedirs(out_sys_path, exist_ok=True)
-                    out_file = os.path.join(out_sys_path, fname)
-                    with open(out_file, 'w', encoding='utf-8') as fw:
-                        json.dump(openapi, fw, ensure_ascii=False, indent=2)
-                    print(f"[OK] 生成: {out_file}")
-                    stat.print_summary(f"[{amis_file}]", show_attrs=show_attrs)
-                    for t in stat.tables:
-                        conversion_list.append({
-                            'file': os.path.basename(amis_file),
-                            'table_name': t['name'],
-                            'type': t['type'],
-                            'field_count': t['field_count'],
-                            'api_count': t['api_count'],
-                            'fields': ",".join(t['field_list']),
-                            'apis': ",".join(t['api_list'])
-                        })
-                except Exception as e:
-                    print(f"[ERROR] 文件 {amis_file} 处理失败: {e}")
-        elif entry.endswith('.json'):
-            amis_file = path
-            try:
-                print(f"\n========== 处理文件: {amis_file} ==========")
-                with open(amis_file, encoding='utf-8') as f:
-                    amis_json = json.load(f)
-                page_name = os.path.splitext(entry)[0]
-                table_name = extract_main_table_name(amis_json, page_name)
-                entity_name = upper_camel(table_name)
-                stat = StatCollector()
-                obj_collector = ObjectCollector()
-                scan_amis_objects(amis_json, obj_collector)
-                obj_collector.print_summary(f"[{amis_file}]")
-                openapi = amis_to_openapi(amis_json, page_name, amis_file, stat, obj_collector)
-                out_file = os.path.join(out_dir, entry)
-                with open(out_file, 'w', encoding='utf-8') as fw:
-                    json.dump(openapi, fw, ensure_ascii=False, indent=2)
-                print(f"[OK] 生成: {out_file}")
-                stat.print_summary(f"[{amis_file}]", show_attrs=show_attrs)
-                for t in stat.tables:
-                    conversion_list.append({
-                        'file': os.path.basename(amis_file),
-                        'table_name': t['name'],
-                        'type': t['type'],
-                        'field_count': t['field_count'],
-                        'api_count': t['api_count'],
-                        'fields': ",".join(t['field_list']),
-                        'apis': ",".join(t['api_list'])
-                    })
-            except Exception as e:
-                print(f"[ERROR] 文件 {amis_file} 处理失败: {e}")
-
+    report.print_summary(show_attrs=show_attrs)
+    if cache is not None:
+        removed, freed = cache.prune()
+        if removed:
+            print(f"[缓存] 超出上限，已淘汰 {removed} 个条目，释放 {freed / 1024 / 1024:.2f} MB")
     print_conversion_summary(conversion_list, amis_dir, system_name)
+    if profiler.enabled:
+        profiler.print_top(args.profile_top)
+        profiler.write(os.path.abspath(args.profile))
 
 if __name__ == '__main__':
     main()
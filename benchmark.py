@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import contextlib
+import jinja2
+from pathlib import Path
+from amis_to_openapi import convert_amis
+from codegen import (create_env, load_openapi_docs, generate_system_level_code, generate_for_page,
+                     make_zip_dir)
+from output_fs import VirtualOutput
+from codegen_ir import System, build_page
+from generate_pom import generate_pom_with_template, default_pom_config
+
+COLUMN_TYPES = ['input-text', 'input-number', 'input-date', 'select', 'switch', 'textarea']
+STAGES = ('amis_to_openapi', 'openapi_load', 'build_ir', 'generate_system_level_code', 'generate_for_page',
+          'write_files', 'make_zip_dir', 'generate_pom_with_template')
+
+def make_amis_page(system_idx, page_idx, columns, rng):
+    """合成一个 AMIS 页面：crud + K 列 + 新增弹窗(dialog) + 编辑抽屉(drawer) + onEvent 删除 + 嵌套查看弹窗"""
+    table = f"s{system_idx}_table_{page_idx}"
+    base = f"${{base_url}}/api/s{system_idx}/p{page_idx}"
+    cols = [{"name": "id", "label": "ID", "type": "input-number"}]
+    for k in range(1, columns):
+        cols.append({"name": f"col_{k}", "label": f"字段{k}", "type": rng.choice(COLUMN_TYPES)})
+    form_body = [{"name": c["name"], "label": c["label"], "type": c["type"]} for c in cols[1:]]
+    view_dialog = {
+        "type": "button", "label": "查看", "actionType": "dialog",
+        "dialog": {"title": "查看", "body": {"type": "service", "api": {"method": "get", "url": f"{base}/detail"},
+                                             "body": [{"type": "static", "name": c["name"]} for c in cols]}},
+    }
+    return {
+        "type": "page", "title": f"页面{page_idx}",
+        "body": [{
+            "type": "crud", "tableName": table,
+            "api": {"method": "get", "url": f"{base}/page"},
+            "columns": cols + [{
+                "type": "operation", "label": "操作",
+                "buttons": [
+                    {"type": "button", "label": "编辑", "actionType": "drawer",
+                     "drawer": {"title": "编辑", "body": {"type": "form", "api": {"method": "put", "url": base},
+                                                          "body": form_body}}},
+                    view_dialog,
+                ],
+            }],
+            "headerToolbar": [{
+                "type": "button", "label": "新增", "actionType": "dialog",
+                "dialog": {"title": "新增", "body": {"type": "form", "api": {"method": "post", "url": base},
+                                                     "body": form_body}},
+            }],
+            "onEvent": {"rowClick": {"actions": [{"actionType": "ajax", "api": {"method": "delete", "url": f"{base}/del"}}]}},
+        }],
+    }
+
+def generate_corpus(out_dir, systems, pages, columns, seed=0):
+    """生成 N 系统 × M 页面 × K 列的 AMIS JSON 及对应 OpenAPI JSON（<out>/amis、<out>/openapi）"""
+    rng = random.Random(seed)
+    amis_root = os.path.join(out_dir, 'amis')
+    openapi_root = os.path.join(out_dir, 'openapi')
+    for s in range(systems):
+        system_name = f"bench{s}"
+        os.makedirs(os.path.join(amis_root, system_name), exist_ok=True)
+        os.makedirs(os.path.join(openapi_root, system_name), exist_ok=True)
+        for p in range(pages):
+            fname = f"page_{p}.json"
+            amis_file = os.path.join(amis_root, system_name, fname)
+            with open(amis_file, 'w', encoding='utf-8') as fw:
+                json.dump(make_amis_page(s, p, columns, rng), fw, ensure_ascii=False)
+            _, output, _, _, _ = convert_amis(amis_file, serialize=True)
+            with open(os.path.join(openapi_root, system_name, fname), 'w', encoding='utf-8') as fw:
+                fw.write(output)
+    meta = {'systems': systems, 'pages': pages, 'columns': columns, 'seed': seed}
+    with open(os.path.join(out_dir, 'corpus.json'), 'w', encoding='utf-8') as fw:
+        json.dump(meta, fw, ensure_ascii=False, indent=2)
+    print(f"✅ 已生成基准语料: {systems} 系统 × {pages} 页面 × {columns} 列 -> {out_dir}")
+    return meta
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {name: [] for name in STAGES}
+        self.counts = {}
+
+    @contextlib.contextmanager
+    def stage(self, name, count):
+        start = time.perf_counter()
+        yield
+        self.samples[name].append(time.perf_counter() - start)
+        self.counts[name] = count
+
+def run_once(timer, corpus_dir, work_dir, env, templates_dir, base_package, orm):
+    amis_root = os.path.join(corpus_dir, 'amis')
+    openapi_root = os.path.join(corpus_dir, 'openapi')
+    system_names = sorted(os.listdir(openapi_root))
+    amis_files = [os.path.join(amis_root, s, f) for s in system_names for f in sorted(os.listdir(os.path.join(amis_root, s)))]
+    with timer.stage('amis_to_openapi', len(amis_files)):
+        for amis_file in amis_files:
+            convert_amis(amis_file)
+    with timer.stage('openapi_load', len(amis_files)):
+        docs = {s: load_openapi_docs(os.path.join(openapi_root, s), s) for s in system_names}
+    with timer.stage('build_ir', len(amis_files)):
+        pages = {s: [build_page(page_name, openapi) for _, page_name, openapi in docs[s]] for s in system_names}
+    systems = {s: System(s, base_package, orm) for s in system_names}
+    outputs = {s: [] for s in system_names}
+    entities = {s: list({p.entity.model_name: p.entity for p in pages[s]}.values()) for s in system_names}
+    with timer.stage('generate_system_level_code', sum(len(v) for v in entities.values())):
+        for s in system_names:
+            for entity in entities[s]:
+                generate_system_level_code(env, os.path.join(work_dir, systems[s].artifact_id), systems[s], entity, outputs[s])
+    with timer.stage('generate_for_page', len(amis_files)):
+        for s in system_names:
+            for page in pages[s]:
+                generate_for_page(env, os.path.join(work_dir, systems[s].artifact_id), systems[s], page, outputs[s])
+    with timer.stage('write_files', sum(len(v) for v in outputs.values())):
+        vfs = VirtualOutput()
+        for s in system_names:
+            for out_path, code in outputs[s]:
+                vfs.write(out_path, code)
+        vfs.flush()
+    with timer.stage('make_zip_dir', len(system_names)):
+        for s in system_names:
+            make_zip_dir(os.path.join(work_dir, systems[s].artifact_id), os.path.join(work_dir, f"{s}.zip"))
+    with timer.stage('generate_pom_with_template', len(system_names)):
+        for s in system_names:
+            generate_pom_with_template(Path(work_dir), s, Path(templates_dir) / 'pom.xml.j2', base_package, '1.0.0',
+                                       **default_pom_config(orm))
+
+def run_benchmark(corpus_dir, work_dir, templates_dir, orm='mybatis', repeat=3, base_package='com.hg'):
+    """按阶段计时，返回可 JSON 序列化的结果；每轮使用全新输出目录"""
+    env = create_env(templates_dir)
+    timer = StageTimer()
+    for _ in range(repeat):
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(work_dir)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            run_once(timer, corpus_dir, work_dir, env, templates_dir, base_package, orm)
+    with open(os.path.join(corpus_dir, 'corpus.json'), encoding='utf-8') as f:
+        corpus = json.load(f)
+    stages = {}
+    for name in STAGES:
+        samples = timer.samples[name]
+        best = min(samples)
+        stages[name] = {
+            'seconds': round(best, 6),
+            'median': round(statistics.median(samples), 6),
+            'count': timer.counts[name],
+            'per_item_ms': round(best * 1000 / max(timer.counts[name], 1), 4),
+        }
+    return {
+        'meta': {
+            'python': platform.python_version(), 'jinja2': jinja2.__version__, 'platform': platform.platform(),
+            'orm': orm, 'repeat': repeat, 'corpus': corpus,
+        },
+        'total_seconds': round(sum(s['seconds'] for s in stages.values()), 6),
+        'stages': stages,
+    }
+
+def compare_with_baseline(result, baseline, threshold, min_delta=0.005):
+    """按阶段比较最优耗时，超出基线 threshold 比例且绝对差超过 min_delta 秒记为回退，返回回退阶段列表"""
+    regressions = []
+    print(f"{'阶段':<28}{'基线(s)':>12}{'本次(s)':>12}{'变化':>10}")
+    for name, cur in result['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        if not base or not base['seconds']:
+            print(f"{name:<28}{'-':>12}{cur['seconds']:>12.4f}{'新增':>10}")
+            continue
+        ratio = cur['seconds'] / base['seconds'] - 1
+        mark = ''
+        if ratio > threshold and cur['seconds'] - base['seconds'] > min_delta:
+            regressions.append(name)
+            mark = '  [回退]'
+        print(f"{name:<28}{base['seconds']:>12.4f}{cur['seconds']:>12.4f}{ratio:>+10.1%}{mark}")
+    if result['meta'].get('corpus') != baseline.get('meta', {}).get('corpus'):
+        print("[warn] 基线与本次使用的语料规模不同，对比结果仅供参考")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="codegen 生成器基准测试：合成语料 + 分阶段计时 + 基线对比")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('corpus', help='生成合成 AMIS/OpenAPI 语料')
+    p.add_argument('--out', default='./bench_corpus', help='语料输出目录')
+    p.add_argument('--systems', type=int, default=2, help='系统数 N')
+    p.add_argument('--pages', type=int, default=50, help='每系统页面数 M')
+    p.add_argument('--columns', type=int, default=20, help='每页列数 K')
+    p.add_argument('--seed', type=int, default=0, help='随机种子（列类型）')
+    p = sub.add_parser('run', help='分阶段计时')
+    p.add_argument('--corpus', default='./bench_corpus', help='corpus 子命令生成的语料目录')
+    p.add_argument('--templates-dir', default='./templates', help='模板目录')
+    p.add_argument('--work-dir', default='./bench_output', help='生成输出的临时目录（每轮清空）')
+    p.add_argument('--orm', default='mybatis', choices=['mybatis', 'jpa'], help='ORM类型')
+    p.add_argument('--repeat', type=int, default=3, help='重复轮数，取最优值，默认 3')
+    p.add_argument('--output', default=None, help='结果 JSON 输出路径，默认打印到标准输出')
+    p.add_argument('--baseline', default=None, help='基线结果 JSON，对比各阶段耗时')
+    p.add_argument('--threshold', type=float, default=0.10, help='回退判定阈值（比例），默认 0.10')
+    p.add_argument('--min-delta', type=float, default=0.005, help='回退判定的最小绝对差（秒），过滤毫秒级抖动，默认 0.005')
+    args = parser.parse_args()
+
+    if args.command == 'corpus':
+        generate_corpus(os.path.abspath(args.out), args.systems, args.pages, args.columns, args.seed)
+        return
+    corpus_dir = os.path.abspath(args.corpus)
+    if not os.path.isfile(os.path.join(corpus_dir, 'corpus.json')):
+        print(f"[FATAL] 语料目录无效，请先运行 benchmark.py corpus: {corpus_dir}")
+        sys.exit(1)
+    result = run_benchmark(corpus_dir, os.path.abspath(args.work_dir), os.path.abspath(args.templates_dir),
+                           args.orm, max(args.repeat, 1))
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fw:
+            fw.write(text + '\n')
+        print(f"✅ 基准结果已写入: {args.output}（总耗时 {result['total_seconds']:.3f}s）")
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(result, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"[ERROR] {len(regressions)} 个阶段超出基线 {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ 各阶段均未超出基线阈值")
+
+if __name__ == '__main__':
+    main()
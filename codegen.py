@@ -2,69 +2,37 @@ import os
 import sys
 import json
 import argparse
+import time
+import hashlib
 import traceback
-from zipfile import ZipFile
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound, TemplateError
-
-def find_schema_key(schemas, table_name):
-    camel_key = ''.join([x.capitalize() for x in table_name.split('_')])
-    if camel_key in schemas:
-        return camel_key
-    for k in schemas:
-        if k.lower() == camel_key.lower():
-            return k
-    if schemas:
-        return list(schemas.keys())[0]
-    return None
-
-def upper_camel(s):
-    """表名或其他下划线、连字符、点分隔字符串转驼峰（首字母大写）"""
-    if not s:
-        return ""
-    parts = s.replace('-', '_').replace('.', '_').split('_')
-    return ''.join([w.capitalize() for w in parts if w])
-
-def page_model_name_from_file(page_name):
-    """
-    页面对象类名生成：如果有下划线或全小写则驼峰化，否则保持文件名原驼峰
-    """
-    if '_' in page_name or page_name.islower():
-        parts = page_name.replace('-', '_').split('_')
-        return ''.join([w.capitalize() for w in parts if w])
-    return page_name[0].upper() + page_name[1:]
-
-def get_primary_key_field(fields):
-    for f in fields:
-        if f.get('primaryKey', False):
-            return f
-    for f in fields:
-        if f['name'].lower() in ('id', 'pk', 'table_id', 'user_id', 'column_id'):
-            return f
-    if fields:
-        return fields[0]
-    raise Exception("fields 为空，无法识别主键")
-
-def openapi_method_to_mapping(method):
-    std_methods = {
-        'get': 'GetMapping',
-        'post': 'PostMapping',
-        'put': 'PutMapping',
-        'delete': 'DeleteMapping',
-        'patch': 'PatchMapping',
-        'options': 'RequestMapping',
-        'head': 'RequestMapping'
-    }
-    m = method.lower()
-    mapping = std_methods.get(m)
-    if not mapping:
-        print(f"[warn] 未知HTTP方法: {method}，默认使用@RequestMapping")
-        mapping = 'RequestMapping'
-    return mapping
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from jinja2 import TemplateNotFound, TemplateError
+from template_cache import hash_templates, create_template_env
+from codegen_ir import (System, Page, PageSource, COUNT_STRATEGIES, DB_DIALECTS, build_entity, build_page, page_model_name, extract_paths,
+                        page_count_strategy, service_impl_class_name)
+from schema_index import SchemaIndex, is_component_file
+from generate_pom import (render_pom, render_aggregator_pom, default_pom_config, module_pom_config,
+                          aggregator_pom_config, common_pom_config, DEFAULT_AGGREGATOR_ARTIFACT_ID,
+                          DEFAULT_COMMON_ARTIFACT_ID)
+from zip_output import ReproducibleZip
+from output_fs import VirtualOutput
+from verify import file_manifest, manifest_path, write_file_manifest, verify_tree, print_verify_result, verify_output_dir
+from profiler import Profiler, NULL_PROFILER
+from watch import DirWatcher, watch_loop
+from task_graph import TaskGraph, DONE, FAILED
+from openapi_validate import ValidationCache, validate_sources, print_validation_errors
 
 def render_template(env, template_name, **kwargs):
+    profiler = getattr(env, 'profiler', NULL_PROFILER)
     try:
-        template = env.get_template(template_name)
-        return template.render(**kwargs)
+        with profiler.span('compile', template_name):
+            template = env.get_template(template_name)
+        with profiler.span('render', template_name) as sp:
+            code = template.render(**kwargs)
+            if profiler.enabled:
+                sp.bytes = len(code.encode('utf-8'))
+        return code
     except TemplateNotFound as e:
         print(f"[ERROR][模板未找到] 模板名: {template_name} - {e}")
         raise
@@ -72,266 +40,978 @@ def render_template(env, template_name, **kwargs):
         print(f"[ERROR][模板渲染错误] 模板名: {template_name} - {e}")
         raise
 
-def get_fields_from_schema(schema):
+def _json_default(o):
+    to_dict = getattr(o, 'to_dict', None)
+    return to_dict() if to_dict else str(o)
+
+class GenerationManifest:
+    """
+    增量生成清单：按产物节点（工程内相对路径）记录输入指纹与输出文件哈希。
+    输入未变化且输出文件完好时跳过渲染；渲染结果与磁盘一致时跳过写入，保持 mtime 不变；
+    上次生成、本次不再生成的单元（如已删除的页面）的输出在写盘后清理（见 prune）。
+    force 时不复用上次结果，但仍读取上次清单，用于清理。
+    """
+    # 文件系统 mtime 精度的上限（FAT 为 2 秒）：清单保存前这段时间内写出的文件，mtime 相同也可能已被改过
+    MTIME_SLACK_NS = 2 * 10**9
+
+    def __init__(self, manifest_path, backend_dir, template_hashes, options, force=False):
+        self.path = manifest_path
+        self.backend_dir = backend_dir
+        self.template_hashes = template_hashes
+        self.options = options
+        self.force = force
+        self.units = {}
+        self.saved_ns = 0
+        self.new_units = {}
+        self.pending = {}
+        self.skipped_units = 0
+        self.written_files = 0
+        self.unchanged_files = 0
+        self.pruned_files = 0
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, encoding='utf-8') as f:
+                    data = json.load(f)
+                self.units = data.get('units', {})
+                self.saved_ns = data.get('saved_ns', 0)
+            except Exception as e:
+                print(f"[warn] 增量清单读取失败，将全量生成: {manifest_path} - {e}")
+                self.units = {}
+
+    def fingerprint(self, templates, *inputs):
+        payload = json.dumps(
+            [self.options, {t: self.template_hashes.get(t) for t in templates}, inputs],
+            sort_keys=True, ensure_ascii=False, default=_json_default
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def digest(self, *inputs):
+        """生成单元输入（IR 等）的摘要，单元展开的各产物节点共用，避免逐节点重复序列化"""
+        payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=_json_default)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def reuse(self, unit, fingerprint):
+        """输入指纹一致且全部输出文件与上次写出的内容一致时复用上次结果，返回 True 表示可跳过渲染"""
+        old = None if self.force else self.units.get(unit)
+        if not old or old.get('input') != fingerprint:
+            self.begin(unit, fingerprint)
+            return False
+        outputs = {}
+        for rel, info in old.get('outputs', {}).items():
+            info = self._check_output(rel, info)
+            if info is None:
+                self.begin(unit, fingerprint)
+                return False
+            outputs[rel] = info
+        self.new_units[unit] = dict(old, outputs=outputs)
+        self.skipped_units += 1
+        return True
+
+    def _check_output(self, rel, info):
+        """
+        输出文件与清单一致时返回清单项（mtime 已更新），否则返回 None：大小不同直接判为改动；
+        mtime 与记录相同且早于清单保存时间时视为未改动，否则比较 sha256（同长度的手工修改、文件损坏都能发现）
+        """
+        full_path = os.path.join(self.backend_dir, rel)
+        try:
+            st = os.stat(full_path)
+            if st.st_size != info['size']:
+                return None
+            if st.st_mtime_ns == info.get('mtime_ns') and st.st_mtime_ns + self.MTIME_SLACK_NS <= self.saved_ns:
+                return info
+            with open(full_path, 'rb') as f:
+                if hashlib.sha256(f.read()).hexdigest() != info['sha256']:
+                    return None
+        except OSError:
+            return None
+        return dict(info, mtime_ns=st.st_mtime_ns)
+
+    def begin(self, unit, fingerprint):
+        # 指纹在单元全部输出成功后才写入（见 done），中途失败的单元下次会重新生成
+        self.new_units[unit] = {'input': None, 'outputs': {}}
+        self.pending[unit] = fingerprint
+
+    def done(self, unit):
+        if unit in self.pending:
+            self.new_units[unit]['input'] = self.pending.pop(unit)
+
+    def record(self, unit, out_path, digest, size=None, mtime_ns=None):
+        rel = os.path.relpath(out_path, self.backend_dir).replace(os.sep, '/')
+        entry = self.new_units.setdefault(unit, {'input': None, 'outputs': {}})
+        entry['outputs'][rel] = {'sha256': digest, 'size': size if size is not None else os.path.getsize(out_path)}
+        if mtime_ns is not None:
+            entry['outputs'][rel]['mtime_ns'] = mtime_ns
+
+    def stale_outputs(self):
+        """上次清单中有、本次未生成的单元的输出 {相对路径: 清单项}；仍属于本次某个单元的路径除外"""
+        current = self.files()
+        stale = {}
+        for unit in sorted(set(self.units) - set(self.new_units)):
+            for rel, info in self.units[unit].get('outputs', {}).items():
+                if rel not in current:
+                    stale[rel] = info
+        return stale
+
+    def prune(self):
+        """
+        删除不再生成的输出文件（见 stale_outputs），并清理因此变空的目录；
+        内容与清单不一致（手工改过）的文件保留并提示。返回删除的文件数
+        """
+        folders = set()
+        for rel, info in sorted(self.stale_outputs().items()):
+            full_path = os.path.join(self.backend_dir, *rel.split('/'))
+            if not os.path.exists(full_path):
+                continue
+            if self._check_output(rel, info) is None:
+                print(f"[warn] 文件已不再生成，但内容被修改过，保留: {full_path}")
+                continue
+            os.remove(full_path)
+            self.pruned_files += 1
+            folders.add(os.path.dirname(full_path))
+        for folder in sorted(folders, key=len, reverse=True):
+            while folder.startswith(self.backend_dir + os.sep):
+                try:
+                    os.rmdir(folder)
+                except OSError:
+                    break
+                folder = os.path.dirname(folder)
+        return self.pruned_files
+
+    def keep_stale(self):
+        """本次计划不完整时沿用上次的单元记录，其输出继续计入清单，之后恢复或删除页面时再处理"""
+        for unit in set(self.units) - set(self.new_units):
+            self.new_units[unit] = self.units[unit]
+
+    def files(self):
+        """本次生成后工程内全部输出文件 {相对路径: {'sha256', 'size'}}（含跳过渲染、沿用上次结果的单元）"""
+        result = {}
+        for entry in self.new_units.values():
+            result.update(entry['outputs'])
+        return result
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fw:
+            json.dump({'options': self.options, 'saved_ns': time.time_ns(), 'units': self.new_units}, fw,
+                      ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def print_summary(self, system_name):
+        summary = (f"[增量] system:{system_name} 跳过渲染节点: {self.skipped_units}，写入文件: {self.written_files}，"
+                   f"内容未变跳过写入: {self.unchanged_files}")
+        if self.pruned_files:
+            summary += f"，删除不再生成的文件: {self.pruned_files}"
+        print(summary)
+
+def write_code(out_path, code):
+    """写出单个生成文件（生成函数单独调用时）；内容与磁盘文件一致时不重写，避免无谓地更新 mtime"""
+    vfs = VirtualOutput()
+    vfs.write(out_path, code)
+    return vfs.flush()[0] > 0
+
+def emit_code(out_path, code, outputs=None):
+    """outputs 为 None 时直接写盘；否则仅收集 (路径, 内容)，由调用方按顺序统一写出"""
+    if outputs is None:
+        write_code(out_path, code)
+    else:
+        outputs.append((out_path, code))
+
+def _java_path(system, *parts):
+    return '/'.join([system.java_root.replace(os.sep, '/'), *parts])
+
+def common_artifacts(system):
+    """
+    公共基类与分页工具类（keyset 分页时另有游标分页结果类，启用 count 策略时另有带 hasNext 的分页结果类，
+    流式导出时另有 NDJSON / CSV 写出类）：只依赖包名、ORM 与分页方式，放在 system.common_package 下；
+    共享公共模块时由公共模块生成一份，各系统不再各带一份
+    """
+    suffix = 'Jpa' if system.orm == 'jpa' else 'Mybatis'
+    common_root = 'src/main/java/' + system.common_package.replace('.', '/')
+    variables = dict(system_package=system.package, common_package=system.common_package, orm=system.orm,
+                     keyset=system.keyset, count_strategy=system.count_strategy,
+                     streaming_export=system.streaming_export, db_dialect=system.db_dialect,
+                     stream_fetch_size=system.jdbc_fetch_size)
+    artifacts = [
+        (f"{common_root}/service/impl/Base{suffix}ServiceImpl.java", 'base_service_impl.java.j2', variables),
+        (f"{common_root}/page/PageUtils{suffix}.java", 'page_utils.java.j2', variables),
+    ]
+    if system.keyset:
+        artifacts.append((f"{common_root}/page/CursorPageResult.java", 'cursor_page_result.java.j2', variables))
+    if system.count_strategy:
+        artifacts.append((f"{common_root}/page/CountedPageResult.java", 'counted_page_result.java.j2', variables))
+    if system.streaming_export:
+        artifacts.append((f"{common_root}/export/ExportWriter.java", 'export_writer.java.j2', variables))
+    return artifacts
+
+def system_artifacts(system):
+    """系统级产物 [(相对路径, 模板, 变量)]：公共基类（未共享时）、启动主类、application.yml、README.md"""
+    system_name = system.name
+    system_package = system.package
+    orm = system.orm
+    return ([] if system.shared_common else common_artifacts(system)) + [
+        (_java_path(system, f"{system.app_class_name}.java"), 'application.java.j2',
+         dict(system_package=system_package, app_class_name=system.app_class_name, system_name=system_name)),
+        ('src/main/resources/application.yml', 'application.yml.j2',
+         dict(system_name=system_name, artifact_id=system.artifact_id, db_name=system_name.lower(), orm=orm)),
+        ('README.md', 'readme.md.j2',
+         dict(system_package=system_package, artifact_id=system.artifact_id, orm=orm, system_name=system_name,
+              db_name=system_name.lower())),
+    ]
+
+def entity_artifacts(system, entity):
+    """实体级产物：Entity / Model，JPA 的 Repository，MyBatis 的 Mapper 接口与 XML（同表的多个页面共用一份）"""
+    name = entity.model_name
+    variables = entity.template_vars(system)
+    artifacts = [
+        (_java_path(system, 'entity', f"{name}Entity.java"), 'entity.java.j2', variables),
+        (_java_path(system, 'model', f"{name}Model.java"), 'model.java.j2', variables),
+    ]
+    if system.orm == 'jpa':
+        artifacts.append((_java_path(system, 'repository', f"{name}Repository.java"), 'repository.java.j2', variables))
+    else:
+        artifacts.append((_java_path(system, 'mapper', f"{name}Mapper.java"), 'mapper.java.j2', variables))
+        artifacts.append((f"src/main/resources/mybatis/xml/{name}Mapper.xml", 'mapper.xml.j2', variables))
+    return artifacts
+
+def page_artifacts(system, page):
+    """页面级产物：Controller / Service / DTO / QueryDTO / ServiceImpl；page 为 PageSource 时变量为 None（规划阶段只需路径）"""
+    name = page.model_name
+    variables = query_dto_vars = None
+    if isinstance(page, Page):
+        variables = page.template_vars(system)
+        # query_dto 模板的 fields 为查询字段，其余模板共用同一份变量
+        query_dto_vars = dict(variables, fields=page.query_fields)
+    page_dir = page.name.lower()
+    return [
+        (_java_path(system, page_dir, 'controller', f"{name}Controller.java"), 'controller.java.j2', variables),
+        (_java_path(system, page_dir, 'service', f"{name}Service.java"), 'service.java.j2', variables),
+        (_java_path(system, page_dir, 'dto', f"{name}DTO.java"), 'dto.java.j2', variables),
+        (_java_path(system, page_dir, 'dto', f"{name}QueryDTO.java"), 'query_dto.java.j2', query_dto_vars),
+        (_java_path(system, page_dir, 'service', 'impl', f"{service_impl_class_name(name, system.orm)}.java"),
+         'service_impl.java.j2', variables),
+    ]
+
+def emit_artifacts(env, backend_dir, artifacts, outputs=None, only=None):
+    """渲染产物列表；only 为相对路径时只渲染该产物（任务图中一个节点）"""
+    for rel, template, variables in artifacts:
+        if only is None or rel == only:
+            code = render_template(env, template, **variables)
+            emit_code(os.path.join(backend_dir, *rel.split('/')), code, outputs)
+
+def generate_system_level_code(env, backend_dir, system, entity, outputs=None, only=None):
     try:
-        fields = []
-        for fname, finfo in schema.get('properties', {}).items():
-            fields.append({
-                'name': fname,
-                'columnName': finfo.get('columnName', fname),
-                'type': finfo.get('javaType', 'String'),
-                'label': finfo.get('description', fname),
-                'java_name': fname,
-                'java_type': finfo.get('javaType', 'String'),
-                'primaryKey': finfo.get('primaryKey', False)
-            })
-        return fields or [{
-            'name': 'id',
-            'columnName': 'ID',
-            'type': 'Long',
-            'java_name': 'id',
-            'java_type': 'Long',
-            'label': '主键ID',
-            'primaryKey': True
-        }]
+        emit_artifacts(env, backend_dir, entity_artifacts(system, entity), outputs, only)
     except Exception as e:
-        print(f"[ERROR][字段解析失败] schema: {schema} - {e}")
+        print(f"[ERROR][实体/仓库/模型生成失败] model_class: {entity.model_name} - {e}")
+        print(traceback.format_exc())
         raise
 
-def extract_paths(openapi):
+def generate_for_page(env, backend_dir, system, page, outputs=None, only=None, pages=None):
     try:
-        paths = []
-        for url, methods in openapi.get('paths', {}).items():
-            for method, api in methods.items():
-                paths.append({
-                    'url': url,
-                    'method': method,
-                    'mapping': openapi_method_to_mapping(method),
-                    'parameters': api.get('parameters', []),
-                    'requestBody': api.get('requestBody', {}),
-                    'summary': api.get('summary', ''),
-                    'responses': api.get('responses', {}),
-                    'operationId': api.get('operationId', f"{method}_{url.replace('/', '_')}")
-                })
-        return paths
+        if isinstance(page, PageSource):
+            page = load_page(page, env.profiler, pages)
+        emit_artifacts(env, backend_dir, page_artifacts(system, page), outputs, only)
     except Exception as e:
-        print(f"[ERROR][路径解析失败] openapi: {openapi} - {e}")
+        print(f"[ERROR][页面代码生成失败] system:{system.name.lower()}, page:{page.name} - {e}")
+        print(traceback.format_exc())
         raise
 
-def generate_system_level_code(env, backend_dir, java_root, entity_model_name, fields, system_package, table_name, orm):
+def generate_common_files(env, backend_dir, system, outputs=None, only=None):
+    """共享公共模块的源码：BaseServiceImpl 与 PageUtils"""
     try:
-        pk_field = get_primary_key_field(fields)
-        pk_type = pk_field['java_type'] if pk_field else 'Long'
-        layers = {
-            'entity.java.j2': os.path.join('entity', f"{entity_model_name}Entity.java"),
-            'model.java.j2': os.path.join('model', f"{entity_model_name}Model.java"),
-        }
-        if orm == 'jpa':
-            layers['repository.java.j2'] = os.path.join('repository', f"{entity_model_name}Repository.java")
-        variables = {
-            'system_package': system_package,
-            'model_class_name': f"{entity_model_name}Model",
-            'entity_class_name': f"{entity_model_name}Entity",
-            'repository_class_name': f"{entity_model_name}Repository",
-            'table_name': table_name,
-            'fields': [
-                {
-                    'name': f['name'],
-                    'columnName': f.get('columnName', f['name']),
-                    'type': f['java_type'],
-                    'java_name': f['name'],
-                    'java_type': f['java_type'],
-                    'label': f.get('label', f['name']),
-                    'primary_key': f.get('primaryKey', False)
-                }
-                for f in fields
-            ],
-            'pk_field': pk_field,
-            'pk_type': pk_type,
-            'pk_field_java_type': pk_type,
-            'orm': orm
-        }
-        for key, sub_path in layers.items():
-            tgt_dir = os.path.join(backend_dir, java_root, os.path.dirname(sub_path))
-            os.makedirs(tgt_dir, exist_ok=True)
-            code = render_template(env, key, **variables)
-            out_path = os.path.join(tgt_dir, os.path.basename(sub_path))
-            with open(out_path, 'w', encoding='utf-8') as fw:
-                fw.write(code)
-        base_service_impl_dir = os.path.join(backend_dir, java_root, "common", "service", "impl")
-        os.makedirs(base_service_impl_dir, exist_ok=True)
-        code = render_template(env, "base_service_impl.java.j2", system_package=system_package, orm=orm)
-        fname = "BaseJpaServiceImpl.java" if orm == "jpa" else "BaseMybatisServiceImpl.java"
-        with open(os.path.join(base_service_impl_dir, fname), 'w', encoding='utf-8') as fw:
-            fw.write(code)
+        emit_artifacts(env, backend_dir, common_artifacts(system), outputs, only)
     except Exception as e:
-        print(f"[ERROR][实体/仓库/模型生成失败] model_class: {entity_model_name} - {e}")
+        print(f"[ERROR][公共模块生成失败] package:{system.common_package} - {e}")
         print(traceback.format_exc())
         raise
 
-def get_query_fields_from_openapi(openapi):
-    query_fields = []
-    seen = set()
-    for path in extract_paths(openapi):
-        if path['method'].lower() == 'get':
-            for p in path.get('parameters', []):
-                name = p['name']
-                java_type = p.get('schema', {}).get('type', 'String').capitalize()
-                if name not in seen:
-                    query_fields.append({
-                        'name': name,
-                        'columnName': p.get('columnName', name),
-                        'type': java_type,
-                        'label': p.get('description', name),
-                        'java_name': name,
-                        'java_type': java_type,
-                    })
-                    seen.add(name)
-    if 'pageNum' not in seen:
-        query_fields.append({'name': 'pageNum', 'columnName': 'PAGE_NUM', 'type': 'Integer', 'label': '页码', 'java_name': 'pageNum', 'java_type': 'Integer'})
-    if 'pageSize' not in seen:
-        query_fields.append({'name': 'pageSize', 'columnName': 'PAGE_SIZE', 'type': 'Integer', 'label': '页大小', 'java_name': 'pageSize', 'java_type': 'Integer'})
-    return query_fields
-
-def generate_for_page(env, backend_dir, java_root, system_name, page_name, openapi,
-                     base_package, app_class_name, artifact_id, orm='mybatis'):
+def generate_system_files(env, backend_dir, system, outputs=None, only=None):
+    """系统级公共文件：公共基类、分页工具类、启动主类、application.yml、README.md"""
     try:
-        table_name = openapi.get('info', {}).get('tableName', page_name)
-        if not table_name:
-            raise Exception(f"OpenAPI info.tableName 为空，无法生成实体类名，page_name={page_name}")
-        entity_model_name = upper_camel(table_name)
-        if not entity_model_name:
-            raise Exception(f"表名 {table_name} 未能转换为有效类名，请检查 upper_camel 逻辑")
-        page_model_name = page_model_name_from_file(page_name)
-        if not page_model_name:
-            raise Exception(f"页面名 {page_name} 未能转换为有效类名，请检查 page_model_name_from_file 逻辑")
-        system_package = f"{base_package}.{system_name.lower()}"
-        page_package = f"{system_package}.{page_name.lower()}"
-        schemas = openapi.get('components', {}).get('schemas', {})
-        schema_key = find_schema_key(schemas, table_name)
-        schema = schemas.get(schema_key, {})
-        if not schema:
-            print(f"[ERROR][未找到schema定义] system:{system_name}, page:{page_name}, schemas keys: {list(schemas.keys())}, page_schema_key: {schema_key}")
-        fields = get_fields_from_schema(schema)
-        query_fields = get_query_fields_from_openapi(openapi)
-        query_dto_class_name = f"{page_model_name}QueryDTO"
-        query_params = []
-        for path in extract_paths(openapi):
-            if path['method'].lower() == 'get':
-                for p in path.get('parameters', []):
-                    query_params.append({
-                        'java_type': p.get('schema', {}).get('type', 'String').capitalize(),
-                        'java_name': p['name'],
-                        'name': p['name'],
-                        'desc': p.get('description', p['name']),
-                        'columnName': p.get('columnName', p['name']),
-                    })
-        query_params_str = ', '.join([f"{p['java_type']} {p['java_name']}" for p in query_params])
-        query_param_names = [p['java_name'] for p in query_params]
-
-        service_impl_class_name = f"{page_model_name}{'JpaServiceImpl' if orm == 'jpa' else 'MybatisServiceImpl'}"
-        service_instance_name = page_model_name[0].lower() + page_model_name[1:] + ('JpaService' if orm == 'jpa' else 'MybatisService')
-        service_impl_template = 'service_impl.java.j2'
-
-        variables = {
-            'system_package': system_package,
-            'page_package': page_package,
-            'entity_class_name': f"{entity_model_name}Entity",
-            'entity_model_name': entity_model_name,
-            'entity_mapper_name': f"{entity_model_name}Mapper",
-            'controller_class_name': f"{page_model_name}Controller",
-            'service_class_name': f"{page_model_name}Service",
-            'dto_class_name': f"{page_model_name}DTO",
-            'query_dto_class_name': query_dto_class_name,
-            'fields': fields,
-            'controller_model_name': page_model_name,
-            'model_class_name': entity_model_name,
-            'mapper_instance_name': f"{entity_model_name[0].lower() + entity_model_name[1:]}Mapper",
-            'service_impl_class_name': service_impl_class_name,
-            'service_instance_name': service_instance_name,
-            'repository_class_name': f"{entity_model_name}Repository",
-            'apis': extract_paths(openapi),
-            'app_class_name': app_class_name,
-            'artifact_id': artifact_id,
-            'page_name': page_name,
-            'query_params': query_params,
-            'query_params_str': query_params_str,
-            'query_param_names': query_param_names,
-            'orm': orm,
-            'table_name': table_name,
-        }
-
-        pk_field = get_primary_key_field(fields)
-        variables['pk_field_name'] = pk_field['name']
-        variables['pk_field_java_name'] = pk_field['java_name']
-        variables['pk_field_java_type'] = pk_field['java_type']
-        variables['mapper_class_name'] = f"{entity_model_name}Mapper"
-
-        page_dir = os.path.join(backend_dir, java_root, page_name.lower())
-
-        file_generate_plan = [
-            ('controller', 'controller.java.j2', f"{page_model_name}Controller.java", {}),
-            ('service', 'service.java.j2', f"{page_model_name}Service.java", {}),
-            ('dto', 'dto.java.j2', f"{page_model_name}DTO.java", {}),
-            ('dto', 'query_dto.java.j2', f"{query_dto_class_name}.java", {'fields': query_fields, 'query_dto_class_name': query_dto_class_name}),
-        ]
-        for subdir, template, fname, extra in file_generate_plan:
-            tgt_dir = os.path.join(page_dir, subdir)
-            os.makedirs(tgt_dir, exist_ok=True)
-            merged_vars = {**variables, **extra}
-            code = render_template(env, template, **merged_vars)
-            with open(os.path.join(tgt_dir, fname), 'w', encoding='utf-8') as fw:
-                fw.write(code)
-
-        impl_dir = os.path.join(page_dir, 'service', 'impl')
-        os.makedirs(impl_dir, exist_ok=True)
-        impl_code = render_template(env, service_impl_template, **variables)
-        with open(os.path.join(impl_dir, f"{service_impl_class_name}.java"), 'w', encoding='utf-8') as fw:
-            fw.write(impl_code)
-
-        # MyBatis时，统一生成到 system 级 mapper 目录
-        if orm == 'mybatis':
-            system_mapper_dir = os.path.join(backend_dir, java_root, 'mapper')
-            os.makedirs(system_mapper_dir, exist_ok=True)
-            mapper_code = render_template(env, 'mapper.java.j2', **variables)
-            with open(os.path.join(system_mapper_dir, f"{entity_model_name}Mapper.java"), 'w', encoding='utf-8') as fw:
-                fw.write(mapper_code)
-            xml_dir = os.path.join(backend_dir, 'src', 'main', 'resources', 'mybatis', 'xml')
-            os.makedirs(xml_dir, exist_ok=True)
-            xml_code = render_template(env, 'mapper.xml.j2', **variables)
-            with open(os.path.join(xml_dir, f"{entity_model_name}Mapper.xml"), 'w', encoding='utf-8') as fw:
-                fw.write(xml_code)
+        emit_artifacts(env, backend_dir, system_artifacts(system), outputs, only)
     except Exception as e:
-        print(f"[ERROR][页面代码生成失败] system:{system_name}, page:{page_name} - {e}")
+        print(f"[ERROR][主类/配置文件生成失败] system:{system.name} - {e}")
         print(traceback.format_exc())
         raise
 
-def check_consistency(output_dir, system_name, expected_structure):
-    """
-    校验生成工程的目录结构完整性。只校验目录存在性，不校验文件内容。
-    """
-    backend_dir = os.path.join(output_dir, f"{system_name}-backend")
-    for path in expected_structure:
-        full_path = os.path.join(backend_dir, path)
-        if not os.path.exists(full_path):
-            print(f"[ERROR][一致性校验] 缺少关键输出：{full_path}")
-            return False
-    print("[一致性校验] 结构完整，通过。")
-    return True
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
 
-def make_zip_dir(src_dir, zip_path):
+def make_zip_dir(src_dir, zip_path, level=6):
+    """把已落盘的工程目录打包为可复现 zip（条目排序、固定时间戳）；文件在写出该条目时才读取"""
     try:
-        with ZipFile(zip_path, 'w') as zipf:
-            for folder_name, subfolders, filenames in os.walk(src_dir):
-                for filename in filenames:
-                    file_path = os.path.join(folder_name, filename)
-                    arcname = os.path.relpath(file_path, src_dir)
-                    zipf.write(file_path, arcname)
+        archive = ReproducibleZip(zip_path, level)
+        for folder_name, subfolders, filenames in os.walk(src_dir):
+            for filename in filenames:
+                file_path = os.path.join(folder_name, filename)
+                archive.add(os.path.relpath(file_path, src_dir), partial(_read_file, file_path))
+        archive.close()
         print(f"✅ 已生成工程 ZIP 包：{zip_path}")
     except Exception as e:
         print(f"[ERROR][打包zip失败] {zip_path} - {e}")
         raise
 
+def create_env(templates_dir, cache_dir=None, compiled_dir=None, use_cache=True, profiler=None):
+    """profiler 挂在 env 上随渲染调用传递，未开启时为空实现"""
+    env = create_template_env(templates_dir, cache_dir=cache_dir, compiled_dir=compiled_dir, use_cache=use_cache)
+    env.profiler = profiler or NULL_PROFILER
+    return env
+
+def pom_options(group_id, version, aggregator_artifact_id=None):
+    """工程 pom.xml 生成参数；给出 aggregator_artifact_id 时各系统作为聚合父 POM 的子模块"""
+    parent = None
+    if aggregator_artifact_id:
+        parent = {'group_id': group_id, 'artifact_id': aggregator_artifact_id, 'version': version}
+    return {'group_id': group_id, 'version': version, 'parent': parent}
+
+def _common_dependencies(pom):
+    """共享公共模块时（pom['common'] 由 run_codegen 填入）各系统对公共模块的依赖"""
+    common = pom.get('common')
+    if not common:
+        return None
+    return [{'groupId': pom['group_id'], 'artifactId': common, 'version': pom['version']}]
+
+def generate_pom_file(env, backend_dir, system, pom, outputs=None, only=None):
+    """工程 pom.xml：与 generate_pom.py 使用同一模板与默认依赖，pom 见 pom_options"""
+    try:
+        parent = pom.get('parent')
+        user_deps = _common_dependencies(pom)
+        config = module_pom_config(system.orm, user_deps) if parent else default_pom_config(system.orm, user_deps)
+        code = render_pom(env.get_template('pom.xml.j2'), system.name, pom['group_id'], pom['version'],
+                          system.artifact_id, parent=parent, **config)
+        emit_code(os.path.join(backend_dir, 'pom.xml'), code, outputs)
+    except Exception as e:
+        print(f"[ERROR][pom.xml 生成失败] system:{system.name} - {e}")
+        print(traceback.format_exc())
+        raise
+
+def generate_common_pom_file(env, backend_dir, system, pom, outputs=None, only=None):
+    """共享公共模块的 pom.xml（普通 jar）"""
+    try:
+        parent = pom.get('parent')
+        code = render_pom(env.get_template('pom.xml.j2'), 'common', pom['group_id'], pom['version'],
+                          pom['common'], parent=parent,
+                          **common_pom_config(system.orm, bool(parent), system.streaming_export))
+        emit_code(os.path.join(backend_dir, 'pom.xml'), code, outputs)
+    except Exception as e:
+        print(f"[ERROR][pom.xml 生成失败] 公共模块:{pom['common']} - {e}")
+        print(traceback.format_exc())
+        raise
+
+def generate_aggregator_pom(env, output_dir, modules, orm, pom, dry_run=False):
+    """聚合父 pom.xml：列出全部子工程并统一管理依赖版本与插件，mvn -T 可在同一 reactor 中并行构建"""
+    parent = pom['parent']
+    code = render_aggregator_pom(env.get_template('aggregator_pom.xml.j2'), parent['group_id'], parent['version'],
+                                 sorted(modules), parent['artifact_id'],
+                                 **aggregator_pom_config([orm], _common_dependencies(pom)))
+    vfs = VirtualOutput()
+    vfs.write(os.path.join(output_dir, 'pom.xml'), code)
+    if dry_run:
+        diff = vfs.diff(output_dir)[3]
+        if diff:
+            sys.stdout.write(diff)
+        return
+    vfs.flush()
+    print(f"✅ 聚合 pom.xml 已输出到：{os.path.join(output_dir, 'pom.xml')}（{len(modules)} 个模块）")
+
+GENERATORS = {
+    'system': generate_system_files,
+    'pom': generate_pom_file,
+    'entity': generate_system_level_code,
+    'page': generate_for_page,
+    'common': generate_common_files,
+    'common_pom': generate_common_pom_file,
+}
+
+def artifacts_of(kind, kwargs):
+    """生成单元展开后的产物列表 [(相对路径, 模板, 变量)]，每个产物是任务图中的一个节点"""
+    system = kwargs['system']
+    if kind == 'system':
+        return system_artifacts(system)
+    if kind == 'entity':
+        return entity_artifacts(system, kwargs['entity'])
+    if kind == 'page':
+        return page_artifacts(system, kwargs['page'])
+    if kind == 'common':
+        return common_artifacts(system)
+    return [('pom.xml', 'pom.xml.j2', None)]
+
+def render_task(env, kind, kwargs, label=None, pages=None):
+    """
+    执行一个渲染节点（kwargs['only'] 指定产物），只渲染不写盘，返回 [(输出路径, 代码)]；
+    pages 为调用方持有的 PageCache，页面节点从磁盘加载页面时使用
+    """
+    outputs = []
+    if kind == 'page':
+        kwargs = dict(kwargs, pages=pages)
+    with env.profiler.span(kind, f"{kwargs['system'].name}/{label or kind}"):
+        GENERATORS[kind](env, outputs=outputs, **kwargs)
+    return outputs
+
+_WORKER_ENV = None
+_WORKER_PAGES = None
+
+def _init_worker(templates_dir, cache_dir, compiled_dir, use_cache, profile_root=None):
+    global _WORKER_ENV, _WORKER_PAGES
+    _WORKER_ENV = create_env(templates_dir, cache_dir, compiled_dir, use_cache,
+                             Profiler(profile_root) if profile_root else None)
+    _WORKER_PAGES = PageCache()
+
+def _render_task_local(env, pages, kind, kwargs, label=None):
+    return render_task(env, kind, kwargs, label, pages), None
+
+def _render_task_in_worker(kind, kwargs, label=None):
+    """worker 中渲染（worker 进程逐个执行节点，页面缓存归本进程独占）；开启 profiling 时把本节点的计时数据随结果回传"""
+    outputs = render_task(_WORKER_ENV, kind, kwargs, label, _WORKER_PAGES)
+    return outputs, _WORKER_ENV.profiler.drain()
+
+def _guard(title, target, fn, *args):
+    """主进程节点（写盘、打包、聚合 pom）：失败时打印错误后重新抛出，由任务图跳过其下游节点"""
+    try:
+        return fn(*args)
+    except Exception as e:
+        print(f"[FATAL ERROR][{title}] {target} - {e}")
+        print(traceback.format_exc())
+        raise
+
+class GenerationTask:
+    """一个渲染节点：unit 为产物相对路径（也是增量清单中的单元），label 为所属实体/页面，用于合并提交与剖析"""
+    def __init__(self, unit, kind, kwargs, label):
+        self.unit = unit
+        self.kind = kind
+        self.kwargs = kwargs
+        self.label = label
+        self.node = None
+
+class SystemPlan:
+    """单个系统（或共享公共模块）的生成计划：需要渲染的产物节点、可复用上次结果的产物 + 增量清单"""
+    def __init__(self, system, artifact_id, output_dir, template_hashes, force=False, profiler=NULL_PROFILER):
+        self.system = system
+        self.system_name = system.name
+        self.artifact_id = artifact_id
+        self.backend_dir = os.path.join(output_dir, artifact_id)
+        self.manifest = GenerationManifest(
+            os.path.join(output_dir, '.codegen', f"{artifact_id}.manifest.json"), self.backend_dir, template_hashes,
+            {'package_prefix': system.base_package, 'orm': system.orm}, force
+        )
+        self.profiler = profiler
+        self.tasks = []
+        self.skipped = []
+        self.units = set()
+        self.page_names = []
+        # 有页面读取 / 构建失败时为 True：本次计划不完整，不清理上次的输出
+        self.incomplete = False
+
+    def add_unit(self, kind, label, **kwargs):
+        """
+        生成单元（系统 / pom / 实体 / 页面）展开为每个产物一个节点，节点输入为单元 IR 与所用模板；
+        同一相对路径的产物只保留第一个节点，输入未变且输出完好的产物跳过渲染
+        """
+        kwargs = dict(kwargs, backend_dir=self.backend_dir, system=self.system)
+        manifest = self.manifest
+        with self.profiler.span('fingerprint'):
+            digest = manifest.digest(*[kwargs[k] for k in sorted(kwargs) if k != 'backend_dir'])
+            for rel, template, _ in artifacts_of(kind, kwargs):
+                if rel in self.units:
+                    continue
+                self.units.add(rel)
+                if manifest.reuse(rel, manifest.fingerprint((template,), digest)):
+                    self.skipped.append(rel)
+                else:
+                    self.tasks.append(GenerationTask(rel, kind, dict(kwargs, only=rel), label))
+
+class PageCache:
+    """
+    load_page 的单页缓存：同一页面的各产物节点依次执行（串行按加入顺序，并行时同批提交），只保留最近一个页面，避免重复读取。
+    由执行渲染的一方持有（一次 run_codegen 的主进程渲染、每个 worker 进程各一个），不跨线程共享
+    """
+    __slots__ = ('key', 'page')
+
+    def __init__(self):
+        self.key = None
+        self.page = None
+
+def load_page(source, profiler=NULL_PROFILER, cache=None):
+    """
+    第二阶段：从磁盘读取 PageSource 对应的文档并构建 Page，接口定义只在渲染该页面时存在于内存。
+    cache 为 PageCache 时复用其中最近加载的页面
+    """
+    key = (source.path, source.sha256)
+    if cache is not None:
+        if cache.key == key:
+            return cache.page
+        cache.key = cache.page = None
+    with profiler.span('json_load', source.path) as sp, open(source.path, 'rb') as f:
+        data = f.read()
+        if profiler.enabled:
+            sp.bytes = len(data)
+    if hashlib.sha256(data).hexdigest() != source.sha256:
+        raise Exception(f"页面文档在生成过程中被修改，请重新生成: {source.path}")
+    page = Page(source.name, source.model_name, source.entity, extract_paths(json.loads(data)), source.count_strategy)
+    if cache is not None:
+        cache.key, cache.page = key, page
+    return page
+
+def scan_openapi_doc(path, system_name, profiler=NULL_PROFILER):
+    """
+    第一阶段：读取单个 OpenAPI JSON，只保留构建实体所需的部分（info、components.schemas、paths 的键），
+    返回 (文件名, 页面名, 精简文档, 内容 sha256)；读取失败返回 None
+    """
+    file = os.path.basename(path)
+    try:
+        with profiler.span('json_load', f"{system_name}/{file}") as sp, open(path, 'rb') as f:
+            data = f.read()
+            if profiler.enabled:
+                sp.bytes = len(data)
+        openapi = json.loads(data)
+        skeleton = {'info': openapi.get('info', {}),
+                    'components': {'schemas': openapi.get('components', {}).get('schemas', {})},
+                    'paths': dict.fromkeys(openapi.get('paths') or {}, {})}
+        return file, os.path.splitext(file)[0], skeleton, hashlib.sha256(data).hexdigest()
+    except Exception as e:
+        print(f"[ERROR][处理页面失败] system:{system_name}, file:{file} - {e}")
+        print(traceback.format_exc())
+        return None
+
+def load_openapi_doc(path, system_name, profiler=NULL_PROFILER):
+    """读取单个 OpenAPI JSON，返回 (文件名, 页面名, openapi)；读取失败返回 None"""
+    file = os.path.basename(path)
+    try:
+        with profiler.span('json_load', f"{system_name}/{file}") as sp, open(path, encoding='utf-8') as f:
+            doc = (file, os.path.splitext(file)[0], json.load(f))
+            if profiler.enabled:
+                sp.bytes = os.fstat(f.fileno()).st_size
+        return doc
+    except Exception as e:
+        print(f"[ERROR][处理页面失败] system:{system_name}, file:{file} - {e}")
+        print(traceback.format_exc())
+        return None
+
+def load_openapi_docs(sys_dir, system_name, profiler=NULL_PROFILER):
+    """读取系统目录下全部 OpenAPI JSON，返回 [(文件名, 页面名, openapi)]；读取失败的文件跳过"""
+    docs = []
+    for file in sorted(os.listdir(sys_dir)):
+        if not file.endswith('.json'):
+            continue
+        doc = load_openapi_doc(os.path.join(sys_dir, file), system_name, profiler)
+        if doc is not None:
+            docs.append(doc)
+    return docs
+
+def plan_system(sys_dir, system_name, output_dir, base_package, orm, template_hashes, force=False, pom=None,
+                profiler=NULL_PROFILER, shared_common=False, code_options=None):
+    """
+    两阶段生成：规划时逐个读取文档，只保留 info / components.schemas 构建实体与系统级产物，其余内容随即释放；
+    页面产物为 PageSource，渲染时再逐页从磁盘读取文档（load_page），内存峰值不随页面数增长
+    """
+    docs = []
+    sources = {}
+    failed = False
+    for file in sorted(os.listdir(sys_dir)):
+        if not file.endswith('.json'):
+            continue
+        path = os.path.join(sys_dir, file)
+        scanned = scan_openapi_doc(path, system_name, profiler)
+        if scanned is not None:
+            docs.append(scanned[:3])
+            sources[file] = (path, scanned[3])
+        else:
+            failed = True
+    plan = plan_system_docs(system_name, docs, output_dir, base_package, orm, template_hashes, force, pom, profiler,
+                            shared_common, sources, code_options)
+    plan.incomplete = plan.incomplete or failed
+    return plan
+
+def plan_common(artifact_id, output_dir, base_package, orm, template_hashes, force=False, pom=None,
+                profiler=NULL_PROFILER, code_options=None):
+    """共享公共模块的生成计划：BaseServiceImpl / PageUtils（及 pom.xml）全部系统只生成一份"""
+    system = System('common', base_package, orm, True, **(code_options or {}))
+    plan = SystemPlan(system, artifact_id, output_dir, template_hashes, force, profiler)
+    plan.add_unit('common', 'common')
+    if pom is not None:
+        plan.add_unit('common_pom', 'pom', pom=pom)
+    return plan
+
+def plan_system_docs(system_name, docs, output_dir, base_package, orm, template_hashes, force=False, pom=None,
+                     profiler=NULL_PROFILER, shared_common=False, sources=None, code_options=None):
+    """
+    由内存中的 OpenAPI 文档构建系统生成计划；docs 为 [(文件名, 页面名, openapi)]。
+    sources 为 {文件名: (路径, sha256)} 时 docs 为第一阶段的精简文档（见 scan_openapi_doc），页面按 PageSource 延迟加载。
+    pom 为 {'group_id', 'version'} 时同时生成工程 pom.xml。
+    系统 / 实体 / 页面各自展开为每个产物一个节点（见 SystemPlan.add_unit），
+    同表页面共用的 Mapper、系统公共类只渲染一次；shared_common 时公共类改由共享公共模块提供。
+    code_options 为生成代码选项（见 System）：keyset 时在 offset 分页之外另生成游标（keyset）分页：
+    Mapper SQL / JPA Specification 与 /page/seek 接口；count_strategy 为各页面 page() 的默认 count 策略，
+    页面文档的 info.countStrategy 可单独覆盖（见 codegen_ir.page_count_strategy）；
+    streaming_export 时另生成游标 / Stream 逐行读取（streamAll）与 /export 流式导出接口，
+    读取时的 JDBC fetchSize 由 stream_fetch_size 与 db_dialect 决定（见 System.jdbc_fetch_size）。
+    """
+    system = System(system_name, base_package, orm, shared_common, **(code_options or {}))
+    plan = SystemPlan(system, system.artifact_id, output_dir, template_hashes, force, profiler)
+    plan.add_unit('system', 'system')
+    if pom is not None:
+        plan.add_unit('pom', 'pom', pom=pom)
+
+    entities = {}
+    pages = []
+    with profiler.span('schema_index', system_name):
+        index = SchemaIndex(docs)
+    for file, page_name, openapi in docs:
+        try:
+            if isinstance(openapi, dict) and is_component_file(openapi):
+                print(f"[INFO] system:{system_name}, file:{file} 仅包含共享 schema，不生成页面")
+                continue
+            with profiler.span('build_ir', f"{system_name}/{page_name}"):
+                count_strategy = page_count_strategy(openapi, system, page_name)
+                if sources is None:
+                    page = build_page(page_name, openapi, index, file, count_strategy)
+                else:
+                    model_name = page_model_name(page_name)
+                    entity = build_entity(page_name, openapi, index, file)
+                    page = (None if entity is None else
+                            PageSource(page_name, model_name, entity, *sources[file], count_strategy))
+            if page is None:
+                schemas = openapi.get('components', {}).get('schemas', {})
+                print(f"[ERROR][未找到schema定义] system:{system_name}, page:{page_name}, schemas keys: {list(schemas.keys())}")
+                plan.incomplete = True
+                continue
+            entity = page.entity
+            entity_key = f"{system_name.lower()}:{entity.model_name}"
+            if entity_key not in entities:
+                plan.add_unit('entity', entity.model_name, entity=entity)
+                entities[entity_key] = (entity, page_name)
+            else:
+                # 同表页面共用一份 Mapper / 实体，页面层（Service 游标字段、DTO）也以首个页面的实体为准，两侧一致
+                first_entity, first_page = entities[entity_key]
+                if entity != first_entity:
+                    print(f"[warn] system:{system_name}, page:{page_name} 与同表页面 {first_page} 的 schema "
+                          f"（字段 / primaryKey / sortKey）不一致，以 {first_page} 为准")
+                page.entity = first_entity
+            pages.append(page)
+            plan.page_names.append(page_name)
+        except Exception as e:
+            print(f"[ERROR][处理页面失败] system:{system_name}, file:{file} - {e}")
+            print(traceback.format_exc())
+            plan.incomplete = True
+    for page in pages:
+        plan.add_unit('page', page.name, page=page)
+    return plan
+
+def finish_system(plan, output_dir, errors, zip_only=False, zip_level=6, profiler=NULL_PROFILER, dry_run=False):
+    """
+    系统写出节点：取回本系统全部渲染节点的结果，登记到内存输出文件系统后批量写盘，输出与串行执行逐字节相同。
+    zip_only 时渲染结果直接写入压缩包，不落盘、不读写增量清单与文件清单（没有可供 --verify 校验的工程目录）；
+    dry_run 时不写盘，打印与磁盘现状的 unified diff。
+    """
+    system_name = plan.system_name
+    zip_path = os.path.join(output_dir, f"{plan.artifact_id}.zip")
+    archive = ReproducibleZip(zip_path, zip_level) if zip_only else None
+    vfs = VirtualOutput()
+    done_units = []
+    for task in plan.tasks:
+        node = task.node
+        if node.state != DONE:
+            print(f"[ERROR][生成节点失败] system:{system_name}, {task.unit} - {node.error}")
+            errors.append((system_name, task.unit, str(node.error)))
+            continue
+        outputs, snapshot = node.result
+        profiler.merge(snapshot)
+        if archive is not None:
+            for out_path, code in outputs:
+                archive.add(os.path.relpath(out_path, plan.backend_dir), code)
+            continue
+        for out_path, code in outputs:
+            vfs.write(out_path, code, task.unit)
+        done_units.append(task.unit)
+    if dry_run:
+        added, modified, unchanged, diff = vfs.diff(output_dir, profiler)
+        if diff:
+            sys.stdout.write(diff)
+        print(f"[dry-run] system:{system_name} 将新增 {added} 个文件，修改 {modified} 个文件，内容未变 {unchanged} 个（未写盘）")
+        stale = [rel for rel in plan.manifest.stale_outputs()
+                 if os.path.exists(os.path.join(plan.backend_dir, *rel.split('/')))]
+        if stale and not plan.incomplete:
+            print(f"[dry-run] system:{system_name} 将删除 {len(stale)} 个不再生成的文件：")
+            for rel in sorted(stale):
+                print(f"  {rel}")
+        return
+    if archive is not None:
+        with profiler.span('zip', system_name):
+            count = archive.close()
+        print(f"✅ 已生成工程 ZIP 包（{count} 个文件，未落盘）：{zip_path}")
+        return
+    plan.manifest.written_files, plan.manifest.unchanged_files = vfs.flush(plan.manifest, profiler)
+    for unit in done_units:
+        plan.manifest.done(unit)
+    # 清理已删除页面等不再生成的输出，否则会作为清单外文件残留
+    if plan.incomplete:
+        if plan.manifest.stale_outputs():
+            print(f"[warn] system:{system_name} 有页面处理失败，本次不清理不再生成的文件")
+        plan.manifest.keep_stale()
+    else:
+        with profiler.span('prune'):
+            plan.manifest.prune()
+    # 写出文件清单（路径/大小/sha256），供 verify.py 或 --verify 校验；落盘后按大小快速核对全部输出
+    file_list = file_manifest(plan.artifact_id, plan.manifest.files())
+    with profiler.span('manifest'):
+        write_file_manifest(manifest_path(output_dir, plan.artifact_id), file_list)
+    with profiler.span('verify'):
+        result = verify_tree(plan.backend_dir, file_list, check_hash=False, check_extra=False)
+    print_verify_result(plan.artifact_id, result)
+    with profiler.span('manifest'):
+        plan.manifest.save()
+    plan.manifest.print_summary(system_name)
+    print(f"✅ 代码已输出到：{plan.backend_dir}")
+
+def zip_system(plan, output_dir, zip_level=6, profiler=NULL_PROFILER):
+    """系统打包节点：在写出节点之后把工程目录打成 zip"""
+    with profiler.span('zip', plan.system_name):
+        make_zip_dir(plan.backend_dir, os.path.join(output_dir, f"{plan.artifact_id}.zip"), zip_level)
+
+def validation_sources(systems):
+    """run_codegen 的 systems → validate_sources 的 [(标签, 文件路径或文档)]"""
+    sources = []
+    for system_name, source in systems:
+        if isinstance(source, str):
+            for file in sorted(os.listdir(source)):
+                if file.endswith('.json'):
+                    sources.append((f"{system_name}/{file}", os.path.join(source, file)))
+        else:
+            sources.extend((f"{system_name}/{file}", openapi) for file, _, openapi in source)
+    return sources
+
+def run_codegen(systems, output_dir, base_package, orm, env_args, jobs=1, force=False, make_zip=False, pom=None,
+                zip_only=False, zip_level=6, profiler=None, env=None, executor=None, dry_run=False, modules=None,
+                graph_report=None, common_artifact_id=None, validate=True, validate_cache_dir=None, code_options=None):
+    """
+    生成主流程：systems 为 [(系统名, 系统目录 或 [(文件名, 页面名, openapi)])]，
+    目录时从磁盘两阶段读取 OpenAPI JSON（见 plan_system，页面文档渲染时才逐页加载），
+    列表时直接使用内存中的文档（pipeline.py）。返回失败节点列表。
+    全部系统先规划为一张产物依赖图（task_graph.TaskGraph）：每个输出文件一个渲染节点，
+    每个系统一个写出节点（依赖本系统全部渲染节点）及可选的打包节点，聚合 pom 依赖各系统 pom 节点；
+    jobs > 1 时互不依赖的渲染节点在进程池中并发执行，某个系统渲染完即可写出，不等其他系统。
+    zip_only 时全部节点重新渲染并直接写入压缩包（磁盘上没有可增量复用的输出）。
+    profiler 为 Profiler 时记录各阶段/模板/页面耗时，worker 的数据随渲染结果回传合并。
+    env / executor 由调用方传入时复用（--watch 常驻会话），本函数不负责关闭。
+    dry_run 时只打印将产生的变更（unified diff），不写盘、不更新增量清单。
+    pom 带 parent（见 pom_options）时在 output_dir 下生成聚合父 pom.xml，
+    modules 为其模块列表，默认取本次生成的全部系统。
+    graph_report 为路径时写出任务图执行报告（各节点状态与依赖，含跳过的节点）。
+    common_artifact_id 给出时 BaseServiceImpl / PageUtils 只在 output_dir/<common_artifact_id> 共享公共模块中生成一份，
+    各系统不再各带一份，改为 import <前缀>.codegen.common 包，生成 pom 时各系统依赖该模块（聚合工程中同为子模块）。
+    validate 时先校验全部输入文档（openapi_validate，结果按内容哈希缓存于 validate_cache_dir），
+    有文档未通过则不规划、不写出任何文件，返回各文档的校验错误。
+    code_options 为生成代码选项（keyset 游标分页、count 策略、流式导出，见 plan_system_docs）。
+    """
+    force = force or zip_only
+    if common_artifact_id and pom is not None:
+        pom = dict(pom, common=common_artifact_id)
+    templates_dir = env_args[0]
+    env = env or create_env(*env_args, profiler=profiler)
+    profiler = env.profiler
+    template_hashes = hash_templates(templates_dir)
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    owns_executor = executor is None and jobs > 1
+    if owns_executor:
+        executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                       initargs=(*env_args, profiler.root if profiler.enabled else None))
+
+    errors = []
+    if validate:
+        failed = validate_sources(validation_sources(systems), executor=executor, jobs=jobs,
+                                  cache=ValidationCache(validate_cache_dir), profiler=profiler)
+        if failed:
+            if owns_executor:
+                executor.shutdown()
+            print_validation_errors(failed)
+            print(f"[FATAL] {len(failed)} 个 OpenAPI 文档未通过校验，未写出任何文件")
+            return [(label.split('/', 1)[0], label, '; '.join(errs)) for label, errs in failed]
+    planned = []
+    pom_nodes = []
+    graph = TaskGraph()
+    pages = PageCache()
+
+    def add_plan(plan):
+        system_name = plan.system_name
+        planned.append(plan.artifact_id)
+        prefix = f"{plan.artifact_id}/"
+        deps = [graph.add(prefix + rel, skipped=True).id for rel in plan.skipped]
+        for task in plan.tasks:
+            if executor is None:
+                action, args = _render_task_local, (env, pages, task.kind, task.kwargs, task.label)
+            else:
+                action, args = _render_task_in_worker, (task.kind, task.kwargs, task.label)
+            task.node = graph.add(prefix + task.unit, action, args, batch=prefix + task.label)
+            deps.append(task.node.id)
+        if pom is not None:
+            pom_nodes.append(prefix + 'pom.xml')
+        write = graph.add(f"{plan.artifact_id}:write", _guard,
+                          ('系统级处理失败', f"system:{system_name}", finish_system,
+                           plan, output_dir, errors, zip_only, zip_level, profiler, dry_run),
+                          deps=deps, local=True, always=True)
+        if make_zip and not zip_only and not dry_run:
+            graph.add(f"{plan.artifact_id}:zip", _guard,
+                      ('打包zip失败', f"system:{system_name}", zip_system, plan, output_dir, zip_level, profiler),
+                      deps=[write.id], local=True)
+
+    try:
+        if common_artifact_id:
+            add_plan(plan_common(common_artifact_id, output_dir, base_package, orm, template_hashes, force, pom,
+                                 profiler, code_options))
+            if modules is not None:
+                modules = [common_artifact_id] + list(modules)
+        for system_name, source in systems:
+            try:
+                if isinstance(source, str):
+                    plan = plan_system(source, system_name, output_dir, base_package, orm, template_hashes, force, pom,
+                                       profiler, bool(common_artifact_id), code_options)
+                else:
+                    plan = plan_system_docs(system_name, source, output_dir, base_package, orm, template_hashes, force,
+                                            pom, profiler, bool(common_artifact_id), code_options=code_options)
+            except Exception as e:
+                print(f"[FATAL ERROR][系统级处理失败] system:{system_name} - {e}")
+                print(traceback.format_exc())
+                continue
+            add_plan(plan)
+        aggregator = None
+        if pom is not None and pom.get('parent'):
+            aggregator = graph.add('aggregator:pom.xml', _guard,
+                                   ('聚合 pom.xml 生成失败', output_dir, generate_aggregator_pom, env, output_dir,
+                                    modules if modules is not None else planned, orm, pom, dry_run),
+                                   deps=pom_nodes, local=True, always=True)
+        graph.run(executor)
+        if aggregator is not None and aggregator.state == FAILED:
+            errors.append(('*', 'aggregator', str(aggregator.error)))
+    finally:
+        if owns_executor:
+            executor.shutdown()
+    graph.print_summary()
+    if graph_report:
+        with open(graph_report, 'w', encoding='utf-8') as fw:
+            json.dump(graph.report(), fw, ensure_ascii=False, indent=1)
+        print(f"[任务图] 执行报告已写入: {graph_report}")
+    if errors:
+        print(f"\n[汇总] 共 {len(errors)} 个生成节点失败：")
+        for system_name, unit, msg in errors:
+            print(f"  - system:{system_name}, {unit} - {msg}")
+    return errors
+
+class WatchSession:
+    """
+    --watch 常驻会话：Environment、渲染进程池与已解析的 OpenAPI 文档常驻内存。
+    文件变化时只重新规划受影响的系统，系统内由增量清单按输入指纹（页面 IR、所用模板哈希）
+    只重新渲染受影响的单元：页面变化只重渲该页面（及其实体），模板变化只重渲用到该模板的单元。
+    """
+    def __init__(self, output_dir, base_package, orm, env_args, jobs=1, make_zip=False, pom=None, zip_level=6,
+                 common_artifact_id=None, validate=True, validate_cache_dir=None, code_options=None):
+        self.output_dir = output_dir
+        self.base_package = base_package
+        self.orm = orm
+        self.env_args = env_args
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.make_zip = make_zip
+        self.pom = pom
+        self.zip_level = zip_level
+        self.common_artifact_id = common_artifact_id
+        self.validate = validate
+        self.validate_cache_dir = validate_cache_dir
+        self.code_options = code_options
+        self.docs = {}
+        self.env = None
+        self.executor = None
+        self.start()
+
+    def start(self):
+        # FileSystemLoader 在 get_template 时按 mtime 自动重新加载模板；预编译模块不会，模板变化时需重建
+        self.env = create_env(*self.env_args)
+        if self.jobs > 1:
+            self.executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker, initargs=self.env_args)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def templates_changed(self):
+        if self.env_args[2]:
+            self.close()
+            self.start()
+
+    def set_doc(self, system_name, path):
+        """重新读取一个页面文档，读取失败时保留上一次的内容"""
+        doc = load_openapi_doc(path, system_name)
+        if doc is not None:
+            self.set_openapi(system_name, *doc)
+
+    def set_openapi(self, system_name, file, page_name, openapi):
+        self.docs.setdefault(system_name, {})[file] = (page_name, openapi)
+
+    def replace_docs(self, system_name, file, docs):
+        """替换由 file 转换出的全部文档（多表 AMIS 页面按表展开为 <file>#<表名>，见 split_openapi_docs）"""
+        current = self.docs.setdefault(system_name, {})
+        for key in self._derived_files(current, file):
+            del current[key]
+        for doc_file, page_name, openapi in docs:
+            current[doc_file] = (page_name, openapi)
+
+    def remove_doc(self, system_name, file):
+        current = self.docs.get(system_name, {})
+        keys = self._derived_files(current, file)
+        for key in keys:
+            del current[key]
+        if keys:
+            print(f"[watch] 页面已删除，重新生成时清理其输出: system:{system_name}, file:{file}")
+
+    @staticmethod
+    def _derived_files(docs, file):
+        return [key for key in docs if key == file or key.startswith(file + '#')]
+
+    def regenerate(self, system_names=None):
+        names = sorted(self.docs) if system_names is None else sorted(n for n in system_names if n in self.docs)
+        systems = [(name, [(file, page_name, openapi) for file, (page_name, openapi) in sorted(self.docs[name].items())])
+                   for name in names]
+        modules = [System(name, self.base_package, self.orm).artifact_id for name in sorted(self.docs)]
+        return run_codegen(systems, self.output_dir, self.base_package, self.orm, self.env_args, self.jobs,
+                           make_zip=self.make_zip, pom=self.pom, zip_level=self.zip_level,
+                           env=self.env, executor=self.executor, modules=modules,
+                           common_artifact_id=self.common_artifact_id, validate=self.validate,
+                           validate_cache_dir=self.validate_cache_dir, code_options=self.code_options)
+
+def watch_openapi_dir(openapi_dir, templates_dir, session, interval):
+    """监听 openapi-dir（<系统>/<页面>.json）与 templates-dir，变化时增量重新生成"""
+    for system_name in sorted(os.listdir(openapi_dir)):
+        sys_dir = os.path.join(openapi_dir, system_name)
+        if os.path.isdir(sys_dir):
+            for file, page_name, openapi in load_openapi_docs(sys_dir, system_name):
+                session.set_openapi(system_name, file, page_name, openapi)
+    session.regenerate()
+
+    def on_change(paths):
+        affected = set()
+        for path in paths:
+            if path.startswith(templates_dir + os.sep):
+                session.templates_changed()
+                affected = None
+                continue
+            parts = os.path.relpath(path, openapi_dir).split(os.sep)
+            if len(parts) != 2 or not path.endswith('.json'):
+                continue
+            system_name, file = parts
+            if os.path.exists(path):
+                session.set_doc(system_name, path)
+            else:
+                session.remove_doc(system_name, file)
+            if affected is not None:
+                affected.add(system_name)
+        session.regenerate(affected)
+
+    try:
+        watch_loop(DirWatcher([openapi_dir, templates_dir]), on_change, interval)
+    finally:
+        session.close()
+
 def main():
     parser = argparse.ArgumentParser(description="OpenAPI 自动生成 Java 微服务工程代码（JPA/MyBatis 互斥，不能共存！）")
     parser.add_argument('--package-prefix', default='com.hg', help='Java package 前缀')
@@ -340,12 +1020,42 @@ def main():
     parser.add_argument('--templates-dir', default='./templates', help='模板目录')
     parser.add_argument('--orm', default='mybatis', help='ORM类型[jpa or mybatis]，必须单选，不能 all')
     parser.add_argument('--zip', action='store_true', help='输出主工程 zip 包')
+    parser.add_argument('--zip-only', action='store_true', help='渲染结果直接写入 zip 包，不输出工程目录（隐含 --force）')
+    parser.add_argument('--zip-level', type=int, default=6, choices=range(0, 10), metavar='0-9', help='zip 压缩级别，0 为不压缩，默认 6')
+    parser.add_argument('--profile', default=None, metavar='REPORT.json', help='开启性能剖析，写出 JSON 报告与 REPORT.json.folded（flamegraph）')
+    parser.add_argument('--profile-top', type=int, default=15, help='剖析汇总打印前 N 项，默认 15')
+    parser.add_argument('--force', action='store_true', help='忽略增量清单，全量重新渲染所有文件')
+    parser.add_argument('--dry-run', action='store_true', help='只渲染并打印与磁盘现状的 unified diff，不写盘')
+    parser.add_argument('--aggregator', action='store_true', help='同时生成各系统 pom.xml 与 output-dir 下的聚合父 pom.xml（mvn -T 并行构建全部系统）')
+    parser.add_argument('--aggregator-artifact-id', default=DEFAULT_AGGREGATOR_ARTIFACT_ID, help=f'聚合父 POM 的 artifactId，默认 {DEFAULT_AGGREGATOR_ARTIFACT_ID}')
+    parser.add_argument('--shared-common', action='store_true', help='BaseServiceImpl / PageUtils 只在共享公共模块中生成一份（<前缀>.codegen.common 包），各系统依赖它')
+    parser.add_argument('--common-artifact-id', default=DEFAULT_COMMON_ARTIFACT_ID, help=f'共享公共模块的 artifactId（输出目录名），默认 {DEFAULT_COMMON_ARTIFACT_ID}')
+    parser.add_argument('--keyset-pagination', action='store_true', help='在 offset 分页之外另生成游标（keyset）分页接口 /page/seek（after/before 游标，按主键或 sortKey 字段）')
+    parser.add_argument('--count-strategy', default=None, choices=COUNT_STRATEGIES, help='分页 count 策略：exact 与分页查询并发 count，cached 按查询条件缓存 count，estimate 无条件时取表统计行数，none 不 count（多取一条判断 hasNext）；默认不启用（串行 count），页面可用 info.countStrategy 覆盖')
+    parser.add_argument('--count-cache-ttl', type=int, default=60, help='count 策略 cached 的缓存秒数，默认 60')
+    parser.add_argument('--streaming-export', action='store_true', help='生成流式读取（MyBatis Cursor / JPA Stream）与 GET /export?format=ndjson|csv 导出接口，内存占用与数据量无关')
+    parser.add_argument('--stream-fetch-size', type=int, default=1000, help='流式读取每次从数据库取的行数（JDBC fetchSize），默认 1000；--db-dialect mysql 时不使用')
+    parser.add_argument('--db-dialect', default='generic', choices=DB_DIALECTS, help='流式读取的数据库方言：generic 按 --stream-fetch-size 分批读取（H2 / PostgreSQL 等），mysql 使用 Connector/J 逐行流式（fetchSize=Integer.MIN_VALUE）')
+    parser.add_argument('--group-id', default=None, help='pom.xml groupId，默认同 --package-prefix（配合 --aggregator）')
+    parser.add_argument('--version', default='1.0.0', help='pom.xml 版本（配合 --aggregator）')
+    parser.add_argument('--graph-report', default=None, metavar='GRAPH.json', help='写出任务图执行报告：每个产物节点的状态（执行/跳过/失败/未执行）与依赖')
+    parser.add_argument('--no-validate', action='store_true', help='跳过生成前的 OpenAPI 文档校验（openapi-spec-validator）')
+    parser.add_argument('--validate-cache-dir', default=None, help='OpenAPI 校验结果缓存目录，默认 ~/.cache/codegen/validate')
+    parser.add_argument('--verify', action='store_true', help='不生成，按文件清单校验 output-dir 下的工程，报告缺失/被修改/清单外文件')
+    parser.add_argument('--watch', action='store_true', help='常驻监听 openapi-dir 与 templates-dir，文件变化时只重新生成受影响的页面/模板输出')
+    parser.add_argument('--watch-interval', type=float, default=0.3, help='--watch 轮询间隔（秒），默认 0.3')
+    parser.add_argument('--jobs', type=int, default=1, help='并行渲染进程数，默认 1（串行）；0 表示使用全部 CPU 核')
+    parser.add_argument('--template-cache-dir', default=None, help='模板编译缓存目录，默认 ~/.cache/codegen/jinja2')
+    parser.add_argument('--no-template-cache', action='store_true', help='关闭模板编译缓存')
+    parser.add_argument('--compiled-templates', default=None, help='template_cache.py precompile 生成的预编译模板目录（可选）')
     args = parser.parse_args()
     base_package = args.package_prefix
 
     openapi_dir = os.path.abspath(args.openapi_dir)
     output_dir = os.path.abspath(args.output_dir)
     templates_dir = os.path.abspath(args.templates_dir)
+    if args.verify:
+        sys.exit(0 if verify_output_dir(output_dir, jobs=args.jobs if args.jobs > 1 else None) else 1)
     if not os.path.exists(openapi_dir) or not os.path.isdir(openapi_dir):
         print(f"[FATAL] openapi-dir 不存在或不是目录: {openapi_dir}")
         sys.exit(1)
@@ -360,135 +1070,49 @@ def main():
             print(f"[FATAL] 无法创建输出目录: {output_dir} - {e}")
             sys.exit(1)
 
-    env = Environment(loader=FileSystemLoader(templates_dir), trim_blocks=True, lstrip_blocks=True)
-    def upper_first(s):
-        return s[0].upper() + s[1:] if s else s
-    env.filters['upper_first'] = upper_first
-
-    for system_name in os.listdir(openapi_dir):
+    compiled_dir = os.path.abspath(args.compiled_templates) if args.compiled_templates else None
+    env_args = (templates_dir, args.template_cache_dir, compiled_dir, not args.no_template_cache)
+    pom = None
+    if args.aggregator:
+        pom = pom_options(args.group_id or base_package, args.version, args.aggregator_artifact_id)
+    if args.dry_run and args.zip_only:
+        print("[FATAL] --dry-run 不能与 --zip-only 同时使用")
+        sys.exit(1)
+    common_artifact_id = args.common_artifact_id if args.shared_common else None
+    if args.count_cache_ttl <= 0:
+        print("[FATAL] --count-cache-ttl 必须大于 0")
+        sys.exit(1)
+    if args.stream_fetch_size <= 0:
+        print("[FATAL] --stream-fetch-size 必须大于 0")
+        sys.exit(1)
+    code_options = dict(keyset=args.keyset_pagination, count_strategy=args.count_strategy,
+                        count_cache_ttl=args.count_cache_ttl, streaming_export=args.streaming_export,
+                        stream_fetch_size=args.stream_fetch_size, db_dialect=args.db_dialect)
+    if args.watch:
+        if args.zip_only or args.profile or args.dry_run:
+            print("[FATAL] --watch 不能与 --zip-only / --profile / --dry-run 同时使用")
+            sys.exit(1)
+        session = WatchSession(output_dir, base_package, args.orm, env_args, args.jobs, args.zip, pom, args.zip_level,
+                               common_artifact_id, not args.no_validate, args.validate_cache_dir, code_options)
+        watch_openapi_dir(openapi_dir, templates_dir, session, args.watch_interval)
+        return
+    systems = []
+    for system_name in sorted(os.listdir(openapi_dir)):
         sys_dir = os.path.join(openapi_dir, system_name)
-        if not os.path.isdir(sys_dir):
-            continue
-        try:
-            artifact_id = f"{system_name}-backend"
-            app_class_name = upper_camel(system_name) + "ApiApplication"
-            backend_dir = os.path.join(output_dir, artifact_id)
-            java_root = os.path.join('src', 'main', 'java', *args.package_prefix.split('.'), system_name.lower())
-
-            system_package = f"{base_package}.{system_name.lower()}"
-            pageutils_dir = os.path.join(backend_dir, java_root, "common", "page")
-            os.makedirs(pageutils_dir, exist_ok=True)
-            code = render_template(env, "page_utils.java.j2", system_package=system_package, orm=args.orm)
-            pageutils_cls = "PageUtilsJpa.java" if args.orm == "jpa" else "PageUtilsMybatis.java"
-            with open(os.path.join(pageutils_dir, pageutils_cls), 'w', encoding='utf-8') as fw:
-                fw.write(code)
-
-            openapi_files = [f for f in os.listdir(sys_dir) if f.endswith('.json')]
-            openapi_objs = []
-            entity_keys = set()
-            for file in openapi_files:
-                page_name = os.path.splitext(file)[0]
-                try:
-                    file_path = os.path.join(sys_dir, file)
-                    with open(file_path, encoding='utf-8') as f:
-                        openapi = json.load(f)
-                    table_name = openapi.get('info', {}).get('tableName', page_name)
-                    entity_model_name = upper_camel(table_name)
-                    schemas = openapi.get('components', {}).get('schemas', {})
-                    schema_key = find_schema_key(schemas, table_name)
-                    schema = schemas.get(schema_key, {})
-                    if not schema:
-                        print(f"[ERROR][未找到schema定义] system:{system_name}, page:{page_name}, schemas keys: {list(schemas.keys())}, page_schema_key: {schema_key}")
-                        continue
-                    fields = get_fields_from_schema(schema)
-                    system_package = f"{base_package}.{system_name.lower()}"
-                    entity_key = f"{system_name.lower()}:{entity_model_name}"
-                    if entity_key not in entity_keys:
-                        generate_system_level_code(
-                            env,
-                            backend_dir,
-                            java_root,
-                            entity_model_name,
-                            fields,
-                            system_package,
-                            table_name,
-                            args.orm
-                        )
-                        entity_keys.add(entity_key)
-                    openapi_objs.append((page_name, openapi))
-                except Exception as e:
-                    print(f"[ERROR][处理页面失败] system:{system_name}, file:{file} - {e}")
-                    print(traceback.format_exc())
-            app_java_dir = os.path.join(backend_dir, java_root)
-            os.makedirs(app_java_dir, exist_ok=True)
-            system_package = f"{base_package}.{system_name.lower()}"
-            try:
-                code = render_template(env, 'application.java.j2',
-                                   system_package=system_package,
-                                   app_class_name=app_class_name,
-                                   system_name=system_name)
-                with open(os.path.join(app_java_dir, f"{app_class_name}.java"), 'w', encoding='utf-8') as fw:
-                    fw.write(code)
-                resource_dir = os.path.join(backend_dir, 'src', 'main', 'resources')
-                os.makedirs(resource_dir, exist_ok=True)
-                code = render_template(
-                    env, 'application.yml.j2',
-                    system_name=system_name,
-                    artifact_id=artifact_id,
-                    db_name=system_name.lower(),
-                    orm=args.orm
-                )
-                with open(os.path.join(resource_dir, 'application.yml'), 'w', encoding='utf-8') as fw:
-                    fw.write(code)
-                code = render_template(env, 'readme.md.j2', system_package=system_package, artifact_id=artifact_id, orm=args.orm, system_name=system_name, db_name=system_name.lower())
-                with open(os.path.join(backend_dir, 'README.md'), 'w', encoding='utf-8') as fw:
-                    fw.write(code)
-            except Exception as e:
-                print(f"[ERROR][主类/配置文件生成失败] system:{system_name} - {e}")
-                print(traceback.format_exc())
-            for page_name, openapi in openapi_objs:
-                try:
-                    generate_for_page(
-                        env,
-                        backend_dir,
-                        java_root,
-                        system_name.lower(),
-                        page_name,    # 保持原文件名格式
-                        openapi,
-                        base_package,
-                        app_class_name,
-                        artifact_id,
-                        orm=args.orm
-                    )
-                except Exception as e:
-                    print(f"[ERROR][生成页面代码失败] system:{system_name}, page:{page_name} - {e}")
-                    print(traceback.format_exc())
-            # 一致性校验
-            if openapi_objs:
-                expected_structure = [
-                    os.path.join('src', 'main', 'java', *args.package_prefix.split('.'), system_name.lower(), 'entity'),
-                    os.path.join('src', 'main', 'java', *args.package_prefix.split('.'), system_name.lower(), 'model'),
-                    os.path.join('src', 'main', 'java', *args.package_prefix.split('.'), system_name.lower(), 'common', 'page'),
-                ]
-                if args.orm == 'mybatis':
-                    expected_structure.append(os.path.join('src', 'main', 'java', *args.package_prefix.split('.'), system_name.lower(), 'mapper'))
-                if args.orm == 'jpa':
-                    expected_structure.append(os.path.join('src', 'main', 'java', *args.package_prefix.split('.'), system_name.lower(), 'repository'))
-                for page_name, _ in openapi_objs:
-                    expected_structure += [
-                        os.path.join('src', 'main', 'java', *args.package_prefix.split('.'), system_name.lower(), page_name.lower(), 'controller'),
-                        os.path.join('src', 'main', 'java', *args.package_prefix.split('.'), system_name.lower(), page_name.lower(), 'service'),
-                        os.path.join('src', 'main', 'java', *args.package_prefix.split('.'), system_name.lower(), page_name.lower(), 'service', 'impl'),
-                        os.path.join('src', 'main', 'java', *args.package_prefix.split('.'), system_name.lower(), page_name.lower(), 'dto'),
-                    ]
-                check_consistency(output_dir, system_name, expected_structure)
-            if args.zip:
-                zip_path = os.path.join(output_dir, f"{artifact_id}.zip")
-                make_zip_dir(backend_dir, zip_path)
-            print(f"✅ 代码已输出到：{backend_dir}")
-        except Exception as e:
-            print(f"[FATAL ERROR][系统级处理失败] system:{system_name} - {e}")
-            print(traceback.format_exc())
+        if os.path.isdir(sys_dir):
+            systems.append((system_name, sys_dir))
+    profiler = Profiler('codegen') if args.profile else None
+    errors = run_codegen(systems, output_dir, base_package, args.orm, env_args,
+                         jobs=args.jobs, force=args.force, make_zip=args.zip, pom=pom,
+                         zip_only=args.zip_only, zip_level=args.zip_level, profiler=profiler, dry_run=args.dry_run,
+                         graph_report=os.path.abspath(args.graph_report) if args.graph_report else None,
+                         common_artifact_id=common_artifact_id, validate=not args.no_validate,
+                         validate_cache_dir=args.validate_cache_dir, code_options=code_options)
+    if profiler is not None:
+        profiler.print_top(args.profile_top)
+        profiler.write(os.path.abspath(args.profile))
+    if errors:
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,452 @@
+"""
+codegen 中间模型（IR）：每个 OpenAPI 文档只解析一次，得到 System / Entity / Page / Field / Api，
+所有模板共用同一份模型与变量；各类均可 to_dict / from_dict，便于工具缓存或跨进程传递。
+"""
+import os
+from schema_index import SchemaIndex
+
+def upper_camel(s):
+    """表名或其他下划线、连字符、点分隔字符串转驼峰（首字母大写）"""
+    if not s:
+        return ""
+    parts = s.replace('-', '_').replace('.', '_').split('_')
+    return ''.join([w.capitalize() for w in parts if w])
+
+def lower_first(s):
+    return s[0].lower() + s[1:] if s else s
+
+def page_model_name_from_file(page_name):
+    """
+    页面对象类名生成：如果有下划线或全小写则驼峰化，否则保持文件名原驼峰
+    """
+    if '_' in page_name or page_name.islower():
+        parts = page_name.replace('-', '_').split('_')
+        return ''.join([w.capitalize() for w in parts if w])
+    return page_name[0].upper() + page_name[1:]
+
+def service_impl_class_name(model_name, orm):
+    return f"{model_name}{'JpaServiceImpl' if orm == 'jpa' else 'MybatisServiceImpl'}"
+
+def openapi_method_to_mapping(method):
+    std_methods = {
+        'get': 'GetMapping',
+        'post': 'PostMapping',
+        'put': 'PutMapping',
+        'delete': 'DeleteMapping',
+        'patch': 'PatchMapping',
+        'options': 'RequestMapping',
+        'head': 'RequestMapping'
+    }
+    m = method.lower()
+    mapping = std_methods.get(m)
+    if not mapping:
+        print(f"[warn] 未知HTTP方法: {method}，默认使用@RequestMapping")
+        mapping = 'RequestMapping'
+    return mapping
+
+class _Node:
+    """__slots__ 模型基类：按槽位序列化，模板中 obj.attr 与 obj['attr'] 均可访问"""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls.__new__(cls)
+        for k in cls.__slots__:
+            setattr(obj, k, d[k])
+        return obj
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class Field(_Node):
+    __slots__ = ('name', 'columnName', 'type', 'label', 'java_name', 'java_type', 'primary_key', 'sort_key')
+
+    def __init__(self, name, java_type='String', column_name=None, label=None, primary_key=False, sort_key=False):
+        self.name = name
+        self.columnName = name if column_name is None else column_name
+        self.type = java_type
+        self.label = label
+        self.java_name = name
+        self.java_type = java_type
+        self.primary_key = primary_key
+        self.sort_key = sort_key
+
+# 游标值与字符串互转的 Java 表达式（%s 为取值 / 字符串表达式）
+CURSOR_CODECS = {
+    'String': ('%s', '%s'),
+    'Integer': ('String.valueOf(%s)', 'Integer.valueOf(%s)'),
+    'Long': ('String.valueOf(%s)', 'Long.valueOf(%s)'),
+    'Short': ('String.valueOf(%s)', 'Short.valueOf(%s)'),
+    'Double': ('String.valueOf(%s)', 'Double.valueOf(%s)'),
+    'Float': ('String.valueOf(%s)', 'Float.valueOf(%s)'),
+    'Boolean': ('String.valueOf(%s)', 'Boolean.valueOf(%s)'),
+    'java.util.Date': ('String.valueOf(%s.getTime())', 'new java.util.Date(Long.parseLong(%s))'),
+    'Date': ('String.valueOf(%s.getTime())', 'new java.util.Date(Long.parseLong(%s))'),
+    'java.math.BigDecimal': ('%s.toPlainString()', 'new java.math.BigDecimal(%s)'),
+    'BigDecimal': ('%s.toPlainString()', 'new java.math.BigDecimal(%s)'),
+    'java.time.LocalDateTime': ('%s.toString()', 'java.time.LocalDateTime.parse(%s)'),
+    'LocalDateTime': ('%s.toString()', 'java.time.LocalDateTime.parse(%s)'),
+    'java.time.LocalDate': ('%s.toString()', 'java.time.LocalDate.parse(%s)'),
+    'LocalDate': ('%s.toString()', 'java.time.LocalDate.parse(%s)'),
+}
+
+# 分页查询的 count 策略：exact 与分页查询并发 count；cached 按查询条件缓存 count（TTL）；
+# estimate 无查询条件时取数据库统计行数；none 不 count，多取一条判断是否有下一页
+COUNT_STRATEGIES = ('exact', 'cached', 'estimate', 'none')
+
+# 流式读取的数据库方言：generic 按 --stream-fetch-size 分批取行（H2 / PostgreSQL 等遵循 JDBC 规范的驱动）；
+# mysql 用 Connector/J 的逐行流式约定 fetchSize = Integer.MIN_VALUE（其他驱动会拒绝或忽略该值）
+DB_DIALECTS = ('generic', 'mysql')
+MYSQL_STREAMING_FETCH_SIZE = -2**31
+
+def page_count_strategy(openapi, system, page_name):
+    """页面的 count 策略：info.countStrategy 优先，否则为系统默认（--count-strategy）；系统未启用时为 None（串行 count）"""
+    value = openapi.get('info', {}).get('countStrategy')
+    if value is None:
+        return system.count_strategy
+    if value not in COUNT_STRATEGIES:
+        raise Exception(f"info.countStrategy 必须为 {'/'.join(COUNT_STRATEGIES)}: {value}，page_name={page_name}")
+    if system.count_strategy is None:
+        print(f"[warn] page:{page_name} 的 info.countStrategy 需配合 --count-strategy 使用，已忽略")
+        return None
+    return value
+
+def cursor_fields(entity):
+    """
+    keyset 分页的游标字段：排序键（schema 中 sortKey: true 的字段，默认主键），
+    排序键不是主键时追加主键作为次序键，保证排序唯一。每项给出 MyBatis 参数名、实体取值方法与编解码表达式
+    """
+    pk = entity.pk_field
+    keys = [entity.sort_field] if entity.sort_field is pk else [entity.sort_field, pk]
+    result = []
+    for i, f in enumerate(keys):
+        encode, decode = CURSOR_CODECS.get(f.java_type, ('String.valueOf(%s)', f"{f.java_type}.valueOf(%s)"))
+        getter = 'getId' if f is pk else f"get{f.name[:1].upper()}{f.name[1:]}"
+        result.append({
+            'field': f, 'name': f.name, 'column': f.columnName, 'java_type': f.java_type, 'param': f"cursor{i}",
+            'encode': encode % f"entity.{getter}()", 'decode': decode % f"values[{i}]",
+        })
+    return result
+
+class Api(_Node):
+    __slots__ = ('url', 'method', 'mapping', 'parameters', 'requestBody', 'summary', 'responses', 'operationId')
+
+    def __init__(self, url, method, api):
+        self.url = url
+        self.method = method
+        self.mapping = openapi_method_to_mapping(method)
+        self.parameters = api.get('parameters', [])
+        self.requestBody = api.get('requestBody', {})
+        self.summary = api.get('summary', '')
+        self.responses = api.get('responses', {})
+        self.operationId = api.get('operationId', f"{method}_{url.replace('/', '_')}")
+
+def get_primary_key_field(fields):
+    for f in fields:
+        if f.primary_key:
+            return f
+    for f in fields:
+        if f.name.lower() in ('id', 'pk', 'table_id', 'user_id', 'column_id'):
+            return f
+    if fields:
+        return fields[0]
+    raise Exception("fields 为空，无法识别主键")
+
+def get_fields_from_schema(schema):
+    try:
+        fields = [
+            Field(fname, finfo.get('javaType', 'String'), finfo.get('columnName', fname),
+                  finfo.get('description', fname), finfo.get('primaryKey', False), finfo.get('sortKey', False))
+            for fname, finfo in schema.get('properties', {}).items()
+        ]
+        return fields or [Field('id', 'Long', 'ID', '主键ID', True)]
+    except Exception as e:
+        print(f"[ERROR][字段解析失败] schema: {schema} - {e}")
+        raise
+
+def extract_paths(openapi):
+    try:
+        return [Api(url, method, api)
+                for url, methods in openapi.get('paths', {}).items()
+                for method, api in methods.items()]
+    except Exception as e:
+        print(f"[ERROR][路径解析失败] openapi: {openapi} - {e}")
+        raise
+
+def get_query_params(apis):
+    """GET 接口的全部查询参数（不去重，保持接口顺序）"""
+    params = []
+    for api in apis:
+        if api.method.lower() == 'get':
+            for p in api.parameters:
+                name = p['name']
+                params.append(Field(name, p.get('schema', {}).get('type', 'String').capitalize(),
+                                    p.get('columnName', name), p.get('description', name)))
+    return params
+
+def get_query_fields(query_params):
+    """查询 DTO 字段：按名称去重，并补齐分页参数"""
+    query_fields = []
+    seen = set()
+    for p in query_params:
+        if p.name not in seen:
+            query_fields.append(p)
+            seen.add(p.name)
+    if 'pageNum' not in seen:
+        query_fields.append(Field('pageNum', 'Integer', 'PAGE_NUM', '页码'))
+    if 'pageSize' not in seen:
+        query_fields.append(Field('pageSize', 'Integer', 'PAGE_SIZE', '页大小'))
+    return query_fields
+
+class System(_Node):
+    """
+    keyset / count_strategy / count_cache_ttl / streaming_export / stream_fetch_size / db_dialect
+    为生成代码选项（codegen 中的 code_options）：是否另生成游标分页、分页 count 策略默认值（None 为串行 count）、
+    cached 策略的缓存秒数、是否生成流式导出、流式读取的 JDBC fetchSize 与数据库方言（见 DB_DIALECTS）
+    """
+    __slots__ = ('name', 'base_package', 'orm', 'shared_common', 'keyset', 'count_strategy', 'count_cache_ttl',
+                 'streaming_export', 'stream_fetch_size', 'db_dialect')
+
+    def __init__(self, name, base_package, orm='mybatis', shared_common=False, keyset=False, count_strategy=None,
+                 count_cache_ttl=60, streaming_export=False, stream_fetch_size=1000, db_dialect='generic'):
+        self.name = name
+        self.base_package = base_package
+        self.orm = orm
+        self.shared_common = shared_common
+        self.keyset = keyset
+        self.count_strategy = count_strategy
+        self.count_cache_ttl = count_cache_ttl
+        self.streaming_export = streaming_export
+        self.stream_fetch_size = stream_fetch_size
+        self.db_dialect = db_dialect
+
+    @property
+    def package(self):
+        return f"{self.base_package}.{self.name.lower()}"
+
+    @property
+    def jdbc_fetch_size(self):
+        """流式读取实际使用的 JDBC fetchSize：mysql 方言为 Integer.MIN_VALUE，否则为 stream_fetch_size"""
+        return MYSQL_STREAMING_FETCH_SIZE if self.db_dialect == 'mysql' else self.stream_fetch_size
+
+    @property
+    def common_package(self):
+        """
+        BaseServiceImpl / PageUtils 所在包：使用共享公共模块时为 <前缀>.codegen.common，否则在本系统包下
+        （不用 <前缀>.common，避免与公共基础库 com.hg:common-backend 的 com.hg.common 包拆包）
+        """
+        return f"{self.base_package}.codegen.common" if self.shared_common else f"{self.package}.common"
+
+    @property
+    def artifact_id(self):
+        return f"{self.name}-backend"
+
+    @property
+    def app_class_name(self):
+        return upper_camel(self.name) + "ApiApplication"
+
+    @property
+    def java_root(self):
+        return os.path.join('src', 'main', 'java', *self.base_package.split('.'), self.name.lower())
+
+class Entity(_Node):
+    __slots__ = ('model_name', 'table_name', 'fields', 'pk_field')
+
+    def __init__(self, model_name, table_name, fields):
+        self.model_name = model_name
+        self.table_name = table_name
+        self.fields = fields
+        self.pk_field = get_primary_key_field(fields)
+
+    def to_dict(self):
+        return {
+            'model_name': self.model_name, 'table_name': self.table_name,
+            'fields': [f.to_dict() for f in self.fields], 'pk_field': self.fields.index(self.pk_field),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls.__new__(cls)
+        obj.model_name = d['model_name']
+        obj.table_name = d['table_name']
+        obj.fields = [Field.from_dict(f) for f in d['fields']]
+        obj.pk_field = obj.fields[d['pk_field']]
+        return obj
+
+    @property
+    def sort_field(self):
+        """keyset 分页的排序键：schema 中标记 sortKey 的字段，未标记时为主键"""
+        for f in self.fields:
+            if f.sort_key:
+                return f
+        return self.pk_field
+
+    def template_vars(self, system):
+        pk_type = self.pk_field.java_type
+        return {
+            'system_package': system.package,
+            'model_class_name': f"{self.model_name}Model",
+            'entity_class_name': f"{self.model_name}Entity",
+            'repository_class_name': f"{self.model_name}Repository",
+            'mapper_class_name': f"{self.model_name}Mapper",
+            'table_name': self.table_name,
+            'fields': self.fields,
+            'pk_field': self.pk_field,
+            'pk_field_name': self.pk_field.name,
+            'pk_field_java_name': self.pk_field.java_name,
+            'pk_type': pk_type,
+            'pk_field_java_type': pk_type,
+            'orm': system.orm,
+            'keyset': system.keyset,
+            'cursor_fields': cursor_fields(self),
+            'streaming_export': system.streaming_export,
+            'db_dialect': system.db_dialect,
+            'stream_fetch_size': system.jdbc_fetch_size,
+        }
+
+class Page(_Node):
+    __slots__ = ('name', 'model_name', 'entity', 'apis', 'query_params', 'query_fields', 'count_strategy')
+
+    def __init__(self, name, model_name, entity, apis, count_strategy=None):
+        self.name = name
+        self.model_name = model_name
+        self.entity = entity
+        self.apis = apis
+        self.query_params = get_query_params(apis)
+        self.query_fields = get_query_fields(self.query_params)
+        self.count_strategy = count_strategy
+
+    def to_dict(self):
+        return {
+            'name': self.name, 'model_name': self.model_name, 'entity': self.entity.to_dict(),
+            'apis': [a.to_dict() for a in self.apis],
+            'query_params': [f.to_dict() for f in self.query_params],
+            'query_fields': [f.to_dict() for f in self.query_fields],
+            'count_strategy': self.count_strategy,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls.__new__(cls)
+        obj.name = d['name']
+        obj.model_name = d['model_name']
+        obj.entity = Entity.from_dict(d['entity'])
+        obj.apis = [Api.from_dict(a) for a in d['apis']]
+        obj.query_params = [Field.from_dict(f) for f in d['query_params']]
+        obj.query_fields = [Field.from_dict(f) for f in d['query_fields']]
+        obj.count_strategy = d['count_strategy']
+        return obj
+
+    def template_vars(self, system):
+        """页面级模板变量，每页只构建一次，所有页面模板共用"""
+        entity = self.entity
+        name = self.model_name
+        orm = system.orm
+        return {
+            'system_package': system.package,
+            'common_package': system.common_package,
+            'page_package': f"{system.package}.{self.name.lower()}",
+            'entity_class_name': f"{entity.model_name}Entity",
+            'entity_model_name': entity.model_name,
+            'entity_mapper_name': f"{entity.model_name}Mapper",
+            'controller_class_name': f"{name}Controller",
+            'service_class_name': f"{name}Service",
+            'dto_class_name': f"{name}DTO",
+            'query_dto_class_name': f"{name}QueryDTO",
+            'fields': entity.fields,
+            'query_fields': self.query_fields,
+            'controller_model_name': name,
+            'model_class_name': entity.model_name,
+            'mapper_instance_name': f"{lower_first(entity.model_name)}Mapper",
+            'service_impl_class_name': service_impl_class_name(name, orm),
+            'service_instance_name': lower_first(name) + ('JpaService' if orm == 'jpa' else 'MybatisService'),
+            'repository_class_name': f"{entity.model_name}Repository",
+            'apis': self.apis,
+            'app_class_name': system.app_class_name,
+            'artifact_id': system.artifact_id,
+            'page_name': self.name,
+            'query_params': self.query_params,
+            'query_params_str': ', '.join(f"{p.java_type} {p.java_name}" for p in self.query_params),
+            'query_param_names': [p.java_name for p in self.query_params],
+            'orm': orm,
+            'table_name': entity.table_name,
+            'pk_field_name': entity.pk_field.name,
+            'pk_field_java_name': entity.pk_field.java_name,
+            'pk_field_java_type': entity.pk_field.java_type,
+            'mapper_class_name': f"{entity.model_name}Mapper",
+            'keyset': system.keyset,
+            'cursor_fields': cursor_fields(entity),
+            'count_strategy': self.count_strategy,
+            'count_cache_ttl': system.count_cache_ttl,
+            'streaming_export': system.streaming_export,
+        }
+
+class PageSource(_Node):
+    """
+    未加载接口定义的页面：只有页面名与实体（第一阶段由 info / components.schemas 得到），
+    渲染时再从 path 读取文档构建 Page（见 codegen.load_page），页面文档不在规划阶段常驻内存。
+    sha256 为规划时读取到的文档内容哈希，用作增量指纹，并在加载时核对文档未被修改
+    """
+    __slots__ = ('name', 'model_name', 'entity', 'path', 'sha256', 'count_strategy')
+
+    def __init__(self, name, model_name, entity, path, sha256, count_strategy=None):
+        self.name = name
+        self.model_name = model_name
+        self.entity = entity
+        self.path = path
+        self.sha256 = sha256
+        self.count_strategy = count_strategy
+
+    def to_dict(self):
+        return {'name': self.name, 'model_name': self.model_name, 'entity': self.entity.to_dict(),
+                'path': self.path, 'sha256': self.sha256, 'count_strategy': self.count_strategy}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['name'], d['model_name'], Entity.from_dict(d['entity']), d['path'], d['sha256'],
+                   d['count_strategy'])
+
+def page_model_name(page_name):
+    name = page_model_name_from_file(page_name)
+    if not name:
+        raise Exception(f"页面名 {page_name} 未能转换为有效类名，请检查 page_model_name_from_file 逻辑")
+    return name
+
+def build_entity(page_name, openapi, index=None, file=None):
+    """
+    由 OpenAPI 文档的 info.tableName 与 components.schemas 构建实体模型（不读取 paths）；找不到 schema 时返回 None。
+    index 为系统级 SchemaIndex（跨文件 $ref、按规范化名查找），未给出时只索引本文档
+    """
+    table_name = openapi.get('info', {}).get('tableName', page_name)
+    if not table_name:
+        raise Exception(f"OpenAPI info.tableName 为空，无法生成实体类名，page_name={page_name}")
+    entity_model_name = upper_camel(table_name)
+    if not entity_model_name:
+        raise Exception(f"表名 {table_name} 未能转换为有效类名，请检查 upper_camel 逻辑")
+    file = file or f"{page_name}.json"
+    if index is None:
+        index = SchemaIndex([(file, page_name, openapi)])
+    schema = index.entity_schema(file, table_name)
+    if not schema:
+        return None
+    return Entity(entity_model_name, table_name, get_fields_from_schema(schema))
+
+def build_page(page_name, openapi, index=None, file=None, count_strategy=None):
+    """由单个 OpenAPI 文档构建页面模型；找不到 schema 时返回 None（index / file 同 build_entity）"""
+    model_name = page_model_name(page_name)
+    entity = build_entity(page_name, openapi, index, file)
+    if entity is None:
+        return None
+    return Page(page_name, model_name, entity, extract_paths(openapi), count_strategy)
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+
+DEFAULT_MAX_MB = 512
+META_SUFFIX = '.meta.json'
+OUTPUT_SUFFIX = '.openapi.json'
+
+def default_cache_dir():
+    """转换结果缓存目录：优先 AMIS_CACHE_DIR 环境变量，否则 ~/.cache/codegen/openapi"""
+    return os.environ.get('AMIS_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'codegen', 'openapi')
+
+def hash_file(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def cache_key(amis_digest, options):
+    """缓存键 = AMIS 文件内容哈希 + 转换选项（base_url、页面名、转换器版本等）"""
+    payload = json.dumps([amis_digest, options], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ConversionCache:
+    """
+    内容寻址的 AMIS→OpenAPI 转换结果缓存。
+    每个条目两份文件：<key>.openapi.json（输出原文）与 <key>.meta.json（表格统计/对象/属性）。
+    命中时刷新 mtime，prune 按 mtime 由旧到新淘汰，直到总大小不超过上限（近似 LRU）。
+    """
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + OUTPUT_SUFFIX, base + META_SUFFIX
+
+    def get(self, key):
+        """返回 (输出原文, meta)；未命中或条目损坏返回 None"""
+        out_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(out_path, encoding='utf-8') as f:
+                output = f.read()
+        except (OSError, ValueError):
+            return None
+        now = time.time()
+        for p in (out_path, meta_path):
+            try:
+                os.utime(p, (now, now))
+            except OSError:
+                pass
+        return output, meta
+
+    def put(self, key, output, meta):
+        """原子写入（先写临时文件再 rename），多进程并发写同一条目也安全"""
+        out_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        with open(out_path + suffix, 'w', encoding='utf-8') as fw:
+            fw.write(output)
+        with open(meta_path + suffix, 'w', encoding='utf-8') as fw:
+            json.dump(meta, fw, ensure_ascii=False)
+        # 先落输出再落 meta：get 以 meta 存在为准，避免读到半条目
+        os.replace(out_path + suffix, out_path)
+        os.replace(meta_path + suffix, meta_path)
+
+    def entries(self):
+        """列出条目：[(key, 总字节数, 最近使用时间, meta路径)]"""
+        result = []
+        if not os.path.isdir(self.cache_dir):
+            return result
+        for sub in sorted(os.listdir(self.cache_dir)):
+            sub_dir = os.path.join(self.cache_dir, sub)
+            if not os.path.isdir(sub_dir):
+                continue
+            for name in sorted(os.listdir(sub_dir)):
+                if not name.endswith(META_SUFFIX):
+                    continue
+                key = name[:-len(META_SUFFIX)]
+                out_path, meta_path = self._paths(key)
+                try:
+                    st = os.stat(meta_path)
+                except OSError:
+                    continue
+                size = st.st_size
+                if os.path.exists(out_path):
+                    size += os.path.getsize(out_path)
+                result.append((key, size, st.st_mtime, meta_path))
+        return result
+
+    def remove(self, key):
+        for p in self._paths(key):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+    def prune(self, max_bytes=None):
+        """按最近使用时间淘汰，返回 (删除条目数, 释放字节数)"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(e[1] for e in entries)
+        removed = freed = 0
+        for key, size, _, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= limit:
+                break
+            self.remove(key)
+            total -= size
+            removed += 1
+            freed += size
+        return removed, freed
+
+    def clear(self):
+        return self.prune(0)
+
+def main():
+    parser = argparse.ArgumentParser(description="AMIS→OpenAPI 转换结果缓存管理")
+    parser.add_argument('--cache-dir', default=None, help='缓存目录，默认 ~/.cache/codegen/openapi')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('stats', help='输出条目数与占用空间')
+    p = sub.add_parser('list', help='按最近使用时间列出条目')
+    p.add_argument('--limit', type=int, default=50, help='最多列出条目数，默认 50')
+    p = sub.add_parser('prune', help='按最近使用时间淘汰，直到不超过上限')
+    p.add_argument('--max-mb', type=float, default=DEFAULT_MAX_MB, help=f'空间上限（MB），默认 {DEFAULT_MAX_MB}')
+    sub.add_parser('clear', help='清空缓存')
+    args = parser.parse_args()
+
+    cache = ConversionCache(args.cache_dir)
+    if args.command == 'stats':
+        entries = cache.entries()
+        total = sum(e[1] for e in entries)
+        print(f"缓存目录: {cache.cache_dir}")
+        print(f"条目数: {len(entries)}  占用: {total / 1024 / 1024:.2f} MB")
+    elif args.command == 'list':
+        entries = sorted(cache.entries(), key=lambda e: -e[2])[:args.limit]
+        for key, size, mtime, meta_path in entries:
+            try:
+                with open(meta_path, encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {}
+            tables = ','.join(t['name'] for t in meta.get('tables', []))
+            used = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mtime))
+            print(f"{key[:16]}  {size:>9}B  {used}  {meta.get('page_name', '?')}  表: {tables}")
+    elif args.command == 'prune':
+        removed, freed = cache.prune(int(args.max_mb * 1024 * 1024))
+        print(f"✅ 已淘汰 {removed} 个条目，释放 {freed / 1024 / 1024:.2f} MB")
+    elif args.command == 'clear':
+        removed, _ = cache.clear()
+        print(f"✅ 已清空转换缓存（{removed} 个条目）: {cache.cache_dir}")
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound, TemplateError
+from jinja2 import TemplateNotFound, TemplateError
+from template_cache import create_template_env
 import re
 import sys
 import argparse
@@ -8,6 +9,10 @@ DEFAULT_SPRING_BOOT_VERSION = "3.2.6"
 DEFAULT_SPRING_CLOUD_VERSION = "2023.0.2"
 DEFAULT_SPRING_CLOUD_ALIBABA_VERSION = "2022.0.0.0"
 DEFAULT_JAVA_VERSION = "17"
+DEFAULT_AGGREGATOR_ARTIFACT_ID = "backend-parent"
+DEFAULT_COMMON_ARTIFACT_ID = "backend-common"
+# 公共基础库（PageResult / PageRequestDTO 等），各系统与共享公共模块都依赖它
+COMMON_BACKEND_DEPENDENCY = {"groupId": "com.hg", "artifactId": "common-backend", "version": "1.0.0"}
 
 def remove_blank_lines(text: str) -> str:
     """去除多余空行，便于输出美观的XML"""
@@ -31,7 +36,7 @@ def get_orm_dependencies(orm: str):
         {"groupId": "org.springframework.boot", "artifactId": "spring-boot-starter-validation"},
         {"groupId": "com.h2database", "artifactId": "h2", "scope": "runtime"},
         {"groupId": "com.mysql", "artifactId": "mysql-connector-j", "version": "8.3.0"},
-        {"groupId": "com.hg", "artifactId": "common-backend", "version": "1.0.0"}
+        dict(COMMON_BACKEND_DEPENDENCY)
     ]
     if orm == 'mybatis':
         base.append({"groupId": "org.mybatis.spring.boot", "artifactId": "mybatis-spring-boot-starter", "version": "3.0.3"})
@@ -40,6 +45,142 @@ def get_orm_dependencies(orm: str):
         # base.append({"groupId": "jakarta.persistence", "artifactId": "jakarta.persistence-api", "scope": "provided"})
     return base
 
+# 默认插件（可通过参数扩展）
+DEFAULT_PLUGINS = [
+    {
+        "groupId": "org.apache.maven.plugins",
+        "artifactId": "maven-compiler-plugin",
+        "version": "3.11.0",
+        "configuration": "<release>17</release>"
+    },
+    {
+        "groupId": "org.springframework.boot",
+        "artifactId": "spring-boot-maven-plugin"
+    }
+]
+# 默认仓库（可通过参数扩展）
+DEFAULT_REPOSITORIES = [
+    {"id": "nexus-ods", "url": "http://45.153.131.127:8099/repository/maven-public/"}
+]
+
+def default_pom_config(orm: str, user_deps=None):
+    """命令行与 pipeline 共用的默认依赖/插件/仓库组装"""
+    return {
+        "dependencies": merge_dependencies(user_deps, get_orm_dependencies(orm)),
+        "plugins": DEFAULT_PLUGINS,
+        "repositories": DEFAULT_REPOSITORIES,
+    }
+
+def aggregator_pom_config(orms, user_deps=None):
+    """
+    聚合父 POM 的共享配置：各 ORM 基础依赖合并去重后，显式指定版本的依赖进入 dependencyManagement
+    （其余由 spring-boot-starter-parent 管理），插件版本与配置进入 pluginManagement
+    """
+    deps = []
+    for orm in orms:
+        deps = merge_dependencies(get_orm_dependencies(orm), deps)
+    deps = merge_dependencies(user_deps, deps)
+    return {
+        "managed_dependencies": [
+            {"groupId": d["groupId"], "artifactId": d["artifactId"], "version": d["version"]} for d in deps if d.get("version")
+        ],
+        "plugins": DEFAULT_PLUGINS,
+        "repositories": DEFAULT_REPOSITORIES,
+    }
+
+def module_pom_config(orm: str, user_deps=None):
+    """聚合模式下的子模块 POM：依赖版本、插件配置、仓库均继承自父 POM"""
+    return {
+        "dependencies": [{k: v for k, v in d.items() if k != "version"}
+                         for d in merge_dependencies(user_deps, get_orm_dependencies(orm))],
+        "plugins": [{"groupId": p["groupId"], "artifactId": p["artifactId"]} for p in DEFAULT_PLUGINS],
+        "repositories": [],
+    }
+
+def common_pom_config(orm: str, module=False, streaming_export=False):
+    """
+    共享公共模块（BaseServiceImpl / PageUtils）的 POM：普通 jar，不打 Spring Boot 可执行包，
+    只依赖公共基础库与 ORM 所需的 Spring Data（流式导出时另需 Jackson）；module=True 时版本与插件配置继承聚合父 POM
+    """
+    deps = [dict(COMMON_BACKEND_DEPENDENCY)]
+    if orm == 'jpa':
+        deps.append({"groupId": "org.springframework.boot", "artifactId": "spring-boot-starter-data-jpa"})
+    if streaming_export:
+        deps.append({"groupId": "com.fasterxml.jackson.core", "artifactId": "jackson-databind"})
+    plugins = [p for p in DEFAULT_PLUGINS if p["artifactId"] == "maven-compiler-plugin"]
+    if module:
+        return {
+            "dependencies": [{k: v for k, v in d.items() if k != "version"} for d in deps],
+            "plugins": [{"groupId": p["groupId"], "artifactId": p["artifactId"]} for p in plugins],
+            "repositories": [],
+        }
+    return {"dependencies": deps, "plugins": plugins, "repositories": DEFAULT_REPOSITORIES}
+
+def render_aggregator_pom(
+    template,
+    group_id: str,
+    version: str,
+    modules,
+    artifact_id: str = DEFAULT_AGGREGATOR_ARTIFACT_ID,
+    java_version: str = DEFAULT_JAVA_VERSION,
+    spring_boot_version: str = DEFAULT_SPRING_BOOT_VERSION,
+    spring_cloud_version: str = DEFAULT_SPRING_CLOUD_VERSION,
+    spring_cloud_alibaba_version: str = DEFAULT_SPRING_CLOUD_ALIBABA_VERSION,
+    managed_dependencies=None,
+    plugins=None,
+    repositories=None,
+):
+    """渲染聚合父 pom.xml 文本（modules 为各子工程目录名），渲染失败抛出 TemplateError"""
+    params = {
+        "group_id": group_id,
+        "artifact_id": artifact_id,
+        "version": version,
+        "modules": modules,
+        "java_version": java_version,
+        "spring_boot_version": spring_boot_version,
+        "spring_cloud_version": spring_cloud_version,
+        "spring_cloud_alibaba_version": spring_cloud_alibaba_version,
+        "managed_dependencies": managed_dependencies or [],
+        "plugins": plugins or [],
+        "repositories": repositories or [],
+    }
+    return remove_blank_lines(template.render(**params))
+
+def render_pom(
+    template,
+    system_name: str,
+    group_id: str,
+    version: str,
+    artifact_id: str = None,
+    java_version: str = DEFAULT_JAVA_VERSION,
+    spring_boot_version: str = DEFAULT_SPRING_BOOT_VERSION,
+    spring_cloud_version: str = DEFAULT_SPRING_CLOUD_VERSION,
+    spring_cloud_alibaba_version: str = DEFAULT_SPRING_CLOUD_ALIBABA_VERSION,
+    dependencies=None,
+    plugins=None,
+    repositories=None,
+    parent=None,
+):
+    """
+    渲染 pom.xml 文本（不写盘），渲染失败抛出 TemplateError。
+    parent 为 {'group_id', 'artifact_id', 'version'} 时作为聚合工程的子模块，继承父 POM 的版本与插件管理
+    """
+    params = {
+        "group_id": group_id,
+        "artifact_id": artifact_id or f"{system_name}-backend",
+        "system_name": system_name,
+        "version": version,
+        "java_version": java_version,
+        "spring_boot_version": spring_boot_version,
+        "spring_cloud_version": spring_cloud_version,
+        "spring_cloud_alibaba_version": spring_cloud_alibaba_version,
+        "dependencies": dependencies,
+        "plugins": plugins or [],
+        "repositories": repositories or [],
+        "parent": parent,
+    }
+    return remove_blank_lines(template.render(**params))
+
 def generate_pom_with_template(
     output_base_dir: Path,
     system_name: str,
@@ -54,6 +195,8 @@ def generate_pom_with_template(
     dependencies=None,
     plugins=None,
     repositories=None,
+    template_cache_dir: str = None,
+    use_template_cache: bool = True,
 ):
     """
     生成 POM 文件主方法
@@ -69,37 +212,29 @@ def generate_pom_with_template(
         output_dir.mkdir(parents=True, exist_ok=True)
         output_path = output_dir / "pom.xml"
 
-        # 初始化 Jinja2 模板环境
-        env = Environment(loader=FileSystemLoader(str(template_path.parent)), trim_blocks=True, lstrip_blocks=True)
+        # 初始化 Jinja2 模板环境（与 codegen.py 共用磁盘编译缓存）
+        env = create_template_env(str(template_path.parent), cache_dir=template_cache_dir, use_cache=use_template_cache)
         try:
             template = env.get_template(template_path.name)
         except TemplateNotFound:
             print(f"[ERROR] 未找到模板文件: {template_path.name}（路径: {template_path.parent}）")
             sys.exit(1)
 
-        # 模板渲染参数准备
-        params = {
-            "group_id": group_id,
-            "artifact_id": artifact_id,
-            "system_name": system_name,
-            "version": version,
-            "java_version": java_version,
-            "spring_boot_version": spring_boot_version,
-            "spring_cloud_version": spring_cloud_version,
-            "spring_cloud_alibaba_version": spring_cloud_alibaba_version,
-            "dependencies": dependencies,
-            "plugins": plugins or [],
-            "repositories": repositories or [],
-        }
-
         try:
-            pom_xml = template.render(**params)
+            pom_xml = render_pom(
+                template, system_name, group_id, version, artifact_id,
+                java_version=java_version,
+                spring_boot_version=spring_boot_version,
+                spring_cloud_version=spring_cloud_version,
+                spring_cloud_alibaba_version=spring_cloud_alibaba_version,
+                dependencies=dependencies, plugins=plugins, repositories=repositories,
+            )
         except TemplateError as e:
             print(f"[ERROR] 模板渲染出错: {e}")
             sys.exit(1)
 
         try:
-            output_path.write_text(remove_blank_lines(pom_xml), encoding='utf-8')
+            output_path.write_text(pom_xml, encoding='utf-8')
             print(f"✅ pom.xml 已写入: {output_path.resolve()}")
         except Exception as e:
             print(f"[ERROR] 写入文件失败: {output_path.resolve()} - {e}")
@@ -118,33 +253,14 @@ if __name__ == "__main__":
     parser.add_argument('--version', default="1.0.0", help='版本')
     parser.add_argument('--orm', default='mybatis', choices=['mybatis', 'jpa'], help='ORM模式[jpa or mybatis]（默认mybatis）')
     parser.add_argument('--artifact-id', default=None, help='自定义 artifactId，可选')
+    parser.add_argument('--template-cache-dir', default=None, help='模板编译缓存目录，默认 ~/.cache/codegen/jinja2')
+    parser.add_argument('--no-template-cache', action='store_true', help='关闭模板编译缓存')
     # 可选：未来可扩展支持外部 dependencies/plugins/repositories 参数
 
     args = parser.parse_args()
 
-    # 动态依赖组装
-    base_deps = get_orm_dependencies(args.orm)
-    # 用户自定义依赖：可扩展为从文件或参数读取
-    user_deps = []  # 目前无，后续可扩展
-    dependencies = merge_dependencies(user_deps, base_deps)
-
-    # 默认插件（可通过参数扩展）
-    plugins = [
-        {
-            "groupId": "org.apache.maven.plugins",
-            "artifactId": "maven-compiler-plugin",
-            "version": "3.11.0",
-            "configuration": "<release>17</release>"
-        },
-        {
-            "groupId": "org.springframework.boot",
-            "artifactId": "spring-boot-maven-plugin"
-        }
-    ]
-    # 默认仓库（可通过参数扩展）
-    repositories = [
-        {"id": "nexus-ods", "url": "http://45.153.131.127:8099/repository/maven-public/"}
-    ]
+    # 动态依赖组装；用户自定义依赖可扩展为从文件或参数读取
+    pom_config = default_pom_config(args.orm)
 
     generate_pom_with_template(
         output_base_dir=Path(args.output_base_dir),
@@ -153,7 +269,7 @@ if __name__ == "__main__":
         group_id=args.group_id,
         version=args.version,
         artifact_id=args.artifact_id,
-        dependencies=dependencies,
-        plugins=plugins,
-        repositories=repositories,
+        **pom_config,
+        template_cache_dir=args.template_cache_dir,
+        use_template_cache=not args.no_template_cache,
     )
@@ -0,0 +1,250 @@
+"""
+OpenAPI 输入校验：生成前用 openapi-spec-validator 校验全部文档，有错误时在任何输出写盘前终止。
+校验结果按 (文档内容哈希, 校验器版本) 缓存，未变化的文档不重复校验；未命中的文档较多时提交到进程池并行校验。
+本工具约定的写法（info.tableName / countStrategy、schema / 参数上的 javaType / columnName / primaryKey / sortKey、
+paths 键为带 ${base_url} 的完整 URL、只含 components 的共享 schema 文件）在校验前规整为标准形式，不视为错误。
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from urllib.parse import urlsplit
+from concurrent.futures import ProcessPoolExecutor
+from profiler import NULL_PROFILER
+
+RULES_VERSION = 1
+MAX_ERRORS = 20
+MAX_MESSAGE = 300
+# 本工具约定的字段扩展，校验时视为 x- 扩展
+CONVENTION_KEYS = ('javaType', 'columnName', 'primaryKey', 'sortKey')
+# 本工具约定的 info 字段
+INFO_CONVENTION_KEYS = ('tableName', 'countStrategy')
+# 未命中缓存的文档少于该数量时在当前进程串行校验（进程池启动与校验器导入的开销大于收益）
+MIN_PARALLEL = 32
+
+def default_cache_dir():
+    """校验结果缓存目录：优先 CODEGEN_VALIDATE_CACHE_DIR 环境变量，否则 ~/.cache/codegen/validate"""
+    return os.environ.get('CODEGEN_VALIDATE_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'codegen', 'validate')
+
+def validator_version():
+    try:
+        from importlib.metadata import version
+        return version('openapi-spec-validator')
+    except Exception:
+        return 'unknown'
+
+def _with_extensions(obj, external_refs):
+    if isinstance(obj, dict):
+        view = {}
+        for k, v in obj.items():
+            if k in CONVENTION_KEYS:
+                k = f"x-{k}"
+            elif k == '$ref' and not external_refs and isinstance(v, str) and not v.startswith('#'):
+                k = 'x-ref'
+            view[k] = _with_extensions(v, external_refs)
+        return view
+    if isinstance(obj, list):
+        return [_with_extensions(v, external_refs) for v in obj]
+    return obj
+
+def spec_view(openapi, external_refs=True):
+    """
+    校验用视图（不修改原文档）：info.tableName / countStrategy 与 javaType / columnName / primaryKey / sortKey 视为 x- 扩展字段，
+    完整 URL 的 paths 键取路径部分，共享 schema 文件补齐 info / paths。
+    external_refs=False（内存中的文档，无法按路径解析其他文件）时跨文件 $ref 不解析，
+    被引用的文档本身同样会被校验，引用目标是否存在由生成阶段的 SchemaIndex 检查
+    """
+    view = _with_extensions(openapi, external_refs)
+    info = dict(view.get('info') or {})
+    for key in INFO_CONVENTION_KEYS:
+        if key in info:
+            info[f"x-{key}"] = info.pop(key)
+    if 'paths' not in view:
+        info.setdefault('title', 'components')
+        info.setdefault('version', '0')
+        view['paths'] = {}
+    view['info'] = info
+    paths = {}
+    for url, item in (view.get('paths') or {}).items():
+        path = url if url.startswith('/') else (urlsplit(url).path or '/')
+        if isinstance(item, dict) and isinstance(paths.get(path), dict):
+            paths[path] = dict(paths[path], **item)
+        else:
+            paths[path] = item
+    view['paths'] = paths
+    return view
+
+def validate_document(openapi, base_uri=''):
+    """校验单个文档，返回错误信息列表（空列表表示通过，最多 MAX_ERRORS 条）；base_uri 为文档的 file URI，用于解析跨文件 $ref"""
+    from openapi_spec_validator import OpenAPIV30SpecValidator, OpenAPIV31SpecValidator
+    if not isinstance(openapi, dict):
+        return ["文档顶层必须是 JSON 对象"]
+    version = str(openapi.get('openapi', ''))
+    validator_cls = {'3.0': OpenAPIV30SpecValidator, '3.1': OpenAPIV31SpecValidator}.get(version[:3])
+    if validator_cls is None:
+        return [f"不支持的 openapi 版本: {version or '缺失'}（需要 3.0.x / 3.1.x）"]
+    errors = []
+    try:
+        for error in validator_cls(spec_view(openapi, bool(base_uri)), base_uri=base_uri).iter_errors():
+            location = '/'.join(str(p) for p in error.absolute_path) or '<root>'
+            message = error.message if len(error.message) <= MAX_MESSAGE else error.message[:MAX_MESSAGE] + '...'
+            errors.append(f"{location}: {message}")
+            if len(errors) >= MAX_ERRORS:
+                errors.append("...（错误过多，已截断）")
+                break
+    except Exception as e:
+        errors.append(f"校验失败: {e}")
+    return errors
+
+def validate_source(source):
+    """source 为文件路径或已解析的文档，返回错误信息列表"""
+    if not isinstance(source, str):
+        return validate_document(source)
+    try:
+        with open(source, 'rb') as f:
+            openapi = json.loads(f.read())
+    except (OSError, ValueError) as e:
+        return [f"JSON 读取失败: {e}"]
+    return validate_document(openapi, Path(source).resolve().as_uri())
+
+def _has_external_ref(data):
+    return b'.json#' in data
+
+def source_key(source, salt):
+    """缓存键：文件内容（或规范化 JSON）哈希 + 校验规则/校验器版本；引用其他文件的文档同时计入同目录 JSON 的内容"""
+    h = hashlib.sha256(salt.encode('utf-8'))
+    if not isinstance(source, str):
+        h.update(json.dumps(source, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+        return h.hexdigest()
+    with open(source, 'rb') as f:
+        data = f.read()
+    h.update(data)
+    if _has_external_ref(data):
+        folder = os.path.dirname(source)
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            if name.endswith('.json') and path != source:
+                with open(path, 'rb') as f:
+                    h.update(name.encode('utf-8') + b'\0' + hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+class ValidationCache:
+    """<key[:2]>/<key>.json 保存该文档的错误列表；写入先写临时文件再 rename，多进程并发安全"""
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                return json.load(f)['errors']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, errors):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as fw:
+                json.dump({'errors': errors}, fw, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[warn] 校验结果缓存写入失败: {path} - {e}")
+
+def validate_sources(sources, executor=None, jobs=1, cache=None, profiler=NULL_PROFILER):
+    """
+    校验 [(标签, 文件路径或文档)]，返回 [(标签, [错误])]（只含未通过的，按输入顺序）。
+    cache 为 ValidationCache 时按内容哈希复用结果；内容相同的文档（如各系统复制的共享 schema 文件）只校验一次；
+    未命中的文档达到 MIN_PARALLEL 个时，
+    提交到 executor（未给出且 jobs > 1 时临时创建进程池）并行校验。
+    """
+    salt = f"{RULES_VERSION}|{validator_version()}"
+    results = [None] * len(sources)
+    keys = [None] * len(sources)
+    pending = []
+    same = {}
+    with profiler.span('validate', 'cache'):
+        for i, (label, source) in enumerate(sources):
+            try:
+                keys[i] = source_key(source, salt)
+            except OSError as e:
+                results[i] = [f"文件读取失败: {e}"]
+                continue
+            if keys[i] in same:
+                same[keys[i]].append(i)
+                continue
+            cached = cache.get(keys[i]) if cache is not None else None
+            if cached is None:
+                pending.append(i)
+                same[keys[i]] = [i]
+            else:
+                results[i] = cached
+    if pending:
+        with profiler.span('validate', 'spec') as sp:
+            todo = [sources[i][1] for i in pending]
+            workers = jobs if jobs > 0 else (os.cpu_count() or 1)
+            if len(todo) < MIN_PARALLEL or (executor is None and workers <= 1):
+                checked = [validate_source(s) for s in todo]
+            elif executor is not None:
+                checked = list(executor.map(validate_source, todo, chunksize=max(1, len(todo) // (workers * 4))))
+            else:
+                with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+                    checked = list(pool.map(validate_source, todo, chunksize=max(1, len(todo) // (workers * 4))))
+            if profiler.enabled:
+                sp.bytes = len(todo)
+        for i, errors in zip(pending, checked):
+            for j in same[keys[i]]:
+                results[j] = errors
+            if cache is not None:
+                cache.put(keys[i], errors)
+    merged = sum(len(indexes) - 1 for indexes in same.values())
+    dedup = f"（内容相同合并 {merged} 个）" if merged else ''
+    print(f"[校验] OpenAPI 文档 {len(sources)} 个：缓存命中 {len(sources) - len(pending) - merged}，"
+          f"本次校验 {len(pending)}{dedup}")
+    return [(label, errors) for (label, _), errors in zip(sources, results) if errors]
+
+def print_validation_errors(failed, max_files=50):
+    print(f"[ERROR][OpenAPI 校验] {len(failed)} 个文档未通过校验：")
+    for label, errors in failed[:max_files]:
+        print(f"  - {label}")
+        for error in errors:
+            print(f"      {error}")
+    if len(failed) > max_files:
+        print(f"  ... 另有 {len(failed) - max_files} 个文档未通过")
+
+def collect_sources(openapi_dir):
+    """<openapi-dir>/<系统>/<页面>.json → [(标签, 文件路径)]，按名称排序"""
+    sources = []
+    for system_name in sorted(os.listdir(openapi_dir)):
+        sys_dir = os.path.join(openapi_dir, system_name)
+        if os.path.isdir(sys_dir):
+            for file in sorted(os.listdir(sys_dir)):
+                if file.endswith('.json'):
+                    sources.append((f"{system_name}/{file}", os.path.join(sys_dir, file)))
+    return sources
+
+def main():
+    parser = argparse.ArgumentParser(description="并行校验 OpenAPI JSON（<openapi-dir>/<系统>/<页面>.json），结果按文件内容哈希缓存")
+    parser.add_argument('--openapi-dir', default='./docs/openapi_json', help='OpenAPI JSON 根目录')
+    parser.add_argument('--jobs', type=int, default=0, help='并行进程数，默认 0 表示使用全部 CPU 核')
+    parser.add_argument('--cache-dir', default=None, help='校验结果缓存目录，默认 ~/.cache/codegen/validate')
+    parser.add_argument('--no-cache', action='store_true', help='不读写校验结果缓存')
+    args = parser.parse_args()
+    openapi_dir = os.path.abspath(args.openapi_dir)
+    if not os.path.isdir(openapi_dir):
+        print(f"[FATAL] openapi-dir 不存在或不是目录: {openapi_dir}")
+        sys.exit(1)
+    cache = None if args.no_cache else ValidationCache(args.cache_dir)
+    failed = validate_sources(collect_sources(openapi_dir), jobs=args.jobs, cache=cache)
+    if failed:
+        print_validation_errors(failed)
+        sys.exit(1)
+    print("✅ 全部 OpenAPI 文档校验通过")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import os
+import difflib
+import hashlib
+from profiler import NULL_PROFILER
+
+def _read_bytes(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+class VirtualOutput:
+    """
+    内存中的输出文件系统：渲染结果先登记在这里，flush() 时批量落盘。
+    与磁盘内容一致的文件不重写（mtime 不变）；需要写出的文件按目录归并，每个目录只 makedirs 一次。
+    文件按 UTF-8 字节原样写出（不做换行符转换），与 zip 包内容一致。
+    """
+    def __init__(self):
+        self.files = {}
+
+    def write(self, path, code, unit=None):
+        """登记一个输出文件；同一路径以后登记的内容为准，各登记单元都会记入增量清单"""
+        old = self.files.get(path)
+        units = old[1] + [unit] if old is not None else [unit]
+        self.files[path] = (code.encode('utf-8'), units)
+
+    def __len__(self):
+        return len(self.files)
+
+    def compare(self, profiler=NULL_PROFILER):
+        """与磁盘比较，返回 [(路径, 新内容, 磁盘原内容或 None)]，只包含需要写出的文件，按路径排序"""
+        changed = []
+        with profiler.span('read_existing'):
+            for path in sorted(self.files):
+                data = self.files[path][0]
+                old = _read_bytes(path)
+                if old != data:
+                    changed.append((path, data, old))
+        return changed
+
+    def flush(self, manifest=None, profiler=NULL_PROFILER):
+        """批量写盘并记录到增量清单，返回 (写入文件数, 内容未变跳过数)"""
+        changed = self.compare(profiler)
+        with profiler.span('mkdir'):
+            for folder in sorted({os.path.dirname(path) for path, _, _ in changed}):
+                os.makedirs(folder, exist_ok=True)
+        with profiler.span('write') as sp:
+            for path, data, _ in changed:
+                with open(path, 'wb') as fw:
+                    fw.write(data)
+            if profiler.enabled:
+                sp.bytes = sum(len(data) for _, data, _ in changed)
+        if manifest is not None:
+            with profiler.span('hash'):
+                for path in sorted(self.files):
+                    data, units = self.files[path]
+                    digest = hashlib.sha256(data).hexdigest()
+                    mtime_ns = os.stat(path).st_mtime_ns
+                    for unit in units:
+                        manifest.record(unit, path, digest, len(data), mtime_ns)
+        return len(changed), len(self.files) - len(changed)
+
+    def diff(self, base_dir, profiler=NULL_PROFILER):
+        """dry-run：不写盘，返回 (新增数, 修改数, 未变数, unified diff 文本)"""
+        changed = self.compare(profiler)
+        added = modified = 0
+        chunks = []
+        for path, data, old in changed:
+            rel = os.path.relpath(path, base_dir).replace(os.sep, '/')
+            if old is None:
+                added += 1
+            else:
+                modified += 1
+            chunks.extend(difflib.unified_diff(
+                old.decode('utf-8', errors='replace').splitlines(keepends=True) if old is not None else [],
+                data.decode('utf-8').splitlines(keepends=True),
+                fromfile=f"a/{rel}" if old is not None else '/dev/null', tofile=f"b/{rel}",
+            ))
+            if chunks and not chunks[-1].endswith('\n'):
+                chunks[-1] += '\n\\ No newline at end of file\n'
+        return added, modified, len(self.files) - len(changed), ''.join(chunks)
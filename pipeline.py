@@ -0,0 +1,235 @@
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from amis_to_openapi import convert_amis, summarize_conversion, split_openapi_docs, ConversionReport
+from conversion_cache import ConversionCache, DEFAULT_MAX_MB
+from codegen import run_codegen, WatchSession, pom_options
+from codegen_ir import COUNT_STRATEGIES, DB_DIALECTS
+from generate_pom import DEFAULT_AGGREGATOR_ARTIFACT_ID, DEFAULT_COMMON_ARTIFACT_ID
+from profiler import Profiler, NULL_PROFILER
+from watch import DirWatcher, watch_loop
+
+def list_amis_systems(amis_dir, default_system):
+    """
+    按名称排序列出 [(系统名, [AMIS 文件])]：子目录视为系统目录，
+    amis-dir 根下的 json 归入 default_system。
+    """
+    systems = []
+    root_files = []
+    for entry in sorted(os.listdir(amis_dir)):
+        path = os.path.join(amis_dir, entry)
+        if os.path.isdir(path):
+            files = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith('.json')]
+            if files:
+                systems.append((entry, files))
+        elif entry.endswith('.json'):
+            root_files.append(path)
+    if root_files:
+        systems.insert(0, (default_system, root_files))
+    return systems
+
+def _convert_page(job):
+    """进程池任务：AMIS → OpenAPI（内存），按需写出中间 OpenAPI 文件"""
+    amis_file, openapi_file, stream, base_url, cache_dir, profile_root = job
+    cache = ConversionCache(cache_dir) if cache_dir else None
+    profiler = Profiler(profile_root) if profile_root else NULL_PROFILER
+    result = {'amis_file': amis_file, 'out_file': openapi_file, 'openapi': None, 'error': None}
+    try:
+        openapi, output, stat, obj_collector, hit = convert_amis(
+            amis_file, stream, base_url, cache, openapi_file is not None, profiler)
+        if openapi_file is not None:
+            with profiler.span('write'):
+                os.makedirs(os.path.dirname(openapi_file), exist_ok=True)
+                with open(openapi_file, 'w', encoding='utf-8') as fw:
+                    fw.write(output)
+    except Exception as e:
+        result['error'] = str(e)
+        result['profile'] = profiler.drain()
+        return result
+    result['openapi'] = openapi
+    result['profile'] = profiler.drain()
+    return summarize_conversion(result, stat, obj_collector, hit)
+
+def convert_systems(systems, openapi_out=None, stream=False, base_url="http://your.base.url", cache_dir=None, jobs=1,
+                    profiler=NULL_PROFILER):
+    """
+    第一阶段：全部 AMIS 页面转换为内存中的 OpenAPI 文档。
+    返回 ([(系统名, [(文件名, 页面名, openapi)])], ConversionReport)，顺序与输入一致；
+    多表 AMIS 页面按表展开为多份文档（见 split_openapi_docs）。
+    """
+    job_args = []
+    owners = []
+    for system_name, files in systems:
+        for amis_file in files:
+            fname = os.path.basename(amis_file)
+            openapi_file = os.path.join(openapi_out, system_name, fname) if openapi_out else None
+            job_args.append((amis_file, openapi_file, stream, base_url, cache_dir,
+                             profiler.root if profiler.enabled else None))
+            owners.append(system_name)
+    report = ConversionReport()
+    docs = {system_name: [] for system_name, _ in systems}
+    if jobs > 1 and len(job_args) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_convert_page, job_args, chunksize=max(1, len(job_args) // (jobs * 4))))
+    else:
+        results = [_convert_page(job) for job in job_args]
+    for system_name, result in zip(owners, results):
+        report.add(result)
+        profiler.merge(result['profile'])
+        amis_file = result['amis_file']
+        if result['error'] is not None:
+            print(f"[ERROR] 文件 {amis_file} 处理失败: {result['error']}")
+            continue
+        fname = os.path.basename(amis_file)
+        docs[system_name].extend(split_openapi_docs(fname, os.path.splitext(fname)[0], result['openapi']))
+    return [(system_name, docs[system_name]) for system_name, _ in systems], report
+
+def watch_amis_dir(amis_dir, default_system, templates_dir, system_docs, session, openapi_out=None, stream=False,
+                   base_url="http://your.base.url", cache_dir=None, interval=0.3):
+    """
+    监听 amis-dir 与 templates-dir：AMIS 页面变化时只在进程内重新转换该页面，
+    再由常驻会话增量生成所属系统；模板变化时只重渲用到该模板的单元。
+    """
+    for system_name, docs in system_docs:
+        for doc in docs:
+            session.set_openapi(system_name, *doc)
+    session.regenerate()
+
+    def on_change(paths):
+        affected = set()
+        for path in paths:
+            if path.startswith(templates_dir + os.sep):
+                session.templates_changed()
+                affected = None
+                continue
+            parts = os.path.relpath(path, amis_dir).split(os.sep)
+            if len(parts) > 2 or not path.endswith('.json'):
+                continue
+            system_name = parts[0] if len(parts) == 2 else default_system
+            fname = parts[-1]
+            if not os.path.exists(path):
+                session.remove_doc(system_name, fname)
+            else:
+                openapi_file = os.path.join(openapi_out, system_name, fname) if openapi_out else None
+                result = _convert_page((path, openapi_file, stream, base_url, cache_dir, None))
+                if result['error'] is not None:
+                    print(f"[ERROR] 文件 {path} 处理失败，保留上一次的转换结果: {result['error']}")
+                    continue
+                session.replace_docs(system_name, fname,
+                                     split_openapi_docs(fname, os.path.splitext(fname)[0], result['openapi']))
+            if affected is not None:
+                affected.add(system_name)
+        session.regenerate(affected)
+
+    try:
+        watch_loop(DirWatcher([amis_dir, templates_dir]), on_change, interval)
+    finally:
+        session.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="AMIS JSON → OpenAPI → Java 工程（含 pom.xml）一体化生成，中间结果全程在内存中传递")
+    parser.add_argument('--amis-dir', required=True, help='AMIS 根目录：每个子目录为一个系统，根目录下的 json 归入 --system-name')
+    parser.add_argument('--system-name', default=None, help='根目录下 json 所属系统名，默认取 amis-dir 目录名')
+    parser.add_argument('--output-dir', default='./output', help='输出目录')
+    parser.add_argument('--openapi-out', default=None, help='可选：同时写出中间 OpenAPI JSON 的目录（<目录>/<系统>/<页面>.json）')
+    parser.add_argument('--package-prefix', default='com.hg', help='Java package 前缀')
+    parser.add_argument('--templates-dir', default='./templates', help='模板目录')
+    parser.add_argument('--orm', default='mybatis', choices=['mybatis', 'jpa'], help='ORM类型[jpa or mybatis]')
+    parser.add_argument('--group-id', default=None, help='pom.xml groupId，默认同 --package-prefix')
+    parser.add_argument('--version', default='1.0.0', help='pom.xml 版本')
+    parser.add_argument('--aggregator', action='store_true', help='同时在 output-dir 下生成聚合父 pom.xml，各系统作为子模块（mvn -T 并行构建）')
+    parser.add_argument('--aggregator-artifact-id', default=DEFAULT_AGGREGATOR_ARTIFACT_ID, help=f'聚合父 POM 的 artifactId，默认 {DEFAULT_AGGREGATOR_ARTIFACT_ID}')
+    parser.add_argument('--shared-common', action='store_true', help='BaseServiceImpl / PageUtils 只在共享公共模块中生成一份（<前缀>.codegen.common 包），各系统 pom 依赖它')
+    parser.add_argument('--common-artifact-id', default=DEFAULT_COMMON_ARTIFACT_ID, help=f'共享公共模块的 artifactId（输出目录名），默认 {DEFAULT_COMMON_ARTIFACT_ID}')
+    parser.add_argument('--no-validate', action='store_true', help='跳过生成前的 OpenAPI 文档校验（openapi-spec-validator）')
+    parser.add_argument('--validate-cache-dir', default=None, help='OpenAPI 校验结果缓存目录，默认 ~/.cache/codegen/validate')
+    parser.add_argument('--keyset-pagination', action='store_true', help='在 offset 分页之外另生成游标（keyset）分页接口 /page/seek（after/before 游标，按主键或 sortKey 字段）')
+    parser.add_argument('--count-strategy', default=None, choices=COUNT_STRATEGIES, help='分页 count 策略：exact 与分页查询并发 count，cached 按查询条件缓存 count，estimate 无条件时取表统计行数，none 不 count（多取一条判断 hasNext）；默认不启用（串行 count），页面可用 info.countStrategy 覆盖')
+    parser.add_argument('--count-cache-ttl', type=int, default=60, help='count 策略 cached 的缓存秒数，默认 60')
+    parser.add_argument('--streaming-export', action='store_true', help='生成流式读取（MyBatis Cursor / JPA Stream）与 GET /export?format=ndjson|csv 导出接口，内存占用与数据量无关')
+    parser.add_argument('--stream-fetch-size', type=int, default=1000, help='流式读取每次从数据库取的行数（JDBC fetchSize），默认 1000；--db-dialect mysql 时不使用')
+    parser.add_argument('--db-dialect', default='generic', choices=DB_DIALECTS, help='流式读取的数据库方言：generic 按 --stream-fetch-size 分批读取（H2 / PostgreSQL 等），mysql 使用 Connector/J 逐行流式（fetchSize=Integer.MIN_VALUE）')
+    parser.add_argument('--base-url', default='http://your.base.url', help='替换 API 地址中 ${base_url} 的值')
+    parser.add_argument('--stream', action='store_true', help='流式解析超大 AMIS 文件')
+    parser.add_argument('--cache-dir', default=None, help='转换结果缓存目录，默认 ~/.cache/codegen/openapi')
+    parser.add_argument('--no-cache', action='store_true', help='关闭转换结果缓存')
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_MB, help=f'转换缓存空间上限（MB），默认 {DEFAULT_MAX_MB}')
+    parser.add_argument('--zip', action='store_true', help='输出主工程 zip 包')
+    parser.add_argument('--zip-only', action='store_true', help='渲染结果直接写入 zip 包，不输出工程目录（隐含 --force）')
+    parser.add_argument('--zip-level', type=int, default=6, choices=range(0, 10), metavar='0-9', help='zip 压缩级别，0 为不压缩，默认 6')
+    parser.add_argument('--profile', default=None, metavar='REPORT.json', help='开启性能剖析，写出 JSON 报告与 REPORT.json.folded（flamegraph）')
+    parser.add_argument('--profile-top', type=int, default=15, help='剖析汇总打印前 N 项，默认 15')
+    parser.add_argument('--force', action='store_true', help='忽略增量清单，全量重新渲染所有文件')
+    parser.add_argument('--dry-run', action='store_true', help='只渲染并打印与磁盘现状的 unified diff，不写盘')
+    parser.add_argument('--watch', action='store_true', help='常驻监听 amis-dir 与 templates-dir，文件变化时只重新生成受影响的页面/模板输出')
+    parser.add_argument('--watch-interval', type=float, default=0.3, help='--watch 轮询间隔（秒），默认 0.3')
+    parser.add_argument('--jobs', type=int, default=1, help='并行进程数（转换与渲染共用），默认 1；0 表示使用全部 CPU 核')
+    parser.add_argument('--template-cache-dir', default=None, help='模板编译缓存目录，默认 ~/.cache/codegen/jinja2')
+    parser.add_argument('--no-template-cache', action='store_true', help='关闭模板编译缓存')
+    parser.add_argument('--compiled-templates', default=None, help='template_cache.py precompile 生成的预编译模板目录（可选）')
+    args = parser.parse_args()
+
+    amis_dir = os.path.abspath(args.amis_dir)
+    output_dir = os.path.abspath(args.output_dir)
+    templates_dir = os.path.abspath(args.templates_dir)
+    openapi_out = os.path.abspath(args.openapi_out) if args.openapi_out else None
+    if not os.path.isdir(amis_dir):
+        print(f"[FATAL] amis-dir 不存在或不是目录: {amis_dir}")
+        sys.exit(1)
+    if not os.path.isdir(templates_dir):
+        print(f"[FATAL] templates-dir 不存在或不是目录: {templates_dir}")
+        sys.exit(1)
+    os.makedirs(output_dir, exist_ok=True)
+    if args.dry_run and args.zip_only:
+        print("[FATAL] --dry-run 不能与 --zip-only 同时使用")
+        sys.exit(1)
+    if args.watch and (args.zip_only or args.profile or args.dry_run):
+        print("[FATAL] --watch 不能与 --zip-only / --profile / --dry-run 同时使用")
+        sys.exit(1)
+    if args.count_cache_ttl <= 0:
+        print("[FATAL] --count-cache-ttl 必须大于 0")
+        sys.exit(1)
+    if args.stream_fetch_size <= 0:
+        print("[FATAL] --stream-fetch-size 必须大于 0")
+        sys.exit(1)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    cache = None if args.no_cache else ConversionCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+    default_system = args.system_name or os.path.basename(amis_dir)
+    systems = list_amis_systems(amis_dir, default_system)
+    profiler = Profiler('pipeline') if args.profile else NULL_PROFILER
+    system_docs, report = convert_systems(systems, openapi_out, args.stream, args.base_url,
+                                          cache.cache_dir if cache else None, jobs, profiler)
+    report.print_summary()
+    if cache is not None:
+        cache.prune()
+
+    compiled_dir = os.path.abspath(args.compiled_templates) if args.compiled_templates else None
+    env_args = (templates_dir, args.template_cache_dir, compiled_dir, not args.no_template_cache)
+    pom = pom_options(args.group_id or args.package_prefix, args.version,
+                      args.aggregator_artifact_id if args.aggregator else None)
+    common_artifact_id = args.common_artifact_id if args.shared_common else None
+    code_options = dict(keyset=args.keyset_pagination, count_strategy=args.count_strategy,
+                        count_cache_ttl=args.count_cache_ttl, streaming_export=args.streaming_export,
+                        stream_fetch_size=args.stream_fetch_size, db_dialect=args.db_dialect)
+    if args.watch:
+        session = WatchSession(output_dir, args.package_prefix, args.orm, env_args, jobs, args.zip, pom, args.zip_level,
+                               common_artifact_id, not args.no_validate, args.validate_cache_dir, code_options)
+        watch_amis_dir(amis_dir, default_system, templates_dir, system_docs, session, openapi_out, args.stream,
+                       args.base_url, cache.cache_dir if cache else None, args.watch_interval)
+        return
+    errors = run_codegen(system_docs, output_dir, args.package_prefix, args.orm, env_args,
+                         jobs=jobs, force=args.force, make_zip=args.zip, pom=pom,
+                         zip_only=args.zip_only, zip_level=args.zip_level,
+                         profiler=profiler if profiler.enabled else None, dry_run=args.dry_run,
+                         common_artifact_id=common_artifact_id, validate=not args.no_validate,
+                         validate_cache_dir=args.validate_cache_dir, code_options=code_options)
+    if profiler.enabled:
+        profiler.print_top(args.profile_top)
+        profiler.write(os.path.abspath(args.profile))
+    if errors or report.failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+import json
+import time
+
+# 按页面统计的类别：codegen 页面渲染 / AMIS 页面转换
+PAGE_CATEGORIES = ('page', 'amis')
+
+class _NullSpan:
+    """关闭 profiling 时复用的空计时块：不计时、不分配"""
+    __slots__ = ('bytes',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class NullProfiler:
+    enabled = False
+
+    def span(self, category, name=None):
+        return _NULL_SPAN
+
+    def merge(self, snapshot):
+        pass
+
+    def drain(self):
+        return None
+
+NULL_PROFILER = NullProfiler()
+
+class _Span:
+    __slots__ = ('profiler', 'key', 'frame', 'start', 'bytes')
+
+    def __init__(self, profiler, key, frame):
+        self.profiler = profiler
+        self.key = key
+        self.frame = frame
+        self.bytes = 0
+
+    def __enter__(self):
+        p = self.profiler
+        p.stack.append(self.frame)
+        p.child.append(0.0)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        p = self.profiler
+        child = p.child.pop()
+        stack = ';'.join(p.stack)
+        p.stack.pop()
+        p.child[-1] += elapsed
+        p.folded[stack] = p.folded.get(stack, 0.0) + elapsed - child
+        stat = p.stats.get(self.key)
+        if stat is None:
+            stat = p.stats[self.key] = [0.0, 0, 0]
+        stat[0] += elapsed
+        stat[1] += 1
+        stat[2] += self.bytes
+        return False
+
+class Profiler:
+    """
+    轻量计时器：按 (类别, 名称) 记录耗时/调用次数/字节数，并按调用栈累计自身耗时，
+    可输出 JSON 报告与 flamegraph.pl / speedscope 兼容的 folded stacks。
+    多进程时各 worker 各自记录，drain() 后随结果回传，由主进程 merge()。
+    """
+    enabled = True
+
+    def __init__(self, root='codegen'):
+        self.root = root
+        self.stats = {}
+        self.folded = {}
+        self.stack = [root]
+        self.child = [0.0]
+        self.start = time.perf_counter()
+
+    def span(self, category, name=None):
+        """with profiler.span('render', 'controller.java.j2') as sp: ...; sp.bytes = n"""
+        frame = f"{category}:{name}" if name is not None else category
+        return _Span(self, (category, name), frame)
+
+    def drain(self):
+        """取出并清空已记录数据（worker 回传用）"""
+        snapshot = {
+            'stats': [[c, n, *v] for (c, n), v in self.stats.items()],
+            'folded': self.folded,
+        }
+        self.stats = {}
+        self.folded = {}
+        return snapshot
+
+    def merge(self, snapshot):
+        if not snapshot:
+            return
+        for category, name, seconds, calls, nbytes in snapshot['stats']:
+            stat = self.stats.setdefault((category, name), [0.0, 0, 0])
+            stat[0] += seconds
+            stat[1] += calls
+            stat[2] += nbytes
+        for stack, seconds in snapshot['folded'].items():
+            self.folded[stack] = self.folded.get(stack, 0.0) + seconds
+
+    def report(self):
+        """汇总报告：stages 按类别合计，templates / pages 分别展开；并行时 stage 耗时为各进程累计"""
+        stages = {}
+        templates = {}
+        pages = {}
+        for (category, name), (seconds, calls, nbytes) in sorted(self.stats.items(), key=lambda x: (x[0][0], str(x[0][1]))):
+            agg = stages.setdefault(category, {'seconds': 0.0, 'calls': 0, 'bytes': 0})
+            agg['seconds'] += seconds
+            agg['calls'] += calls
+            agg['bytes'] += nbytes
+            entry = {'seconds': round(seconds, 6), 'calls': calls, 'bytes': nbytes}
+            if category in ('render', 'compile'):
+                templates.setdefault(name, {})[category] = entry
+            elif category in PAGE_CATEGORIES:
+                pages.setdefault(category, {})[name] = entry
+        for agg in stages.values():
+            agg['seconds'] = round(agg['seconds'], 6)
+        return {
+            'root': self.root,
+            'wall_seconds': round(time.perf_counter() - self.start, 6),
+            'stages': stages,
+            'templates': templates,
+            'pages': pages,
+        }
+
+    def folded_lines(self):
+        """folded stacks，数值单位为微秒"""
+        return [f"{stack} {int(seconds * 1e6)}" for stack, seconds in sorted(self.folded.items()) if seconds > 0]
+
+    def write(self, path):
+        """写出 JSON 报告，同时写出 <path>.folded 供 flamegraph.pl / speedscope 使用"""
+        with open(path, 'w', encoding='utf-8') as fw:
+            json.dump(self.report(), fw, ensure_ascii=False, indent=2)
+        with open(path + '.folded', 'w', encoding='utf-8') as fw:
+            fw.write('\n'.join(self.folded_lines()) + '\n')
+        print(f"[profile] 报告已写入: {path}（flamegraph: {path}.folded）")
+
+    def print_top(self, n=15):
+        report = self.report()
+        print(f"\n==== 性能剖析（墙钟 {report['wall_seconds']:.3f}s）====")
+        print(f"{'阶段':<16}{'耗时(s)':>10}{'次数':>8}{'字节':>12}")
+        for category, agg in sorted(report['stages'].items(), key=lambda x: -x[1]['seconds']):
+            print(f"{category:<16}{agg['seconds']:>10.4f}{agg['calls']:>8}{agg['bytes']:>12}")
+        items = sorted(((v[0], c, name, v[1]) for (c, name), v in self.stats.items() if name is not None), reverse=True)
+        print(f"---- Top {n}（类别:名称）----")
+        for seconds, category, name, calls in items[:n]:
+            print(f"  {seconds:>9.4f}s  {calls:>6}次  {category}:{name}")
+        print("==========================")
@@ -0,0 +1,116 @@
+"""
+系统级 schema 索引：同一系统目录下全部 OpenAPI 文档的 components.schemas 只建一次索引，
+提供按规范化名称的 O(1) 查找，以及带缓存的 $ref / allOf 解析（支持跨文件引用，如 common.json#/components/schemas/Base）。
+"""
+import os
+
+SCHEMA_PREFIX = '#/components/schemas/'
+
+def normalize_name(name):
+    """表名 / schema 名规范化：忽略大小写与 _ - . 分隔符，user_info 与 UserInfo 视为同名"""
+    return name.replace('_', '').replace('-', '').replace('.', '').lower()
+
+def is_component_file(openapi):
+    """只提供共享 components、没有接口也没有 info.tableName 的文档不生成页面"""
+    return not openapi.get('paths') and 'tableName' not in openapi.get('info', {}) and bool(
+        openapi.get('components', {}).get('schemas'))
+
+class SchemaIndex:
+    def __init__(self, docs):
+        """docs 为 [(文件名, 页面名, openapi)]"""
+        self.schemas = {}
+        self.by_name = {}
+        self.resolved = {}
+        self.resolving = set()
+        for file, _, openapi in docs:
+            if not isinstance(openapi, dict):
+                continue
+            schemas = openapi.get('components', {}).get('schemas', {}) or {}
+            self.schemas[file] = schemas
+            for key in schemas:
+                self.by_name.setdefault(normalize_name(key), []).append((file, key))
+
+    def find(self, file, table_name):
+        """
+        按表名查找实体 schema，返回 (文件名, schema 名)：先查本文件（精确驼峰名、规范化名），
+        再查系统内其他文件；都找不到时回退为本文件第一个 schema 并提示，无 schema 返回 None
+        """
+        local = self.schemas.get(file, {})
+        camel_key = ''.join([x.capitalize() for x in table_name.split('_')])
+        if camel_key in local:
+            return file, camel_key
+        matches = self.by_name.get(normalize_name(table_name), [])
+        for match in matches:
+            if match[0] == file:
+                return match
+        if matches:
+            return matches[0]
+        if local:
+            key = next(iter(local))
+            print(f"[warn] 未找到与表名 {table_name} 对应的 schema，使用 {file} 中第一个 schema: {key}")
+            return file, key
+        return None
+
+    def entity_schema(self, file, table_name):
+        """表名对应的实体 schema（已展开 $ref / allOf），找不到返回 {}"""
+        found = self.find(file, table_name)
+        if found is None:
+            return {}
+        return self.resolve_ref(found[0], found[1])
+
+    def _parse_ref(self, ref, base_file):
+        path, _, pointer = ref.partition('#')
+        target = os.path.normpath(path).replace(os.sep, '/') if path else base_file
+        pointer = '#' + pointer
+        if not pointer.startswith(SCHEMA_PREFIX):
+            raise ValueError(f"暂只支持引用 components/schemas: {ref}（{base_file}）")
+        return target, pointer[len(SCHEMA_PREFIX):]
+
+    def resolve_ref(self, file, key):
+        """解析 (文件, schema 名)，结果按键缓存；循环引用时保留未展开的 $ref"""
+        cache_key = (file, key)
+        if cache_key in self.resolved:
+            return self.resolved[cache_key]
+        if cache_key in self.resolving:
+            print(f"[warn] schema 循环引用，停止展开: {file}#{SCHEMA_PREFIX[1:]}{key}")
+            return {'$ref': f"{file}{SCHEMA_PREFIX}{key}"}
+        schemas = self.schemas.get(file)
+        if schemas is None or key not in schemas:
+            raise KeyError(f"$ref 目标不存在: {file}{SCHEMA_PREFIX}{key}")
+        self.resolving.add(cache_key)
+        try:
+            result = self.resolve(schemas[key], file)
+        finally:
+            self.resolving.discard(cache_key)
+        self.resolved[cache_key] = result
+        return result
+
+    def resolve(self, schema, file):
+        """展开 schema 中的 $ref 与 allOf（properties 逐个展开），返回新 dict，不修改原文档"""
+        if not isinstance(schema, dict):
+            return schema
+        if '$ref' in schema:
+            target = self.resolve_ref(*self._parse_ref(schema['$ref'], file))
+            siblings = {k: v for k, v in schema.items() if k != '$ref'}
+            if not siblings:
+                return target
+            return dict(target, **self.resolve(siblings, file))
+        if 'allOf' in schema:
+            merged = {'properties': {}}
+            required = []
+            for part in schema['allOf'] + [{k: v for k, v in schema.items() if k != 'allOf'}]:
+                part = self.resolve(part, file)
+                for k, v in part.items():
+                    if k == 'properties':
+                        merged['properties'].update(v)
+                    elif k == 'required':
+                        required += [r for r in v if r not in required]
+                    else:
+                        merged[k] = v
+            if required:
+                merged['required'] = required
+            return merged
+        if 'properties' in schema:
+            schema = dict(schema, properties={name: self.resolve(prop, file)
+                                              for name, prop in schema['properties'].items()})
+        return schema
@@ -0,0 +1,267 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+import threading
+import traceback
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ProcessPoolExecutor
+from amis_to_openapi import convert_amis_json, split_openapi_docs
+from codegen import create_env, plan_system_docs, render_task, pom_options
+from codegen_ir import COUNT_STRATEGIES, DB_DIALECTS
+from openapi_validate import validate_document
+from zip_output import ReproducibleZip
+from verify import file_manifest
+
+NAME_RE = re.compile(r'^[A-Za-z0-9_\-]+$')
+PACKAGE_RE = re.compile(r'^[A-Za-z_]\w*(\.[A-Za-z_]\w*)*$')
+ORMS = ('mybatis', 'jpa')
+KINDS = ('amis', 'openapi')
+OUTPUTS = ('zip', 'manifest')
+# 请求中的生成代码选项（见 codegen.plan_system_docs）
+CODE_OPTION_KEYS = ('keyset', 'count_strategy', 'count_cache_ttl', 'streaming_export', 'stream_fetch_size', 'db_dialect')
+
+class ServiceBusy(Exception):
+    pass
+
+def normalize_request(request):
+    """
+    校验并补全生成请求，非法参数抛 ValueError。请求格式：
+      {"kind": "amis|openapi", "system_name": "oa", "package_prefix": "com.hg", "orm": "mybatis|jpa",
+       "output": "zip|manifest", "pages": {"页面名": AMIS 或 OpenAPI 文档}, "pom": true,
+       "group_id": "...", "version": "1.0.0", "base_url": "...", "zip_level": 6, "keyset": false,
+       "count_strategy": null, "count_cache_ttl": 60, "streaming_export": false, "stream_fetch_size": 1000,
+       "db_dialect": "generic|mysql"}
+    """
+    if not isinstance(request, dict):
+        raise ValueError("请求体必须是 JSON 对象")
+    req = {
+        'kind': request.get('kind', 'amis'),
+        'system_name': request.get('system_name', 'app'),
+        'package_prefix': request.get('package_prefix', 'com.hg'),
+        'orm': request.get('orm', 'mybatis'),
+        'output': request.get('output', 'zip'),
+        'pages': request.get('pages'),
+        'base_url': request.get('base_url', 'http://your.base.url'),
+        'zip_level': request.get('zip_level', 6),
+        'keyset': request.get('keyset', False),
+        'count_strategy': request.get('count_strategy'),
+        'count_cache_ttl': request.get('count_cache_ttl', 60),
+        'streaming_export': request.get('streaming_export', False),
+        'stream_fetch_size': request.get('stream_fetch_size', 1000),
+        'db_dialect': request.get('db_dialect', 'generic'),
+    }
+    if req['kind'] not in KINDS:
+        raise ValueError(f"kind 必须为 {'/'.join(KINDS)}: {req['kind']}")
+    if req['orm'] not in ORMS:
+        raise ValueError(f"orm 必须为 {'/'.join(ORMS)}: {req['orm']}")
+    if req['output'] not in OUTPUTS:
+        raise ValueError(f"output 必须为 {'/'.join(OUTPUTS)}: {req['output']}")
+    if not isinstance(req['system_name'], str) or not NAME_RE.match(req['system_name']):
+        raise ValueError(f"system_name 只能包含字母、数字、下划线和短横线: {req['system_name']}")
+    if not isinstance(req['package_prefix'], str) or not PACKAGE_RE.match(req['package_prefix']):
+        raise ValueError(f"package_prefix 不是合法的 Java 包名: {req['package_prefix']}")
+    if not isinstance(req['keyset'], bool):
+        raise ValueError(f"keyset 必须为 true/false: {req['keyset']}")
+    if not isinstance(req['streaming_export'], bool):
+        raise ValueError(f"streaming_export 必须为 true/false: {req['streaming_export']}")
+    if req['count_strategy'] is not None and req['count_strategy'] not in COUNT_STRATEGIES:
+        raise ValueError(f"count_strategy 必须为 {'/'.join(COUNT_STRATEGIES)} 或 null: {req['count_strategy']}")
+    if not isinstance(req['count_cache_ttl'], int) or isinstance(req['count_cache_ttl'], bool) or req['count_cache_ttl'] <= 0:
+        raise ValueError(f"count_cache_ttl 必须为正整数: {req['count_cache_ttl']}")
+    if (not isinstance(req['stream_fetch_size'], int) or isinstance(req['stream_fetch_size'], bool)
+            or req['stream_fetch_size'] <= 0):
+        raise ValueError(f"stream_fetch_size 必须为正整数: {req['stream_fetch_size']}")
+    if req['db_dialect'] not in DB_DIALECTS:
+        raise ValueError(f"db_dialect 必须为 {'/'.join(DB_DIALECTS)}: {req['db_dialect']}")
+    if not isinstance(req['zip_level'], int) or not 0 <= req['zip_level'] <= 9:
+        raise ValueError(f"zip_level 必须为 0-9 的整数: {req['zip_level']}")
+    pages = req['pages']
+    if not isinstance(pages, dict) or not pages:
+        raise ValueError("pages 必须是非空对象 {页面名: 文档}")
+    for page_name, doc in pages.items():
+        if not NAME_RE.match(page_name):
+            raise ValueError(f"页面名只能包含字母、数字、下划线和短横线: {page_name}")
+        if not isinstance(doc, (dict, list)):
+            raise ValueError(f"页面文档必须是 JSON 对象: {page_name}")
+    req['pom'] = None
+    if request.get('pom', True):
+        req['pom'] = pom_options(request.get('group_id') or req['package_prefix'], str(request.get('version', '1.0.0')))
+    return req
+
+class ProjectGenerator:
+    """
+    库 API：模板环境常驻，把请求中的 AMIS / OpenAPI 文档在内存中生成为工程文件，不落盘。
+    页面按名称排序处理，输出与请求中的键顺序、文件系统顺序无关；不读写进程级全局状态。
+    """
+    def __init__(self, templates_dir, cache_dir=None, compiled_dir=None, use_cache=True):
+        self.env = create_env(templates_dir, cache_dir, compiled_dir, use_cache)
+
+    def render(self, request):
+        """返回 (规范化后的请求, artifact_id, {相对路径: 代码})"""
+        req = normalize_request(request)
+        docs = []
+        for page_name in sorted(req['pages']):
+            doc = req['pages'][page_name]
+            if req['kind'] == 'amis':
+                try:
+                    doc, _, _ = convert_amis_json(doc, page_name, req['base_url'])
+                except Exception as e:
+                    raise ValueError(f"AMIS 页面转换失败: {page_name} - {e}")
+            # 多表 AMIS 页面按表展开为 <页面名>_<表名> 多个页面
+            for file, name, openapi in split_openapi_docs(f"{page_name}.json", page_name, doc):
+                errors = validate_document(openapi)
+                if errors:
+                    raise ValueError(f"OpenAPI 校验未通过: {name} - {'; '.join(errors)}")
+                docs.append((file, name, openapi))
+        plan = plan_system_docs(req['system_name'], docs, '', req['package_prefix'], req['orm'], {}, force=True,
+                                pom=req['pom'], code_options={key: req[key] for key in CODE_OPTION_KEYS})
+        failed = sorted(set(name for _, name, _ in docs) - set(plan.page_names))
+        if failed:
+            raise ValueError(f"页面未生成（缺少 tableName / schema 定义或 info.countStrategy 非法）: {', '.join(failed)}")
+        files = {}
+        for task in plan.tasks:
+            for out_path, code in render_task(self.env, task.kind, task.kwargs, task.label):
+                files[out_path[len(plan.backend_dir) + 1:].replace('\\', '/')] = code
+        return req, plan.artifact_id, files
+
+    def generate(self, request):
+        """按 output 返回 (content_type, 响应体字节, 文件名)：zip 包或文件清单 JSON"""
+        req, artifact_id, files = self.render(request)
+        if req['output'] == 'zip':
+            archive = ReproducibleZip(None, req['zip_level'], threads=1)
+            for rel, code in files.items():
+                archive.add(rel, code)
+            return 'application/zip', archive.getvalue(), f"{artifact_id}.zip"
+        entries = {}
+        for rel, code in files.items():
+            data = code.encode('utf-8')
+            entries[rel] = {'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+        body = json.dumps(file_manifest(artifact_id, entries), ensure_ascii=False, indent=2)
+        return 'application/json', body.encode('utf-8'), f"{artifact_id}.manifest.json"
+
+_GENERATOR = None
+
+def _init_generator(templates_dir, cache_dir, compiled_dir, use_cache):
+    global _GENERATOR
+    _GENERATOR = ProjectGenerator(templates_dir, cache_dir, compiled_dir, use_cache)
+
+def _generate_in_worker(request):
+    return _GENERATOR.generate(request)
+
+class GenerationService:
+    """
+    有界并发的生成服务：固定数量的 worker 进程各自常驻一份已编译的模板环境；
+    同时在途的请求数超过 workers + queue 时直接拒绝（ServiceBusy），不无限排队。
+    """
+    def __init__(self, env_args, workers=2, queue=8):
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(workers + queue)
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_generator, initargs=env_args)
+
+    def generate(self, request, timeout=None):
+        if not self.slots.acquire(blocking=False):
+            raise ServiceBusy("生成任务已满，请稍后重试")
+        try:
+            return self.executor.submit(_generate_in_worker, request).result(timeout)
+        finally:
+            self.slots.release()
+
+    def close(self):
+        self.executor.shutdown()
+
+class GenerationHandler(BaseHTTPRequestHandler):
+    """POST /generate 生成工程；GET /health 健康检查"""
+    server_version = 'codegen-service'
+
+    def _send(self, status, content_type, body, filename=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if filename:
+            self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, obj):
+        self._send(status, 'application/json', json.dumps(obj, ensure_ascii=False).encode('utf-8'))
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'workers': self.server.service.workers})
+        else:
+            self._send_json(404, {'error': f"未知路径: {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/generate':
+            self._send_json(404, {'error': f"未知路径: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length <= 0 or length > self.server.max_body:
+            self._send_json(413 if length > 0 else 400, {'error': f"请求体长度无效（上限 {self.server.max_body} 字节）"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+            content_type, body, filename = self.server.service.generate(request, self.server.timeout_seconds)
+        except (ValueError, UnicodeDecodeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        except ServiceBusy as e:
+            self._send_json(503, {'error': str(e)})
+            return
+        except TimeoutError:
+            self._send_json(504, {'error': f"生成超时（{self.server.timeout_seconds}s）"})
+            return
+        except Exception as e:
+            print(f"[ERROR][生成服务] {e}")
+            print(traceback.format_exc())
+            self._send_json(500, {'error': str(e)})
+            return
+        self._send(200, content_type, body, filename)
+
+def serve(host, port, service, max_body_mb=32, timeout_seconds=300):
+    server = ThreadingHTTPServer((host, port), GenerationHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.max_body = int(max_body_mb * 1024 * 1024)
+    server.timeout_seconds = timeout_seconds
+    print(f"[INFO] 生成服务已启动: http://{host}:{server.server_port}（POST /generate，GET /health，{service.workers} 个 worker）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[INFO] 生成服务已退出")
+    finally:
+        server.server_close()
+        service.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 HTTP 生成服务：接收 AMIS / OpenAPI 文档，返回工程 zip 包或文件清单")
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址，默认仅本机 127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口，默认 8765')
+    parser.add_argument('--templates-dir', default='./templates', help='模板目录')
+    parser.add_argument('--workers', type=int, default=2, help='生成 worker 进程数，默认 2；0 表示使用全部 CPU 核')
+    parser.add_argument('--queue', type=int, default=8, help='worker 全忙时最多排队的请求数，超出返回 503，默认 8')
+    parser.add_argument('--timeout', type=float, default=300, help='单个请求的生成超时（秒），默认 300')
+    parser.add_argument('--max-body-mb', type=float, default=32, help='请求体大小上限（MB），默认 32')
+    parser.add_argument('--template-cache-dir', default=None, help='模板编译缓存目录，默认 ~/.cache/codegen/jinja2')
+    parser.add_argument('--no-template-cache', action='store_true', help='关闭模板编译缓存')
+    parser.add_argument('--compiled-templates', default=None, help='template_cache.py precompile 生成的预编译模板目录（可选）')
+    args = parser.parse_args()
+
+    templates_dir = os.path.abspath(args.templates_dir)
+    if not os.path.isdir(templates_dir):
+        print(f"[FATAL] templates-dir 不存在或不是目录: {templates_dir}")
+        sys.exit(1)
+    compiled_dir = os.path.abspath(args.compiled_templates) if args.compiled_templates else None
+    env_args = (templates_dir, args.template_cache_dir, compiled_dir, not args.no_template_cache)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    service = GenerationService(env_args, workers, max(args.queue, 0))
+    serve(args.host, args.port, service, args.max_body_mb, args.timeout)
+
+if __name__ == '__main__':
+    main()
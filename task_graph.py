@@ -0,0 +1,151 @@
+"""
+产物依赖图调度：每个输出产物（或汇总动作）一个节点，节点 id 唯一，同一产物只执行一次。
+依赖全部完成的节点即可执行：渲染节点提交到进程池并发执行（同一 batch 的就绪节点合并为一次提交，
+减少进程间传参），local 节点（写盘、打包等）在主进程执行；串行模式按加入顺序逐个执行。
+"""
+import heapq
+from concurrent.futures import wait, FIRST_COMPLETED
+
+PENDING = 'pending'
+DONE = 'done'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+BLOCKED = 'blocked'
+STATE_LABELS = {DONE: '执行', SKIPPED: '跳过（输入未变）', FAILED: '失败', BLOCKED: '未执行（依赖失败）'}
+
+class Node:
+    __slots__ = ('id', 'index', 'action', 'args', 'deps', 'dependents', 'local', 'always', 'batch',
+                 'state', 'result', 'error')
+
+    def __init__(self, node_id, index, action, args, deps, local, always, batch):
+        self.id = node_id
+        self.index = index
+        self.action = action
+        self.args = args
+        self.deps = deps
+        self.dependents = []
+        self.local = local
+        self.always = always
+        self.batch = batch
+        self.state = PENDING
+        self.result = None
+        self.error = None
+
+def _run_batch(calls):
+    """worker 中依次执行一批节点，单个节点失败不影响同批其他节点"""
+    results = []
+    for action, args in calls:
+        try:
+            results.append((True, action(*args)))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+class TaskGraph:
+    def __init__(self):
+        self.nodes = {}
+        self.deduped = 0
+
+    def add(self, node_id, action=None, args=(), deps=(), local=False, always=False, batch=None, skipped=False):
+        """
+        加入节点并返回；id 已存在时不重复加入，返回已有节点。
+        deps 为已加入节点的 id；always=True 的节点在依赖失败时仍执行（如写出其余成功的产物）；
+        skipped=True 表示产物可复用上次结果，节点不执行、视为已完成。
+        """
+        node = self.nodes.get(node_id)
+        if node is not None:
+            self.deduped += 1
+            return node
+        deps = tuple(dict.fromkeys(deps))
+        node = Node(node_id, len(self.nodes), action, args, deps, local, always, batch)
+        if skipped:
+            node.state = SKIPPED
+        for dep in deps:
+            self.nodes[dep].dependents.append(node)
+        self.nodes[node_id] = node
+        return node
+
+    def run(self, executor=None):
+        """执行全部节点；executor 为 None 时在当前进程按加入顺序串行执行。节点异常记入 node.error，不向外抛出"""
+        waiting = {}
+        ready = []
+        for node in self.nodes.values():
+            if node.state != PENDING:
+                continue
+            waiting[node.id] = sum(1 for dep in node.deps if self.nodes[dep].state == PENDING)
+            if not waiting[node.id]:
+                heapq.heappush(ready, (node.index, node))
+        futures = {}
+
+        def finish(node):
+            for dependent in node.dependents:
+                waiting[dependent.id] -= 1
+                if not waiting[dependent.id]:
+                    heapq.heappush(ready, (dependent.index, dependent))
+
+        def complete(node, ok, value):
+            if ok:
+                node.state, node.result = DONE, value
+            else:
+                node.state, node.error = FAILED, value
+            finish(node)
+
+        while ready or futures:
+            batches = {}
+            while ready:
+                _, node = heapq.heappop(ready)
+                if not node.always and any(self.nodes[dep].state in (FAILED, BLOCKED) for dep in node.deps):
+                    node.state = BLOCKED
+                    finish(node)
+                elif executor is None or node.local:
+                    try:
+                        complete(node, True, node.action(*node.args))
+                    except Exception as e:
+                        complete(node, False, e)
+                else:
+                    batches.setdefault(node.batch or node.id, []).append(node)
+            for nodes in batches.values():
+                future = executor.submit(_run_batch, [(node.action, node.args) for node in nodes])
+                futures[future] = nodes
+            if not futures:
+                continue
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                nodes = futures.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    results = [(False, e)] * len(nodes)
+                for node, (ok, value) in zip(nodes, results):
+                    complete(node, ok, value)
+
+    def summary(self, prefix=None):
+        """按状态统计节点数（prefix 限定 id 前缀），返回 {状态: 数量}"""
+        counts = {}
+        for node in self.nodes.values():
+            if prefix is None or node.id.startswith(prefix):
+                counts[node.state] = counts.get(node.state, 0) + 1
+        return counts
+
+    def ids(self, state, prefix=None):
+        return [node.id for node in self.nodes.values()
+                if node.state == state and (prefix is None or node.id.startswith(prefix))]
+
+    def report(self):
+        """图执行报告：全部节点的状态与依赖，可写为 JSON"""
+        return {
+            'summary': self.summary(),
+            'deduped': self.deduped,
+            'nodes': [{'id': node.id, 'state': node.state, 'deps': list(node.deps),
+                       **({'error': str(node.error)} if node.error is not None else {})}
+                      for node in self.nodes.values()],
+        }
+
+    def print_summary(self):
+        counts = self.summary()
+        parts = [f"{STATE_LABELS[state]} {counts[state]}" for state in (DONE, SKIPPED, FAILED, BLOCKED) if counts.get(state)]
+        dedup = f"，重复产物合并 {self.deduped} 个" if self.deduped else ''
+        print(f"[任务图] 共 {len(self.nodes)} 个节点：{'，'.join(parts) or '无'}{dedup}")
+        for state in (FAILED, BLOCKED):
+            for node_id in self.ids(state):
+                print(f"  [{STATE_LABELS[state]}] {node_id}")
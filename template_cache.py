@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import jinja2
+from jinja2 import Environment, FileSystemLoader, ModuleLoader, FileSystemBytecodeCache
+from jinja2.bccache import Bucket
+
+ENV_OPTIONS = {'trim_blocks': True, 'lstrip_blocks': True}
+STAMP_FILE = '_codegen_templates.json'
+
+def upper_first(s):
+    return s[0].upper() + s[1:] if s else s
+
+FILTERS = {'upper_first': upper_first}
+
+def _new_env(templates_dir):
+    env = Environment(loader=FileSystemLoader(templates_dir), **ENV_OPTIONS)
+    env.filters.update(FILTERS)
+    return env
+
+def default_cache_dir():
+    """编译缓存目录：优先 CODEGEN_CACHE_DIR 环境变量，否则 ~/.cache/codegen/jinja2"""
+    return os.environ.get('CODEGEN_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'codegen', 'jinja2')
+
+def hash_templates(templates_dir):
+    """计算模板目录下每个模板源码的 sha256，用于增量生成与缓存失效判定"""
+    hashes = {}
+    for name in sorted(os.listdir(templates_dir)):
+        path = os.path.join(templates_dir, name)
+        if name.endswith('.j2') and os.path.isfile(path):
+            with open(path, 'rb') as f:
+                hashes[name] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+def env_signature(env):
+    """影响编译结果的 Environment 配置 + Jinja 版本，作为缓存键的一部分"""
+    return json.dumps([
+        jinja2.__version__, sys.version_info[:2],
+        env.block_start_string, env.block_end_string, env.variable_start_string, env.variable_end_string,
+        env.comment_start_string, env.comment_end_string, env.line_statement_prefix, env.line_comment_prefix,
+        env.trim_blocks, env.lstrip_blocks, env.newline_sequence, env.keep_trailing_newline,
+        sorted(env.extensions), env.optimized, repr(env.autoescape),
+    ], default=str)
+
+class ContentHashBytecodeCache(FileSystemBytecodeCache):
+    """
+    以「模板内容哈希 + Jinja 版本 + Environment 配置」为键的磁盘编译缓存。
+    同一模板内容无论位于哪个目录、被哪个脚本加载，都共用一份字节码；模板改动或 Jinja 升级自动失效。
+    """
+    def __init__(self, directory, signature):
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory, '__codegen_%s.cache')
+        self.signature = signature
+
+    def get_bucket(self, environment, name, filename, source):
+        key = hashlib.sha256(f"{self.signature}|{source}".encode('utf-8')).hexdigest()
+        checksum = self.get_source_checksum(source)
+        bucket = Bucket(environment, key, checksum)
+        self.load_bytecode(bucket)
+        return bucket
+
+def load_stamp(compiled_dir):
+    try:
+        with open(os.path.join(compiled_dir, STAMP_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def create_template_env(templates_dir, cache_dir=None, compiled_dir=None, use_cache=True):
+    """
+    创建模板环境，codegen.py 与 generate_pom.py 共用：
+      - compiled_dir：precompile 生成的模块目录，与当前模板一致时直接导入，不再解析/编译
+      - 否则使用 FileSystemLoader + 磁盘编译缓存（use_cache=False 时关闭缓存）
+    """
+    env = _new_env(templates_dir)
+    signature = env_signature(env)
+    if compiled_dir:
+        stamp = load_stamp(compiled_dir)
+        if stamp and stamp.get('signature') == signature and stamp.get('templates') == hash_templates(templates_dir):
+            env.loader = ModuleLoader(compiled_dir)
+            return env
+        print(f"[warn] 预编译模板已过期或不存在，回退为实时编译: {compiled_dir}")
+    if use_cache:
+        env.bytecode_cache = ContentHashBytecodeCache(cache_dir or default_cache_dir(), signature)
+    return env
+
+def precompile_templates(templates_dir, compiled_dir):
+    """将模板目录编译为可直接导入的 Python 模块，并写入校验戳"""
+    env = _new_env(templates_dir)
+    os.makedirs(compiled_dir, exist_ok=True)
+    env.compile_templates(compiled_dir, zip=None, filter_func=lambda name: name.endswith('.j2'),
+                          ignore_errors=False)
+    stamp = {'signature': env_signature(env), 'templates': hash_templates(templates_dir)}
+    with open(os.path.join(compiled_dir, STAMP_FILE), 'w', encoding='utf-8') as fw:
+        json.dump(stamp, fw, ensure_ascii=False, indent=2)
+    print(f"✅ 已预编译 {len(stamp['templates'])} 个模板到: {compiled_dir}")
+
+def clear_cache(cache_dir=None):
+    cache_dir = cache_dir or default_cache_dir()
+    if os.path.isdir(cache_dir):
+        ContentHashBytecodeCache(cache_dir, '').clear()
+    print(f"✅ 已清空模板编译缓存: {cache_dir}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Jinja2 模板编译缓存管理（codegen.py / generate_pom.py 共用）")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('precompile', help='将模板目录预编译为 Python 模块')
+    p.add_argument('--templates-dir', default='./templates', help='模板目录')
+    p.add_argument('--target', default='./templates_compiled', help='预编译模块输出目录')
+    p = sub.add_parser('clear', help='清空磁盘编译缓存')
+    p.add_argument('--cache-dir', default=None, help='缓存目录，默认 ~/.cache/codegen/jinja2')
+    args = parser.parse_args()
+
+    if args.command == 'precompile':
+        templates_dir = os.path.abspath(args.templates_dir)
+        if not os.path.isdir(templates_dir):
+            print(f"[FATAL] templates-dir 不存在或不是目录: {templates_dir}")
+            sys.exit(1)
+        precompile_templates(templates_dir, os.path.abspath(args.target))
+    elif args.command == 'clear':
+        clear_cache(args.cache_dir)
+
+if __name__ == '__main__':
+    main()
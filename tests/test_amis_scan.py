@@ -0,0 +1,114 @@
+import json
+import random
+
+import pytest
+
+from amis_to_openapi import scan_amis, stream_scan_amis_file
+
+PAGE = {
+    "type": "page",
+    "title": "用户管理",
+    "body": [
+        {"type": "form", "title": "查询", "body": [{"type": "input-text", "name": "keyword", "label": "关键字"}]},
+        {
+            "type": "crud",
+            "name": "users",
+            "api": {"method": "get", "url": "${base_url}/api/user/page"},
+            "headerToolbar": [{
+                "type": "button", "label": "新增", "actionType": "dialog",
+                "dialog": {"title": "新增", "body": {
+                    "type": "form", "api": {"method": "post", "url": "${base_url}/api/user"},
+                    "body": [{"type": "input-text", "name": "user_name", "label": "用户名"},
+                             {"type": "select", "name": "dept_id", "label": "部门 \"A\"\\B"}]}},
+            }],
+            "columns": [
+                {"name": "id", "label": "ID", "type": "text"},
+                {"name": "user_name", "label": "用户名"},
+                {"type": "operation", "label": "操作", "buttons": [
+                    {"type": "button", "label": "删除", "actionType": "ajax",
+                     "api": {"method": "delete", "url": "${base_url}/api/user/${id}"}},
+                    {"type": "button", "label": "编辑", "onEvent": {"click": {"actions": [
+                        {"actionType": "ajax", "api": {"method": "put", "url": "${base_url}/api/user"}}]}}},
+                ]},
+            ],
+        },
+        {"type": "table", "title": "订单", "columns": [{"name": "order_no", "label": 1.5e3}]},
+    ],
+}
+
+def api_view(scan, idx):
+    """流式扫描中区块被单独解码，api 的 path 以区块为根，只比较 url / method / op"""
+    return [(a['url'], a['method'], a['op']) for a in scan.apis_of(idx)]
+
+def assert_equivalent(expected, actual):
+    assert [json.dumps(b, sort_keys=True) for b in actual.blocks] == \
+        [json.dumps(b, sort_keys=True) for b in expected.blocks]
+    assert [list(f) for f in actual.block_fields] == [list(f) for f in expected.block_fields]
+    for idx in range(len(expected.blocks)):
+        assert api_view(actual, idx) == api_view(expected, idx)
+    assert actual.objects == expected.objects
+    assert actual.attrs == expected.attrs
+
+def stream_scan(tmp_path, root, chunk_size=1 << 20, **dump_kwargs):
+    path = tmp_path / 'page.json'
+    path.write_text(json.dumps(root, **dump_kwargs), encoding='utf-8')
+    return stream_scan_amis_file(str(path), chunk_size=chunk_size)
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 1 << 20])
+@pytest.mark.parametrize('dump_kwargs', [{}, {'ensure_ascii': False, 'indent': 2}])
+def test_stream_scan_matches_scan_amis(tmp_path, chunk_size, dump_kwargs):
+    expected = scan_amis(PAGE)
+    assert len(expected.blocks) == 2
+    # 自身 api -> columns 等容器 -> 其余 key（headerToolbar）
+    assert api_view(expected, 0) == [
+        ('${base_url}/api/user/page', 'get', 'view'), ('${base_url}/api/user/${id}', 'delete', 'delete'),
+        ('${base_url}/api/user', 'put', 'edit'), ('${base_url}/api/user', 'post', 'add')]
+    assert list(expected.block_fields[0]) == ['users', 'user_name', 'dept_id', 'id']
+    assert_equivalent(expected, stream_scan(tmp_path, PAGE, chunk_size, **dump_kwargs))
+
+def test_list_root_is_scanned_as_body(tmp_path):
+    expected = scan_amis({"body": PAGE["body"]})
+    actual = scan_amis(PAGE["body"])
+    assert 'body' in actual.attrs
+    assert actual.objects[0][2] == 'root.body[0]'
+    assert_equivalent(expected, actual)
+    assert_equivalent(expected, stream_scan(tmp_path, PAGE["body"], 7))
+
+def test_truncated_file_raises(tmp_path):
+    path = tmp_path / 'page.json'
+    path.write_text(json.dumps(PAGE)[:-3], encoding='utf-8')
+    with pytest.raises(ValueError):
+        stream_scan_amis_file(str(path))
+
+KEYS = ['body', 'columns', 'dialog', 'drawer', 'form', 'actions', 'buttons', 'items', 'api', 'onEvent', 'fields', 'x']
+
+def random_tree(rng, depth):
+    if depth <= 0 or rng.random() < 0.15:
+        return rng.choice([1, 's', None, '中文'])
+    if rng.random() < 0.35:
+        return [random_tree(rng, depth - 1) for _ in range(rng.randint(0, 4))]
+    node = {}
+    if rng.random() < 0.6:
+        node['type'] = rng.choice(['crud', 'table', 'form', 'dialog', 'button', 'crud2', 'tpl', ''])
+    if rng.random() < 0.5:
+        node['name'] = rng.choice('abcdefg')
+    if rng.random() < 0.3:
+        node['label'] = rng.choice(['L', ''])
+    if rng.random() < 0.4:
+        node['api'] = {'method': rng.choice(['get', 'post', 'put', 'delete', 'patch', '']), 'url': rng.choice('uvw')}
+    if rng.random() < 0.3:
+        node['actionType'] = rng.choice(['ajax', 'dialog', 'edit'])
+    if rng.random() < 0.3:
+        node['onEvent'] = {'click': {'actions': [random_tree(rng, depth - 1) for _ in range(2)]}}
+    for key in rng.sample(KEYS, rng.randint(0, 4)):
+        node.setdefault(key, random_tree(rng, depth - 1))
+    return node
+
+def test_stream_scan_matches_scan_amis_on_random_trees(tmp_path):
+    rng = random.Random(20240601)
+    for _ in range(300):
+        root = random_tree(rng, 6)
+        if not isinstance(root, (dict, list)):
+            continue
+        actual = stream_scan(tmp_path, root, rng.choice([7, 64, 1 << 20]), ensure_ascii=rng.random() < 0.5)
+        assert_equivalent(scan_amis(root), actual)
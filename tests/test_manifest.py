@@ -0,0 +1,101 @@
+import os
+import hashlib
+
+from codegen import GenerationManifest
+
+OPTIONS = {'package_prefix': 'com.hg', 'orm': 'mybatis'}
+TEMPLATES = {'entity.java.j2': 'h1'}
+
+def new_manifest(tmp_path, force=False):
+    return GenerationManifest(str(tmp_path / '.codegen' / 'app.manifest.json'), str(tmp_path / 'app-backend'),
+                              TEMPLATES, OPTIONS, force)
+
+def write_output(manifest, unit, rel, data):
+    """模拟 VirtualOutput.flush：写文件并登记到清单"""
+    path = os.path.join(manifest.backend_dir, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fw:
+        fw.write(data)
+    manifest.record(unit, path, hashlib.sha256(data).hexdigest(), len(data), os.stat(path).st_mtime_ns)
+    return path
+
+def generate(tmp_path, pages, force=False):
+    """pages 为 {单元: (输入, {相对路径: 内容})}，按增量规则生成一次并保存清单，返回清单"""
+    manifest = new_manifest(tmp_path, force)
+    for unit, (inputs, outputs) in pages.items():
+        if manifest.reuse(unit, manifest.fingerprint(('entity.java.j2',), inputs)):
+            continue
+        for rel, data in outputs.items():
+            write_output(manifest, unit, rel, data)
+        manifest.done(unit)
+    manifest.save()
+    return manifest
+
+PAGES = {
+    'user': ({'table': 'user_info'}, {'src/user/UserEntity.java': b'class UserEntity {}\n'}),
+    'order': ({'table': 'order_main'}, {'src/order/OrderEntity.java': b'class OrderEntity {}\n',
+                                        'src/order/dto/OrderDTO.java': b'class OrderDTO {}\n'}),
+}
+
+def test_unchanged_inputs_are_reused(tmp_path):
+    generate(tmp_path, PAGES)
+    manifest = generate(tmp_path, PAGES)
+    assert manifest.skipped_units == 2
+    assert set(manifest.files()) == {'src/user/UserEntity.java', 'src/order/OrderEntity.java',
+                                     'src/order/dto/OrderDTO.java'}
+
+def test_changed_input_or_template_invalidates(tmp_path):
+    generate(tmp_path, PAGES)
+    pages = dict(PAGES, user=({'table': 'user_info', 'extra': 1}, PAGES['user'][1]))
+    assert generate(tmp_path, pages).skipped_units == 1
+
+    manifest = new_manifest(tmp_path)
+    manifest.template_hashes = {'entity.java.j2': 'h2'}
+    assert not manifest.reuse('order', manifest.fingerprint(('entity.java.j2',), PAGES['order'][0]))
+
+def test_same_size_edit_is_detected(tmp_path):
+    manifest = generate(tmp_path, PAGES)
+    path = os.path.join(manifest.backend_dir, 'src/user/UserEntity.java')
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as fw:
+        fw.write(data.replace(b'User', b'Usex'))
+    assert os.path.getsize(path) == len(data)
+    manifest = generate(tmp_path, PAGES)
+    assert manifest.skipped_units == 1
+    with open(path, 'rb') as f:
+        assert f.read() == data
+
+def test_unchanged_mtime_skips_hashing(tmp_path):
+    """mtime 与记录一致且早于清单保存时间时只比较大小，不读内容"""
+    manifest = generate(tmp_path, PAGES)
+    path = os.path.join(manifest.backend_dir, 'src/user/UserEntity.java')
+    old_ns = os.stat(path).st_mtime_ns - 10 * 10**9
+    os.utime(path, ns=(old_ns, old_ns))
+    manifest.new_units['user']['outputs']['src/user/UserEntity.java']['mtime_ns'] = old_ns
+    manifest.save()
+    with open(path, 'r+b') as fw:
+        fw.write(b'CLASS')
+    os.utime(path, ns=(old_ns, old_ns))
+    assert generate(tmp_path, PAGES).skipped_units == 2
+
+def test_missing_output_and_force_regenerate(tmp_path):
+    manifest = generate(tmp_path, PAGES)
+    os.remove(os.path.join(manifest.backend_dir, 'src/order/dto/OrderDTO.java'))
+    assert generate(tmp_path, PAGES).skipped_units == 1
+    assert generate(tmp_path, PAGES, force=True).skipped_units == 0
+
+def test_failed_unit_is_not_reused(tmp_path):
+    """单元未调用 done（渲染中途失败）时不记录输入指纹，下次重新生成"""
+    manifest = new_manifest(tmp_path)
+    assert not manifest.reuse('user', manifest.fingerprint(('entity.java.j2',), PAGES['user'][0]))
+    write_output(manifest, 'user', 'src/user/UserEntity.java', PAGES['user'][1]['src/user/UserEntity.java'])
+    manifest.save()
+    assert generate(tmp_path, {'user': PAGES['user']}).skipped_units == 0
+
+def test_corrupt_manifest_falls_back_to_full_generation(tmp_path, capsys):
+    generate(tmp_path, PAGES)
+    with open(tmp_path / '.codegen' / 'app.manifest.json', 'w', encoding='utf-8') as fw:
+        fw.write('{')
+    assert generate(tmp_path, PAGES).skipped_units == 0
+    assert '增量清单读取失败' in capsys.readouterr().out
@@ -0,0 +1,91 @@
+import copy
+
+import pytest
+
+from schema_index import SchemaIndex, normalize_name, is_component_file
+
+def doc(schemas, paths=None, table_name=None):
+    openapi = {'openapi': '3.0.0', 'paths': paths or {}, 'components': {'schemas': schemas}}
+    if table_name:
+        openapi['info'] = {'tableName': table_name}
+    return openapi
+
+COMMON = doc({
+    'Base': {'type': 'object', 'required': ['id'],
+             'properties': {'id': {'type': 'integer', 'primaryKey': True}, 'createdAt': {'type': 'string'}}},
+    'Audit': {'type': 'object', 'required': ['id', 'updatedBy'], 'properties': {'updatedBy': {'type': 'string'}}},
+})
+USER = doc({
+    'UserInfo': {'allOf': [{'$ref': 'common.json#/components/schemas/Base'},
+                           {'$ref': './common.json#/components/schemas/Audit'},
+                           {'$ref': '#/components/schemas/UserFields'}],
+                 'required': ['name']},
+    'UserFields': {'type': 'object', 'properties': {'name': {'type': 'string'},
+                                                    'dept': {'$ref': '#/components/schemas/Dept'}}},
+    'Dept': {'type': 'object', 'properties': {'deptName': {'type': 'string'}}},
+}, paths={'/user': {}}, table_name='user_info')
+
+def index(*docs):
+    return SchemaIndex([(file, file[:-5], openapi) for file, openapi in docs])
+
+def test_find_prefers_local_then_normalized_then_other_files(capsys):
+    idx = index(('common.json', COMMON), ('user.json', USER))
+    assert idx.find('user.json', 'user_info') == ('user.json', 'UserInfo')
+    assert idx.find('user.json', 'USER-FIELDS') == ('user.json', 'UserFields')
+    assert idx.find('user.json', 'base') == ('common.json', 'Base')
+    assert idx.find('user.json', 'missing_table') == ('user.json', 'UserInfo')
+    assert 'missing_table' in capsys.readouterr().out
+    assert idx.find('other.json', 'missing_table') is None
+    assert normalize_name('user_info') == normalize_name('User-Info') == 'userinfo'
+
+def test_component_file_detection():
+    assert is_component_file(COMMON)
+    assert not is_component_file(USER)
+    assert not is_component_file(doc({}))
+
+def test_resolve_merges_allof_across_files():
+    original = copy.deepcopy(USER)
+    idx = index(('common.json', COMMON), ('user.json', USER))
+    schema = idx.entity_schema('user.json', 'user_info')
+    assert list(schema['properties']) == ['id', 'createdAt', 'updatedBy', 'name', 'dept']
+    assert schema['properties']['id'] == {'type': 'integer', 'primaryKey': True}
+    assert schema['properties']['dept'] == {'type': 'object', 'properties': {'deptName': {'type': 'string'}}}
+    assert schema['required'] == ['id', 'updatedBy', 'name']
+    assert schema['type'] == 'object'
+    assert USER == original
+
+def test_resolve_is_memoized():
+    idx = index(('common.json', COMMON), ('user.json', USER))
+    first = idx.resolve_ref('user.json', 'UserInfo')
+    assert idx.resolve_ref('user.json', 'UserInfo') is first
+    assert ('common.json', 'Base') in idx.resolved
+    assert not idx.resolving
+
+def test_ref_siblings_override_target():
+    idx = index(('a.json', doc({'Name': {'type': 'string', 'maxLength': 10},
+                                'Wrapper': {'$ref': '#/components/schemas/Name', 'maxLength': 32}})))
+    assert idx.resolve_ref('a.json', 'Wrapper') == {'type': 'string', 'maxLength': 32}
+
+def test_cycle_keeps_unexpanded_ref(capsys):
+    idx = index(('a.json', doc({'Node': {'type': 'object', 'properties': {
+                                    'parent': {'$ref': '#/components/schemas/Node'},
+                                    'owner': {'$ref': 'b.json#/components/schemas/Owner'}}}})),
+                ('b.json', doc({'Owner': {'type': 'object', 'properties': {
+                                    'node': {'$ref': 'a.json#/components/schemas/Node'}}}})))
+    node = idx.resolve_ref('a.json', 'Node')
+    assert node['properties']['parent'] == {'$ref': 'a.json#/components/schemas/Node'}
+    assert node['properties']['owner']['properties']['node'] == {'$ref': 'a.json#/components/schemas/Node'}
+    assert '循环引用' in capsys.readouterr().out
+    assert not idx.resolving
+
+def test_bad_refs_raise():
+    idx = index(('a.json', doc({'Bad': {'$ref': '#/components/schemas/Nope'},
+                                'Param': {'$ref': '#/components/parameters/id'},
+                                'Remote': {'$ref': 'missing.json#/components/schemas/X'}})))
+    with pytest.raises(KeyError):
+        idx.resolve_ref('a.json', 'Bad')
+    with pytest.raises(ValueError):
+        idx.resolve_ref('a.json', 'Param')
+    with pytest.raises(KeyError):
+        idx.resolve_ref('a.json', 'Remote')
+    assert not idx.resolving
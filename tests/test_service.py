@@ -0,0 +1,73 @@
+import io
+import os
+import json
+import hashlib
+import zipfile
+
+import pytest
+
+from service import ProjectGenerator, normalize_request
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+
+AMIS_PAGE = {"type": "page", "body": [{
+    "type": "crud", "name": "order_main", "api": {"method": "get", "url": "/api/order/page"},
+    "columns": [{"name": "order_id", "label": "订单号"}, {"name": "amount", "label": "金额"}]}]}
+
+def request(**kwargs):
+    return dict({'kind': 'amis', 'system_name': 'oa', 'pages': {'order_list': AMIS_PAGE}}, **kwargs)
+
+@pytest.fixture(scope='module')
+def generator(tmp_path_factory):
+    return ProjectGenerator(TEMPLATES_DIR, cache_dir=str(tmp_path_factory.mktemp('jinja2')))
+
+def test_normalize_request_defaults():
+    req = normalize_request({'pages': {'p': {}}})
+    assert (req['kind'], req['system_name'], req['orm'], req['output'], req['zip_level']) == \
+        ('amis', 'app', 'mybatis', 'zip', 6)
+    assert (req['stream_fetch_size'], req['db_dialect'], req['count_strategy']) == (1000, 'generic', None)
+    assert req['pom'] is not None
+    assert normalize_request({'pages': {'p': {}}, 'pom': False})['pom'] is None
+
+@pytest.mark.parametrize('override', [
+    {'kind': 'swagger'}, {'orm': 'hibernate'}, {'output': 'tar'}, {'system_name': '../oa'},
+    {'package_prefix': 'com.1hg'}, {'keyset': 'true'}, {'streaming_export': 1}, {'count_strategy': 'fast'},
+    {'count_cache_ttl': True}, {'count_cache_ttl': 0}, {'stream_fetch_size': -2147483648},
+    {'db_dialect': 'oracle'}, {'zip_level': 10}, {'pages': {}}, {'pages': []}, {'pages': {'a/b': {}}},
+    {'pages': {'p': 'not json'}},
+])
+def test_normalize_request_rejects_invalid(override):
+    with pytest.raises(ValueError):
+        normalize_request(request(**override))
+
+def test_normalize_request_rejects_non_object():
+    with pytest.raises(ValueError):
+        normalize_request([request()])
+
+def test_zip_output_is_deterministic(generator):
+    content_type, body, filename = generator.generate(request())
+    assert (content_type, filename) == ('application/zip', 'oa-backend.zip')
+    assert generator.generate(request())[1] == body
+    pages = {'b_page': AMIS_PAGE, 'a_page': AMIS_PAGE}
+    assert generator.generate(request(pages=pages))[1] == \
+        generator.generate(request(pages=dict(reversed(list(pages.items())))))[1]
+    with zipfile.ZipFile(io.BytesIO(body)) as zf:
+        names = zf.namelist()
+    assert names == sorted(names)
+    assert 'src/main/java/com/hg/oa/order_list/controller/OrderListController.java' in names
+
+def test_manifest_output_matches_zip(generator):
+    _, body, _ = generator.generate(request())
+    content_type, manifest, filename = generator.generate(request(output='manifest'))
+    assert (content_type, filename) == ('application/json', 'oa-backend.manifest.json')
+    manifest = json.loads(manifest)
+    with zipfile.ZipFile(io.BytesIO(body)) as zf:
+        expected = [{'path': name, 'size': len(zf.read(name)), 'sha256': hashlib.sha256(zf.read(name)).hexdigest()}
+                    for name in zf.namelist()]
+    assert manifest == {'artifact_id': 'oa-backend', 'files': expected}
+
+def test_invalid_page_is_reported(generator):
+    with pytest.raises(ValueError, match='OpenAPI 校验未通过'):
+        generator.generate(request(kind='openapi', pages={'bad': {'openapi': '2.0'}}))
+    with pytest.raises(ValueError, match='页面未生成.*: bad'):
+        generator.generate(request(kind='openapi', pages={'bad': {'openapi': '3.0.0'}}))
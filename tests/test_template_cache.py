@@ -0,0 +1,58 @@
+import os
+
+from jinja2 import FileSystemLoader, ModuleLoader
+
+from template_cache import create_template_env, hash_templates, precompile_templates, STAMP_FILE
+
+def write_templates(folder, templates):
+    os.makedirs(folder, exist_ok=True)
+    for name, source in templates.items():
+        with open(os.path.join(folder, name), 'w', encoding='utf-8') as fw:
+            fw.write(source)
+    return str(folder)
+
+TEMPLATES = {'entity.java.j2': 'class {{ name | upper_first }} {}', 'notes.txt': 'ignored'}
+
+def cache_files(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.startswith('__codegen_'))
+
+def test_hash_templates_only_covers_j2(tmp_path):
+    hashes = hash_templates(write_templates(tmp_path / 'templates', TEMPLATES))
+    assert list(hashes) == ['entity.java.j2']
+
+def test_bytecode_cache_is_keyed_by_content(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    first = write_templates(tmp_path / 'a', TEMPLATES)
+    assert create_template_env(first, cache_dir).get_template('entity.java.j2').render(name='user') == 'class User {}'
+    cached = cache_files(cache_dir)
+    assert len(cached) == 1
+
+    # 同内容的模板位于其他目录时共用同一份字节码
+    second = write_templates(tmp_path / 'b', TEMPLATES)
+    assert create_template_env(second, cache_dir).get_template('entity.java.j2').render(name='order') == 'class Order {}'
+    assert cache_files(cache_dir) == cached
+
+    # 模板改动后生成新的缓存项，渲染结果随之更新
+    write_templates(tmp_path / 'b', {'entity.java.j2': 'interface {{ name }} {}'})
+    assert create_template_env(second, cache_dir).get_template('entity.java.j2').render(name='Order') == 'interface Order {}'
+    assert len(cache_files(cache_dir)) == 2
+
+def test_cache_can_be_disabled(tmp_path):
+    env = create_template_env(write_templates(tmp_path / 'templates', TEMPLATES), str(tmp_path / 'cache'), use_cache=False)
+    assert env.bytecode_cache is None
+    assert not os.path.exists(tmp_path / 'cache')
+
+def test_precompiled_templates_are_used_until_stale(tmp_path, capsys):
+    templates_dir = write_templates(tmp_path / 'templates', TEMPLATES)
+    compiled_dir = str(tmp_path / 'compiled')
+    precompile_templates(templates_dir, compiled_dir)
+    assert os.path.exists(os.path.join(compiled_dir, STAMP_FILE))
+    env = create_template_env(templates_dir, str(tmp_path / 'cache'), compiled_dir)
+    assert isinstance(env.loader, ModuleLoader)
+    assert env.get_template('entity.java.j2').render(name='user') == 'class User {}'
+
+    write_templates(tmp_path / 'templates', {'entity.java.j2': 'interface {{ name }} {}'})
+    env = create_template_env(templates_dir, str(tmp_path / 'cache'), compiled_dir)
+    assert '预编译模板已过期' in capsys.readouterr().out
+    assert isinstance(env.loader, FileSystemLoader)
+    assert env.get_template('entity.java.j2').render(name='User') == 'interface User {}'
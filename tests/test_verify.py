@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import hashlib
+import subprocess
+
+from verify import file_manifest, verify_tree
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def entry(data):
+    return {'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+
+def make_tree(root, files):
+    for rel, data in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return file_manifest('app-backend', {rel: entry(data) for rel, data in files.items()})
+
+FILES = {'pom.xml': b'<project/>\n', 'src/App.java': b'class App {}\n', 'src/dto/A.java': b'class A {}\n'}
+
+def test_file_manifest_is_sorted():
+    manifest = file_manifest('app-backend', {rel: entry(data) for rel, data in reversed(list(FILES.items()))})
+    assert [e['path'] for e in manifest['files']] == sorted(FILES)
+
+def test_verify_tree_reports_missing_modified_and_extra(tmp_path):
+    manifest = make_tree(tmp_path, FILES)
+    assert verify_tree(str(tmp_path), manifest) == {'missing': [], 'modified': [], 'extra': []}
+    (tmp_path / 'src/App.java').write_bytes(b'class Ap0 {}\n')
+    (tmp_path / 'src/dto/A.java').unlink()
+    (tmp_path / 'src/Stale.java').write_bytes(b'')
+    assert verify_tree(str(tmp_path), manifest, jobs=2) == {
+        'missing': ['src/dto/A.java'], 'modified': ['src/App.java'], 'extra': ['src/Stale.java']}
+    # 只比大小、不查清单外文件：同长度修改与多余文件都不报告
+    assert verify_tree(str(tmp_path), manifest, check_hash=False, check_extra=False) == {
+        'missing': ['src/dto/A.java'], 'modified': [], 'extra': []}
+
+def page(title, table_name):
+    properties = {
+        f"{table_name}_id": {'type': 'string', 'javaType': 'String', 'description': '编号', 'columnName': f"{table_name}_id"},
+        'amount': {'type': 'string', 'javaType': 'Integer', 'description': '金额', 'columnName': 'amount'},
+    }
+    return {
+        'openapi': '3.0.0',
+        'info': {'title': title, 'tableName': table_name, 'version': '1.0.0'},
+        'paths': {f"/api/{table_name}": {'put': {'summary': f"编辑{title}", 'responses': {'200': {'description': '操作成功'}}}}},
+        'components': {'schemas': {title: {'type': 'object', 'properties': properties}}},
+    }
+
+def codegen(tmp_path, *args):
+    env = dict(os.environ, CODEGEN_CACHE_DIR=str(tmp_path / 'cache'))
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'codegen.py'), '--openapi-dir', str(tmp_path / 'openapi'),
+         '--output-dir', str(tmp_path / 'output'), '--templates-dir', os.path.join(ROOT, 'templates'),
+         '--no-validate', *args],
+        env=env, capture_output=True, text=True, encoding='utf-8')
+    return result.returncode, result.stdout
+
+def write_page(tmp_path, name, doc):
+    path = tmp_path / 'openapi' / 'oa' / f"{name}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(doc, ensure_ascii=False), encoding='utf-8')
+    return path
+
+def order_files(backend):
+    return sorted(os.path.relpath(os.path.join(folder, name), backend)
+                  for folder, _, names in os.walk(backend) for name in names if 'order' in name.lower())
+
+def test_removed_page_outputs_are_pruned(tmp_path):
+    backend = str(tmp_path / 'output' / 'oa-backend')
+    write_page(tmp_path, 'user_list', page('UserMain', 'user_main'))
+    order_page = write_page(tmp_path, 'order_list', page('OrderMain', 'order_main'))
+    assert codegen(tmp_path)[0] == 0
+    assert order_files(backend)
+    assert os.path.isdir(os.path.join(backend, 'src/main/java/com/hg/oa/order_list'))
+
+    # 页面读取失败时不清理，上次的输出仍计入清单
+    order_page.write_text('{', encoding='utf-8')
+    code, out = codegen(tmp_path)
+    assert '本次不清理' in out
+    assert order_files(backend)
+    assert codegen(tmp_path, '--verify')[0] == 0
+
+    order_page.unlink()
+    code, out = codegen(tmp_path)
+    assert code == 0
+    assert '删除不再生成的文件' in out
+    assert order_files(backend) == []
+    assert not os.path.exists(os.path.join(backend, 'src/main/java/com/hg/oa/order_list'))
+    assert os.path.isdir(os.path.join(backend, 'src/main/java/com/hg/oa/user_list'))
+    assert codegen(tmp_path, '--verify')[0] == 0
+
+def test_modified_output_of_removed_page_is_kept(tmp_path):
+    backend = str(tmp_path / 'output' / 'oa-backend')
+    write_page(tmp_path, 'user_list', page('UserMain', 'user_main'))
+    order_page = write_page(tmp_path, 'order_list', page('OrderMain', 'order_main'))
+    assert codegen(tmp_path, '--force')[0] == 0
+    edited = os.path.join(backend, [rel for rel in order_files(backend) if rel.endswith('Controller.java')][0])
+    with open(edited, 'a', encoding='utf-8') as fw:
+        fw.write('// 手工修改\n')
+    order_page.unlink()
+    code, out = codegen(tmp_path, '--force')
+    assert code == 0
+    assert '内容被修改过，保留' in out
+    assert [os.path.join(backend, rel) for rel in order_files(backend)] == [edited]
@@ -0,0 +1,72 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from codegen import make_zip_dir
+from zip_output import ReproducibleZip, FIXED_DATE_TIME
+
+FILES = {
+    'pom.xml': '<project/>\n',
+    'src/main/java/com/hg/App.java': 'class App {}\n',
+    'src/main/resources/application.yml': 'server:\n  port: 8080\n',
+    'README.md': '# 说明\n',
+}
+
+def build(files, order=None, **kwargs):
+    archive = ReproducibleZip(None, **kwargs)
+    for rel in order or files:
+        archive.add(rel, files[rel])
+    return archive.getvalue()
+
+def test_same_input_same_bytes_regardless_of_add_order():
+    data = build(FILES)
+    assert build(FILES, order=sorted(FILES, reverse=True)) == data
+    assert build(FILES, threads=1, window=1) == data
+    assert build(FILES, threads=4, window=2) == data
+
+def test_entries_sorted_with_fixed_metadata():
+    with zipfile.ZipFile(io.BytesIO(build(FILES))) as zf:
+        infos = zf.infolist()
+        assert [i.filename for i in infos] == sorted(FILES)
+        for info in infos:
+            assert info.date_time == FIXED_DATE_TIME
+            assert info.external_attr >> 16 == 0o100644
+            assert info.compress_type == zipfile.ZIP_DEFLATED
+            assert zf.read(info).decode('utf-8') == FILES[info.filename]
+
+def test_bytes_str_and_loader_sources_are_equivalent():
+    as_bytes = {rel: code.encode('utf-8') for rel, code in FILES.items()}
+    as_loader = {rel: (lambda data=data: data) for rel, data in as_bytes.items()}
+    data = build(FILES)
+    assert build(as_bytes) == data
+    assert build(as_loader) == data
+
+def test_level_zero_stores_entries():
+    with zipfile.ZipFile(io.BytesIO(build(FILES, level=0))) as zf:
+        assert {i.compress_type for i in zf.infolist()} == {zipfile.ZIP_STORED}
+    with pytest.raises(ValueError):
+        ReproducibleZip(None, level=10)
+
+def test_later_add_replaces_entry():
+    archive = ReproducibleZip(None)
+    archive.add('a.txt', 'old')
+    archive.add('a.txt', 'new')
+    with zipfile.ZipFile(io.BytesIO(archive.getvalue())) as zf:
+        assert zf.namelist() == ['a.txt']
+        assert zf.read('a.txt') == b'new'
+
+def test_zip_of_written_dir_matches_in_memory_zip(tmp_path):
+    """--zip（落盘后打包）与 --zip-only（渲染结果直接写入）产出逐字节相同"""
+    src = tmp_path / 'app-backend'
+    for rel, code in FILES.items():
+        path = src / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(code.encode('utf-8'))
+        os.utime(path, (1700000000, 1700000000))
+    zip_path = str(tmp_path / 'app-backend.zip')
+    make_zip_dir(str(src), zip_path)
+    with open(zip_path, 'rb') as f:
+        assert f.read() == build(FILES)
+    assert not os.path.exists(zip_path + '.tmp')
@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import glob
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_SUFFIX = '.files.json'
+
+def manifest_path(output_dir, artifact_id):
+    return os.path.join(output_dir, '.codegen', f"{artifact_id}{MANIFEST_SUFFIX}")
+
+def file_manifest(artifact_id, files):
+    """files 为 {相对路径(/ 分隔): {'sha256', 'size'}}，返回按路径排序的文件清单"""
+    return {
+        'artifact_id': artifact_id,
+        'files': [{'path': rel, 'size': files[rel]['size'], 'sha256': files[rel]['sha256']} for rel in sorted(files)],
+    }
+
+def write_file_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fw:
+        json.dump(manifest, fw, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+def _check_file(root, entry, check_hash):
+    """返回 None（一致）、'missing' 或 'modified'；先比大小，能发现截断文件而不必读内容"""
+    full_path = os.path.join(root, entry['path'])
+    try:
+        if os.path.getsize(full_path) != entry['size']:
+            return 'modified'
+        if not check_hash:
+            return None
+        h = hashlib.sha256()
+        with open(full_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+    except FileNotFoundError:
+        return 'missing'
+    except OSError:
+        return 'modified'
+    return None if h.hexdigest() == entry['sha256'] else 'modified'
+
+def verify_tree(root, manifest, jobs=None, check_hash=True, check_extra=True):
+    """
+    按文件清单并行校验生成目录，返回 {'missing': [...], 'modified': [...], 'extra': [...]}（相对路径，已排序）。
+    check_hash=False 时只比较大小；check_extra=False 时不遍历目录查找清单外的文件。
+    """
+    entries = manifest['files']
+    jobs = jobs or min(32, (os.cpu_count() or 1) * 4)
+    result = {'missing': [], 'modified': [], 'extra': []}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        states = executor.map(lambda e: _check_file(root, e, check_hash), entries, chunksize=64)
+        for entry, state in zip(entries, states):
+            if state is not None:
+                result[state].append(entry['path'])
+    if check_extra:
+        expected = {e['path'] for e in entries}
+        for folder, _, filenames in os.walk(root):
+            for name in filenames:
+                rel = os.path.relpath(os.path.join(folder, name), root).replace(os.sep, '/')
+                if rel not in expected:
+                    result['extra'].append(rel)
+        result['extra'].sort()
+    return result
+
+def print_verify_result(artifact_id, result, max_items=50):
+    """打印校验结果，返回是否一致"""
+    problems = sum(len(v) for v in result.values())
+    if not problems:
+        print(f"[校验] {artifact_id} 与清单一致，通过。")
+        return True
+    print(f"[ERROR][校验] {artifact_id} 缺失 {len(result['missing'])} 个，被修改 {len(result['modified'])} 个，"
+          f"清单外 {len(result['extra'])} 个文件：")
+    for state, label in (('missing', '缺失'), ('modified', '被修改'), ('extra', '清单外')):
+        for rel in result[state][:max_items]:
+            print(f"  [{label}] {rel}")
+        if len(result[state]) > max_items:
+            print(f"  ... 另有 {len(result[state]) - max_items} 个{label}文件")
+    return False
+
+def verify_output_dir(output_dir, artifact_ids=None, jobs=None):
+    """
+    校验 output_dir 下各工程（默认全部已生成清单的工程），返回是否全部一致；
+    未指定工程时跳过工程目录不存在而只有同名 zip 的清单（早期 --zip-only 运行遗留，没有可校验的目录）
+    """
+    if artifact_ids is None:
+        paths = sorted(glob.glob(os.path.join(output_dir, '.codegen', f"*{MANIFEST_SUFFIX}")))
+    else:
+        paths = [manifest_path(output_dir, a) for a in artifact_ids]
+    if not paths:
+        print(f"[ERROR][校验] 未找到文件清单: {os.path.join(output_dir, '.codegen')}")
+        return False
+    ok = True
+    for path in paths:
+        try:
+            with open(path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR][校验] 文件清单读取失败: {path} - {e}")
+            ok = False
+            continue
+        artifact_id = manifest['artifact_id']
+        if (artifact_ids is None and not os.path.isdir(os.path.join(output_dir, artifact_id))
+                and os.path.isfile(os.path.join(output_dir, f"{artifact_id}.zip"))):
+            print(f"[INFO][校验] {artifact_id} 只有 zip 包、没有工程目录，跳过")
+            continue
+        result = verify_tree(os.path.join(output_dir, artifact_id), manifest, jobs)
+        ok = print_verify_result(artifact_id, result) and ok
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="按生成时写出的文件清单（路径/大小/sha256）并行校验生成工程，报告缺失、被修改与清单外的文件")
+    parser.add_argument('--output-dir', default='./output', help='codegen 输出目录')
+    parser.add_argument('--artifact', action='append', default=None, help='只校验指定工程（如 test-backend），可重复')
+    parser.add_argument('--jobs', type=int, default=0, help='并行线程数，默认 0 表示 CPU 核数 × 4（上限 32）')
+    args = parser.parse_args()
+    ok = verify_output_dir(os.path.abspath(args.output_dir), args.artifact, args.jobs or None)
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
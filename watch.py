@@ -0,0 +1,66 @@
+import os
+import time
+import traceback
+
+# 检测到变化后再等待的时间：编辑器保存可能分多次落盘，合并为一次重新生成
+SETTLE_SECONDS = 0.05
+
+class DirWatcher:
+    """
+    轮询方式监听若干目录树（不依赖 inotify 等平台特性）：
+    按 (mtime_ns, size) 记录文件快照，poll() 返回与上次快照相比新增/修改/删除的文件。
+    """
+    def __init__(self, roots, suffixes=('.json', '.j2')):
+        self.roots = [r for r in roots if r]
+        self.suffixes = suffixes
+        self.files = self.scan()
+
+    def scan(self):
+        files = {}
+        for root in self.roots:
+            for folder, _, filenames in os.walk(root):
+                for name in filenames:
+                    if not name.endswith(self.suffixes):
+                        continue
+                    path = os.path.join(folder, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    files[path] = (st.st_mtime_ns, st.st_size)
+        return files
+
+    def poll(self):
+        current = self.scan()
+        changed = {p for p, sig in current.items() if self.files.get(p) != sig}
+        changed.update(p for p in self.files if p not in current)
+        self.files = current
+        return changed
+
+def watch_loop(watcher, on_change, interval=0.3):
+    """
+    常驻轮询：检测到变化后合并短时间内的连续写入，再以 on_change(变化文件列表) 回调；
+    文件是否已删除由回调方用 os.path.exists 判断。Ctrl+C 退出。
+    """
+    print(f"[watch] 监听中（轮询间隔 {interval}s，Ctrl+C 退出）: {', '.join(watcher.roots)}")
+    try:
+        while True:
+            time.sleep(interval)
+            paths = watcher.poll()
+            if not paths:
+                continue
+            while True:
+                time.sleep(SETTLE_SECONDS)
+                more = watcher.poll()
+                if not more:
+                    break
+                paths |= more
+            start = time.perf_counter()
+            try:
+                on_change(sorted(paths))
+            except Exception as e:
+                print(f"[ERROR][watch] 重新生成失败 - {e}")
+                print(traceback.format_exc())
+            print(f"[watch] {len(paths)} 个文件变化，重新生成耗时 {(time.perf_counter() - start) * 1000:.0f}ms")
+    except KeyboardInterrupt:
+        print("\n[watch] 已退出")
@@ -0,0 +1,78 @@
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# 固定时间戳 1980-01-01 00:00:00（DOS 时间下限），保证相同输入得到逐字节相同的压缩包
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+EXTERNAL_ATTR = 0o100644 << 16
+CREATE_SYSTEM_UNIX = 3
+# 预读窗口：同时在内存中的待写条目数上限，峰值内存与工程大小无关
+DEFAULT_WINDOW = 32
+
+def _load(data):
+    if callable(data):
+        data = data()
+    return data.encode('utf-8') if isinstance(data, str) else data
+
+class ReproducibleZip:
+    """
+    可复现的 ZIP 写出器：条目按路径排序、时间戳与权限固定，由 zipfile 逐条写出（条目或总大小超出 ZIP32 时自动用 ZIP64）。
+    add() 只登记条目来源，close() 时按路径顺序写出：后续条目在线程池中预读 / 编码，最多 window 个在内存中，
+    与当前条目的压缩（zlib 压缩时释放 GIL）重叠进行。
+    """
+    def __init__(self, zip_path, level=6, threads=None, window=DEFAULT_WINDOW):
+        if not 0 <= level <= 9:
+            raise ValueError(f"压缩级别必须在 0-9 之间: {level}")
+        self.zip_path = zip_path
+        self.level = level
+        self.threads = threads or min(4, os.cpu_count() or 1)
+        self.window = max(1, window)
+        self.entries = {}
+
+    def add(self, arcname, data):
+        """
+        登记一个文件条目：data 为 bytes、str（按 UTF-8 写出）或返回二者之一的无参函数（写出时才读取）；
+        同名条目以后登记的为准
+        """
+        self.entries[arcname.replace(os.sep, '/')] = data
+
+    def close(self):
+        tmp_path = self.zip_path + '.tmp'
+        with open(tmp_path, 'wb') as fw:
+            count = self.write(fw)
+        os.replace(tmp_path, self.zip_path)
+        return count
+
+    def getvalue(self):
+        """不落盘，直接返回压缩包字节（服务模式）"""
+        import io
+        buf = io.BytesIO()
+        self.write(buf)
+        return buf.getvalue()
+
+    def _info(self, name):
+        info = zipfile.ZipInfo(name, FIXED_DATE_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED if self.level else zipfile.ZIP_STORED
+        info.create_system = CREATE_SYSTEM_UNIX
+        info.external_attr = EXTERNAL_ATTR
+        return info
+
+    def write(self, fw):
+        """把压缩包写入可写的二进制文件对象，返回条目数"""
+        names = sorted(self.entries)
+        with ThreadPoolExecutor(max_workers=self.threads) as executor, \
+                zipfile.ZipFile(fw, 'w', allowZip64=True, compresslevel=self.level or None) as zf:
+            pending = deque()
+            upcoming = iter(names)
+            for name in upcoming:
+                pending.append((name, executor.submit(_load, self.entries[name])))
+                if len(pending) >= self.window:
+                    break
+            while pending:
+                name, future = pending.popleft()
+                next_name = next(upcoming, None)
+                if next_name is not None:
+                    pending.append((next_name, executor.submit(_load, self.entries[next_name])))
+                zf.writestr(self._info(name), future.result())
+        return len(names)